@@ -2,10 +2,67 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str
+    database_replica_urls: list[str] = []
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
     base_url: str
+    db_async: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 0
+    db_migrate_on_startup: bool = True
+    auth_stateless: bool = False
+    token_version_refresh_seconds: float = 30
+    token_revocation_store: str = "database"
+    token_revocation_sync_seconds: float = 5
+    token_revocation_max_entries: int = 100_000
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_queue_size: int = 32
+    rate_limit_enabled: bool = True
+    rate_limit_redis_url: str | None = None
+    rate_limit_max_entries: int = 100_000
+    login_rate_limit_per_ip: int = 30
+    login_rate_limit_failures_per_username: int = 10
+    login_rate_limit_window_seconds: float = 60
+    admin_write_rate_limit: int = 300
+    admin_write_rate_limit_window_seconds: float = 60
+    page_size_default: int = 50
+    page_size_max: int = 200
+    bulk_max_items: int = 500
+    export_batch_size: int = 1000
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 30
+    cache_max_entries: int = 1024
+    cache_redis_url: str | None = None
+    metrics_enabled: bool = True
+    health_check_interval_seconds: float = 5
+    replica_health_check_seconds: float = 5
+    replica_sticky_seconds: int = 5
+    server_timing_enabled: bool = True
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    storage_backend: str = "local"
+    media_root: str = "media"
+    media_url: str = "/media"
+    upload_max_bytes: int = 10 * 1024 * 1024
+    image_variant_widths: dict[str, int] = {"small": 320, "medium": 768}
+    job_workers: int = 2
+    job_queue_size: int = 256
+    job_max_attempts: int = 5
+    job_retry_seconds: float = 2
+    job_poll_seconds: float = 5
+    job_orphan_seconds: float = 60
+    site_rebuild_url: str | None = None
+    change_stream_poll_seconds: float = 5
+    change_retention_days: float = 30
+    change_prune_interval_seconds: float = 3600
 
     class Config:
         env_file = ".env"
@@ -1,16 +1,316 @@
-from fastapi import Depends
+import threading
+import time
+
+from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
+import sqlalchemy
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Annotated
 
 from app.config import settings
+from app.utils.health_utils import ReadinessProbe
+from app.utils.metrics_utils import record_pool_wait, record_statement
+from app.utils.replica_utils import reads_primary, record_write
 
 DB_URL = settings.database_url
 
-engine = create_engine(DB_URL)
+def async_database_url(url: str) -> str:
+    scheme, _, rest = url.partition("://")
+    driver = {
+        "postgres": "postgresql+psycopg",
+        "postgresql": "postgresql+psycopg",
+        "sqlite": "sqlite+aiosqlite",
+    }.get(scheme, scheme)
+    return f"{driver}://{rest}"
+
+class PoolStats:
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def as_dict(self):
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_avg": round(
+                self.wait_seconds_total / self.checkouts, 6
+            ) if self.checkouts else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 6)
+        }
+
+pool_stats = PoolStats()
+
+# _do_get is where QueuePool blocks for a free connection (or opens a new one)
+class _TimedPoolMixin:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_stats.record_wait(waited)
+            record_pool_wait(waited)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def engine_options(url: str, async_mode: bool = False) -> dict:
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    # In-memory SQLite is pinned to a single connection by its own pool class
+    if url.startswith("sqlite") and (
+        url.rstrip("/").endswith(":") or ":memory:" in url
+    ):
+        return options
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if async_mode else TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    if url.startswith("postgres") and settings.db_statement_timeout_ms:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.db_statement_timeout_ms}"
+        }
+    return options
+
+engine = create_engine(DB_URL, **engine_options(DB_URL))
+
+async_engine = (
+    create_async_engine(
+        async_database_url(DB_URL), **engine_options(DB_URL, async_mode=True)
+    ) if settings.db_async else None
+)
+
+def active_engine():
+    return async_engine.sync_engine if settings.db_async else engine
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite enforces foreign keys only when asked to, per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def enforce_foreign_keys(sync_engine):
+    if sync_engine.dialect.name == "sqlite":
+        sqlalchemy.event.listen(sync_engine, "connect", _enable_foreign_keys)
+
+enforce_foreign_keys(engine)
+if async_engine is not None:
+    enforce_foreign_keys(async_engine.sync_engine)
+
+@sqlalchemy.event.listens_for(active_engine(), "connect")
+def _count_connect(dbapi_connection, connection_record):
+    pool_stats.connects += 1
+
+# Statements run one at a time per connection, so a single start mark is enough
+@sqlalchemy.event.listens_for(active_engine(), "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info["statement_started_at"] = time.perf_counter()
+
+@sqlalchemy.event.listens_for(active_engine(), "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    now = time.perf_counter()
+    record_statement(now - conn.info.pop("statement_started_at", now))
+
+# Only the primary takes writes; a write pins the client's reads to it
+@sqlalchemy.event.listens_for(active_engine(), "after_cursor_execute")
+def _mark_write(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+        record_write()
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = create_engine(url, **engine_options(url))
+        self.async_engine = (
+            create_async_engine(
+                async_database_url(url), **engine_options(url, async_mode=True)
+            ) if settings.db_async else None
+        )
+        self.probe = ReadinessProbe(settings.replica_health_check_seconds)
+        enforce_foreign_keys(self.engine)
+        if self.async_engine is not None:
+            enforce_foreign_keys(self.async_engine.sync_engine)
+        # Statements on replicas count towards Server-Timing like any other
+        for name, fn in (
+            ("before_cursor_execute", _start_statement),
+            ("after_cursor_execute", _end_statement),
+        ):
+            sqlalchemy.event.listen(self.active_engine(), name, fn)
+
+    def active_engine(self):
+        return self.async_engine.sync_engine if settings.db_async else self.engine
+
+    def _ping_sync(self):
+        with self.engine.connect() as conn:
+            conn.execute(sqlalchemy.text("SELECT 1"))
+
+    async def ping(self):
+        if settings.db_async:
+            async with self.async_engine.connect() as conn:
+                await conn.execute(sqlalchemy.text("SELECT 1"))
+        else:
+            await run_in_threadpool(self._ping_sync)
+
+    async def is_healthy(self) -> bool:
+        return (await self.probe.check(self.ping))["database"]
+
+    def status(self) -> dict:
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            **(self.probe.result or {"database": None})
+        }
+
+# Replicas in turn, skipping any whose last health check failed. None
+# means every replica is down and reads go to the primary.
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica]):
+        self.replicas = replicas
+        self._next = 0
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    async def choose(self) -> Replica | None:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if await replica.is_healthy():
+                return replica
+        return None
+
+replicas = ReplicaSet([Replica(url) for url in settings.database_replica_urls])
+
+def pool_status() -> dict:
+    pool = active_engine().pool
+    status = {"pool": pool.status(), **pool_stats.as_dict()}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            capacity=pool.size() + settings.db_max_overflow
+        )
+    return status
+
+def pool_saturation() -> float:
+    pool = active_engine().pool
+    if not isinstance(pool, QueuePool):
+        return 0.0
+    return pool.checkedout() / (pool.size() + settings.db_max_overflow)
+
+def _ping_sync():
+    with engine.connect() as conn:
+        conn.execute(sqlalchemy.text("SELECT 1"))
+
+async def ping():
+    if settings.db_async:
+        async with async_engine.connect() as conn:
+            await conn.execute(sqlalchemy.text("SELECT 1"))
+    else:
+        await run_in_threadpool(_ping_sync)
 
 def create_db_and_tables():
+    # Schema changes go through app.migrations; this stays for scripts that
+    # only need the tables on a scratch database
     SQLModel.metadata.create_all(engine)
 
-def get_session():
+def get_sync_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # Objects must stay readable after commit without lazy IO on the loop
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+get_session = get_async_session if settings.db_async else get_sync_session
+
+async def get_read_session(request: Request):
+    # For handlers that only read: a healthy replica unless the client wrote
+    # within the last few seconds, otherwise the primary
+    replica = None
+    if replicas and not reads_primary(request):
+        replica = await replicas.choose()
+    if settings.db_async:
+        bind = replica.async_engine if replica else async_engine
+        async with AsyncSession(bind, expire_on_commit=False) as session:
+            session.sync_session.info["replica"] = replica
+            yield session
+    else:
+        with Session(replica.engine if replica else engine) as session:
+            session.info["replica"] = replica
+            yield session
+
+async def stream(statement, batch_size: int):
+    # Yields the statement's rows in batches off a server-side cursor. It
+    # opens its own session because a StreamingResponse keeps reading after
+    # the request's session dependency has been closed.
+    statement = statement.execution_options(yield_per=batch_size)
+    if settings.db_async:
+        async with AsyncSession(async_engine) as session:
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                yield rows
+        return
+    with Session(engine) as session:
+        result = await run_in_threadpool(session.execute, statement)
+        try:
+            while rows := await run_in_threadpool(result.fetchmany, batch_size):
+                yield rows
+        finally:
+            result.close()
+
+async def _run(session: Session | AsyncSession, fn, *args, **kwargs):
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, session, *args, **kwargs)
+
+async def run(session: Session | AsyncSession, fn, *args, **kwargs):
+    # Route handlers keep their query logic in plain functions taking a sync
+    # Session. In async mode those run on the event loop through the async
+    # session's greenlet bridge; in sync mode they go to the threadpool.
+    try:
+        return await _run(session, fn, *args, **kwargs)
+    except sqlalchemy.exc.OperationalError as e:
+        info = session.sync_session.info if isinstance(session, AsyncSession) else session.info
+        replica = info.get("replica")
+        if replica is None:
+            raise
+        # The replica failed between health checks: take it out of rotation
+        # and answer this request from the primary
+        replica.probe.mark_down(str(e))
+    return await run_detached(fn, *args, **kwargs)
+
+async def run_detached(fn, *args, **kwargs):
+    # Like run, in a primary session of its own, for code that has no request
+    # session to use, such as a stream that outlives its request
+    if settings.db_async:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await _run(session, fn, *args, **kwargs)
+    with Session(engine) as session:
+        return await _run(session, fn, *args, **kwargs)
@@ -1,47 +1,159 @@
-from fastapi import FastAPI, Depends
-from fastapi.concurrency import asynccontextmanager
-import sqlalchemy
-from sqlmodel import Session, select
+from fastapi import FastAPI, Depends, Response, status
+from fastapi.concurrency import asynccontextmanager, run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
+from sqlmodel import Session, func, select
 
 from app.models.service import Service
 
-from .routes import auth, users, services, categories, projects
+from .routes import auth, bulk, changes, exports, search, users, services, categories, projects
 
 from app import db
+from app.utils.auth_utils import password_executor
+from app.config import settings
+from app.migrations import migrate
+from app.utils.cache_utils import content_cache, item_cache
+from app.utils.compression_utils import CompressionMiddleware
+from app.utils.health_utils import ReadinessProbe
+from app.utils.job_utils import job_queue
+from app.utils.json_utils import FastJSONResponse
+from app.utils.metrics_utils import MetricsMiddleware, request_metrics
+from app.utils.rate_limit_utils import AdminWriteRateLimitMiddleware, RATE_LIMITS
+from app.utils.replica_utils import ReadYourWritesMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # create_db_and_tables()
+    if settings.db_migrate_on_startup:
+        await run_in_threadpool(migrate, db.engine)
+    job_queue.start()
     yield
+    job_queue.stop()
+    password_executor.shutdown()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(ReadYourWritesMiddleware)
+# Added before the metrics middleware so it runs inside it, and the
+# request timings include the time spent compressing
+app.add_middleware(CompressionMiddleware)
+# Outside everything but the metrics, so rejected writes are counted there
+# and cost nothing else
+app.add_middleware(AdminWriteRateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # @app.get("/test")
 # async def test_endpoint():
 #     return {"status": "ok"}
 
+readiness = ReadinessProbe(settings.health_check_interval_seconds)
+
+@app.get("/health/live")
+async def liveness():
+    return {"success": True}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    saturation = db.pool_saturation()
+    result = await readiness.check(db.ping, skip=saturation >= 1)
+    if not result["database"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "success": result["database"],
+        "data": {**result, "pool_saturation": round(saturation, 3)}
+    }
+
+def _count_published_services(session: Session):
+    statement = select(func.count()).select_from(Service).where(
+        Service.is_published == True
+    )
+    return session.exec(statement).one()
+
 @app.get("/health/db")
-def test_db(session: Session = Depends(db.get_session)):
-    print("✅ Running DB health check...")
-    with session.get_bind().connect() as conn:
-        db_name = conn.execute(sqlalchemy.text("SELECT current_database();")).scalar()
-        print("🎯 Connected to DB:", db_name)
+async def test_db(session: Session = Depends(db.get_session)):
     try:
-        statement = select(Service).where(Service.is_published == True)
-        results = session.exec(statement).all()
         return {
             "success": True,
-            "record_count": len(results)
+            "record_count": await db.run(session, _count_published_services)
         }
     except Exception as e:
-        print("❌ DB Error:", e)
         return {
             "success": False,
             "error": str(e)
         }
 
+@app.get("/health/db/pool")
+async def db_pool_stats():
+    return {
+        "success": True,
+        "data": db.pool_status()
+    }
+
+@app.get("/health/db/replicas")
+async def db_replica_stats():
+    return {
+        "success": True,
+        "data": [replica.status() for replica in db.replicas.replicas]
+    }
+
+@app.get("/health/executors")
+async def executor_stats():
+    return {
+        "success": True,
+        "data": {"password": password_executor.stats()}
+    }
+
+@app.get("/health/jobs")
+async def job_stats(session: Session = Depends(db.get_session)):
+    return {
+        "success": True,
+        "data": {
+            **job_queue.stats(),
+            "stored": await db.run(session, job_queue.status_counts)
+        }
+    }
+
+@app.get("/health/cache")
+async def cache_stats():
+    return {
+        "success": True,
+        "data": {**content_cache.stats(), "items": item_cache.stats()}
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    pool = db.pool_status()
+    password = password_executor.stats()
+    extra = {
+        "db_pool_checked_out": ("gauge", "Connections checked out.", pool.get("checked_out", 0)),
+        "db_pool_overflow": ("gauge", "Overflow connections open, negative below pool_size.", pool.get("overflow", 0)),
+        "db_pool_connects_total": ("counter", "Connections opened.", pool["connects"]),
+        "db_pool_timeouts_total": ("counter", "Checkouts that timed out.", pool["timeouts"]),
+        "db_pool_wait_seconds_total": ("counter", "Pool checkout wait.", pool["wait_seconds_total"]),
+        "password_executor_active": ("gauge", "Password hashes running.", password["active"]),
+        "password_executor_queued": ("gauge", "Password hashes queued.", password["queued"]),
+    }
+    for limit in RATE_LIMITS:
+        extra[f"rate_limit_{limit.name}_rejected_total"] = (
+            "counter", f"Requests rejected by the {limit.name} rate limit.", limit.rejected
+        )
+    return PlainTextResponse(
+        request_metrics.render(extra) + job_queue.render_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 app.include_router(auth.router)
+app.include_router(exports.router)
 app.include_router(users.router)
+app.include_router(bulk.router)
+app.include_router(search.router)
 app.include_router(services.router)
 app.include_router(categories.router)
 app.include_router(projects.router)
+app.include_router(changes.router)
+
+# Uploaded images, when they are stored on this server's disk
+if settings.storage_backend == "local":
+    app.mount(
+        settings.media_url,
+        StaticFiles(directory=settings.media_root, check_dir=False),
+        name="media"
+    )
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.engine import Engine
+
+from app.migrations import (
+    m0001_baseline,
+    m0002_missing_columns,
+    m0003_query_indexes,
+    m0004_search_vectors,
+    m0005_image_variants,
+    m0006_jobs,
+    m0007_change_log,
+    m0008_published_snapshot,
+    m0009_change_namespace_index,
+    m0010_deleted_users,
+    m0011_change_retention,
+)
+
+# Applied in order, each exactly once. A migration is a module with VERSION,
+# NAME and upgrade(conn); it runs inside the same transaction as its record
+# in schema_migrations.
+MIGRATIONS = [
+    m0001_baseline,
+    m0002_missing_columns,
+    m0003_query_indexes,
+    m0004_search_vectors,
+    m0005_image_variants,
+    m0006_jobs,
+    m0007_change_log,
+    m0008_published_snapshot,
+    m0009_change_namespace_index,
+    m0010_deleted_users,
+    m0011_change_retention,
+]
+
+# Arbitrary key for the Postgres advisory lock held while migrating
+LOCK_KEY = 7_415_290
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+def applied_versions(engine: Engine) -> list[int]:
+    with engine.connect() as conn:
+        if not engine.dialect.has_table(conn, schema_migrations.name):
+            return []
+        return list(conn.execute(
+            select(schema_migrations.c.version).order_by(schema_migrations.c.version)
+        ).scalars())
+
+def migrate(engine: Engine, target: int | None = None) -> list[int]:
+    applied = []
+    with engine.begin() as conn:
+        # Several workers may start at once; only one of them migrates
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+        schema_migrations.create(conn, checkfirst=True)
+        done = set(conn.execute(select(schema_migrations.c.version)).scalars())
+        for migration in MIGRATIONS:
+            if migration.VERSION in done:
+                continue
+            if target is not None and migration.VERSION > target:
+                break
+            migration.upgrade(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=migration.VERSION,
+                name=migration.NAME,
+                applied_at=datetime.now(timezone.utc)
+            ))
+            applied.append(migration.VERSION)
+    return applied
@@ -0,0 +1,18 @@
+import argparse
+
+from app import db
+from app.migrations import MIGRATIONS, applied_versions, migrate
+
+parser = argparse.ArgumentParser(prog="python -m app.migrations")
+parser.add_argument("--target", type=int, help="stop after this version")
+parser.add_argument("--status", action="store_true", help="list migrations and exit")
+args = parser.parse_args()
+
+if args.status:
+    done = set(applied_versions(db.engine))
+    for migration in MIGRATIONS:
+        state = "applied" if migration.VERSION in done else "pending"
+        print(f"{migration.VERSION:04d} {migration.NAME}: {state}")
+else:
+    applied = migrate(db.engine, args.target)
+    print(f"Applied {len(applied)} migration(s): {applied}")
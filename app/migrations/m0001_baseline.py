@@ -0,0 +1,13 @@
+from sqlmodel import SQLModel
+
+# Every table model must be imported so it is registered on the metadata
+from app.models import category, project, revoked_token, service, user
+
+VERSION = 1
+NAME = "baseline"
+
+def upgrade(conn):
+    # Creates whatever tables are missing; databases set up by hand before
+    # migrations existed keep their tables and are brought forward by the
+    # later steps
+    SQLModel.metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import inspect, text
+
+VERSION = 2
+NAME = "missing_columns"
+
+COLUMNS = [
+    ("service", "updated_at", "TIMESTAMP"),
+    ("project", "updated_at", "TIMESTAMP"),
+    ("user", "token_version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+def upgrade(conn):
+    inspector = inspect(conn)
+    quote = conn.dialect.identifier_preparer.quote
+    for table, column, ddl in COLUMNS:
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {column} {ddl}"))
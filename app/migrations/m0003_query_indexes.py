@@ -0,0 +1,35 @@
+from sqlalchemy import inspect, text
+
+VERSION = 3
+NAME = "query_indexes"
+
+def upgrade(conn):
+    published = "is_published" if conn.dialect.name == "postgresql" else "is_published = 1"
+    for statement in (
+        f"CREATE INDEX IF NOT EXISTS ix_service_published_id "
+        f"ON service (id) WHERE {published}",
+        f"CREATE INDEX IF NOT EXISTS ix_service_published_title "
+        f"ON service (title, id) WHERE {published}",
+        "CREATE INDEX IF NOT EXISTS ix_project_published_category "
+        "ON project (is_published, category_id, project_id)",
+        f"CREATE INDEX IF NOT EXISTS ix_project_published_id "
+        f"ON project (project_id) WHERE {published}",
+        # Leading column of ix_project_published_category
+        "DROP INDEX IF EXISTS ix_project_is_published",
+    ):
+        conn.execute(text(statement))
+
+    # SQLite cannot add a constraint to an existing table; new SQLite
+    # databases get the foreign key from the baseline instead
+    if conn.dialect.name != "postgresql":
+        return
+    if not any(
+        fk["referred_table"] == "category"
+        for fk in inspect(conn).get_foreign_keys("project")
+    ):
+        # NOT VALID: enforced for new writes without scanning existing rows,
+        # which may still reference deleted categories
+        conn.execute(text(
+            "ALTER TABLE project ADD CONSTRAINT project_category_id_fkey "
+            "FOREIGN KEY (category_id) REFERENCES category (category_id) NOT VALID"
+        ))
@@ -0,0 +1,30 @@
+from sqlalchemy import text
+
+VERSION = 4
+NAME = "search_vectors"
+
+STATEMENTS = [
+    "ALTER TABLE service ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS ix_service_search_vector "
+    "ON service USING gin (search_vector)",
+    # Kept up to date by the write handlers since it includes the category name
+    "ALTER TABLE project ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "UPDATE project SET search_vector = "
+    "setweight(to_tsvector('english', regexp_replace("
+    "coalesce(project.project_image, ''), '[^[:alnum:]]+', ' ', 'g')), 'A') || "
+    "setweight(to_tsvector('english', coalesce((SELECT category_name "
+    "FROM category WHERE category.category_id = project.category_id), '')), 'A')",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_vector "
+    "ON project USING gin (search_vector)",
+]
+
+def upgrade(conn):
+    # Other databases search through the in-process index instead
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
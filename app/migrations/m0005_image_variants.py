@@ -0,0 +1,16 @@
+from sqlalchemy import inspect, text
+
+VERSION = 5
+NAME = "image_variants"
+
+COLUMNS = [
+    ("service", "image_variants"),
+    ("project", "project_image_variants"),
+]
+
+def upgrade(conn):
+    inspector = inspect(conn)
+    for table, column in COLUMNS:
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} JSON"))
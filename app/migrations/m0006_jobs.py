@@ -0,0 +1,7 @@
+from app.models.job import Job
+
+VERSION = 6
+NAME = "jobs"
+
+def upgrade(conn):
+    Job.__table__.create(conn, checkfirst=True)
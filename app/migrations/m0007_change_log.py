@@ -0,0 +1,7 @@
+from app.models.change import Change
+
+VERSION = 7
+NAME = "change_log"
+
+def upgrade(conn):
+    Change.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,11 @@
+from app.models.published import PublishedProject, PublishedService
+from app.utils.snapshot_utils import rebuild_snapshots
+
+VERSION = 8
+NAME = "published_snapshot"
+
+def upgrade(conn):
+    PublishedService.__table__.create(conn, checkfirst=True)
+    PublishedProject.__table__.create(conn, checkfirst=True)
+    # Filled from what is published now; writes keep it current from here on
+    rebuild_snapshots(conn)
@@ -0,0 +1,12 @@
+from sqlalchemy import text
+
+VERSION = 9
+NAME = "change_namespace_index"
+
+def upgrade(conn):
+    # Databases whose change table came from m0007 before the index was
+    # part of the model
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_change_namespace_seq "
+        "ON change (namespace, seq)"
+    ))
@@ -0,0 +1,7 @@
+from app.models.deleted_user import DeletedUser
+
+VERSION = 10
+NAME = "deleted_users"
+
+def upgrade(conn):
+    DeletedUser.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import text
+
+from app.models.change import ChangeHorizon
+
+VERSION = 11
+NAME = "change_retention"
+
+def upgrade(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_change_changed_at ON change (changed_at)"
+    ))
+    ChangeHorizon.__table__.create(conn, checkfirst=True)
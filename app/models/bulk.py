@@ -0,0 +1,18 @@
+from typing import Any
+
+from sqlmodel import SQLModel
+
+class BulkItems(SQLModel):
+    items: list[dict[str, Any]]
+
+class BulkIds(SQLModel):
+    ids: list[int]
+
+class BulkApproveInput(BulkIds):
+    approved_by: str
+
+class BulkItemResult(SQLModel):
+    index: int
+    id: int | None = None
+    success: bool
+    error: str | None = None
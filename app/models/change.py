@@ -0,0 +1,34 @@
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+
+from app.models.job import utcnow
+
+class Change(SQLModel, table=True):
+    # Clients read the public changes after the last sequence number they saw.
+    # Listings are versioned by the newest sequence number per namespace.
+    # AUTOINCREMENT keeps SQLite from reusing a sequence number once the
+    # newest rows have been deleted.
+    __table_args__ = (
+        Index("ix_change_public_seq", "public", "seq"),
+        Index("ix_change_namespace_seq", "namespace", "seq"),
+        Index("ix_change_changed_at", "changed_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: int | None = Field(default=None, primary_key=True)
+    namespace: str = Field()
+    item_id: int = Field()
+    # created, updated, approved or deleted
+    action: str = Field()
+    # Whether the write could change what the public listings show
+    public: bool = Field()
+    changed_at: datetime = Field(default_factory=utcnow)
+
+class ChangeHorizon(SQLModel, table=True):
+    # A single row once the log has been pruned: every change after seq is
+    # still logged, older ones only as the newest of their namespace
+    __tablename__ = "change_horizon"
+
+    id: int = Field(default=1, primary_key=True)
+    seq: int = Field()
@@ -0,0 +1,10 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+
+class DeletedUser(SQLModel, table=True):
+    # Kept while tokens issued to the deleted user may still be unexpired,
+    # so a user re-created under the same name starts at a token version
+    # none of those tokens carry
+    username: str = Field(primary_key=True)
+    token_version: int = Field()
+    deleted_at: datetime = Field(index=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import JSON, Column, Index
+from sqlmodel import Field, SQLModel
+from datetime import datetime, timezone
+
+def utcnow() -> datetime:
+    # Naive UTC, so values read back from SQLite compare with fresh ones
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class Job(SQLModel, table=True):
+    # Workers look for pending jobs that are due
+    __table_args__ = (Index("ix_job_status_run_at", "status", "run_at"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str = Field()
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    status: str = Field(default="pending")
+    attempts: int = Field(default=0)
+    last_error: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=utcnow)
+    run_at: datetime = Field(default_factory=utcnow)
+    started_at: datetime | None = Field(default=None)
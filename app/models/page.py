@@ -0,0 +1,20 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+from sqlmodel import SQLModel
+
+T = TypeVar("T")
+
+class Pagination(SQLModel):
+    limit: int
+    next_cursor: str | None = None
+    has_more: bool
+
+# Envelope of every listing. Declared as the response_model for the OpenAPI
+# schema only: listing handlers return a ready Response, which FastAPI passes
+# through without validating or re-encoding it.
+class Page(BaseModel, Generic[T]):
+    success: bool
+    message: str
+    data: list[T]
+    pagination: Pagination
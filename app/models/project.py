@@ -1,15 +1,35 @@
+from sqlalchemy import JSON, Column, Index, text
 from sqlmodel import Field, SQLModel
-from datetime import datetime
+from datetime import datetime, timezone
 
 class Project(SQLModel, table=True):
+    # Public listings filter on is_published, optionally by category, and
+    # page through project_id or category_id
+    __table_args__ = (
+        Index(
+            "ix_project_published_category",
+            "is_published", "category_id", "project_id"
+        ),
+        Index(
+            "ix_project_published_id", "project_id",
+            postgresql_where=text("is_published"),
+            sqlite_where=text("is_published = 1")
+        ),
+    )
+
     project_id: int | None = Field(default=None, primary_key=True)
     project_image: str = Field()
-    category_id: int = Field(index=True)
+    # Resized copies by variant name, filled in after an upload
+    project_image_variants: dict[str, str] | None = Field(default=None, sa_column=Column(JSON))
+    category_id: int = Field(foreign_key="category.category_id", index=True)
     created_by: str = Field()
     last_modified_by: str = Field()
-    is_published: bool = Field(index=True, default=False)
+    is_published: bool = Field(default=False)
     approved_by: str | None = Field()
     approved_at: datetime | None = Field()
+    updated_at: datetime | None = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
 
 class ProjectUpdate(SQLModel):
     project_image: str | None = None
@@ -19,3 +39,11 @@ class ProjectUpdate(SQLModel):
     approved_by: str | None = None
     approved_at: datetime | None = None
 
+
+class ProjectEdit(SQLModel):
+    project_image: str | None = None
+    category_id: int | None = None
+    last_modified_by: str
+
+class ProjectBulkUpdate(ProjectEdit):
+    id: int
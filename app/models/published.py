@@ -0,0 +1,36 @@
+from sqlalchemy import JSON, Column, Index
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+
+# Denormalized copies of the published rows, holding only the columns the
+# public routes serve. Kept in step with the base tables by
+# snapshot_utils in the same transaction as each write.
+
+class PublishedService(SQLModel, table=True):
+    __tablename__ = "published_service"
+    __table_args__ = (Index("ix_published_service_title", "title", "id"),)
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str = Field()
+    description: str = Field()
+    image: str = Field()
+    image_variants: dict[str, str] | None = Field(default=None, sa_column=Column(JSON))
+    updated_at: datetime | None = Field(default=None)
+
+class PublishedProject(SQLModel, table=True):
+    __tablename__ = "published_project"
+    __table_args__ = (
+        Index("ix_published_project_category", "category_id", "project_id"),
+    )
+
+    project_id: int = Field(
+        primary_key=True, sa_column_kwargs={"autoincrement": False}
+    )
+    project_image: str = Field()
+    project_image_variants: dict[str, str] | None = Field(
+        default=None, sa_column=Column(JSON)
+    )
+    category_id: int = Field()
+    # Joined in from the category, so clients need no second request
+    category_name: str | None = Field(default=None)
+    updated_at: datetime | None = Field(default=None)
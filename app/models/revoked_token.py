@@ -0,0 +1,8 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+
+class RevokedToken(SQLModel, table=True):
+    jti: str = Field(primary_key=True)
+    username: str = Field()
+    expires_at: datetime = Field(index=True)
+    revoked_at: datetime = Field(index=True)
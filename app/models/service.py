@@ -1,16 +1,36 @@
+from sqlalchemy import JSON, Column, Index, text
 from sqlmodel import Field, SQLModel
-from datetime import datetime
+from datetime import datetime, timezone
 
 class Service(SQLModel, table=True):
+    # Public listings only ever read published rows, in id or title order
+    __table_args__ = (
+        Index(
+            "ix_service_published_id", "id",
+            postgresql_where=text("is_published"),
+            sqlite_where=text("is_published = 1")
+        ),
+        Index(
+            "ix_service_published_title", "title", "id",
+            postgresql_where=text("is_published"),
+            sqlite_where=text("is_published = 1")
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     title: str = Field()
     description: str = Field()
     image: str = Field()
+    # Resized copies by variant name, filled in after an upload
+    image_variants: dict[str, str] | None = Field(default=None, sa_column=Column(JSON))
     created_by: str = Field()
     last_modified_by: str = Field()
     is_published: bool = Field(default=False)
     approved_by: str | None = Field()
     approved_at: datetime | None = Field()
+    updated_at: datetime | None = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
 
 class ServiceUpdate(SQLModel):
     title: str | None = None
@@ -27,3 +47,6 @@ class ServiceApproveFinal(ServiceUpdate):
     is_published: bool = True
     approved_by: str
     approved_at: datetime = datetime.now()
+
+class ServiceBulkUpdate(ServiceUpdate):
+    id: int
@@ -4,6 +4,7 @@ class User(SQLModel, table=True):
     username: str = Field(primary_key=True, index=True)
     hashed_password: str = Field()
     is_admin: bool | None = Field(default=False)
+    token_version: int = Field(default=0)
 
 class UserCreate(SQLModel):
     username: str
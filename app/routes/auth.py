@@ -1,29 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
+import jwt
+from sqlalchemy import update
 from sqlmodel import Session
 
 from ..models.user import User
 from app import db
-from ..utils.auth_utils import verify_password, create_access_token
+from app.config import settings
+from ..utils.auth_utils import (
+    create_access_token,
+    get_current_user,
+    oauth2_scheme,
+    token_claims,
+    token_revocations,
+    verify_and_update_password,
+)
+from ..utils.rate_limit_utils import record_login_failure, throttle_login
 
 router = APIRouter()
 
+def _rehash_password(session: Session, user: User, hashed_password: str):
+    # The same password at the current cost, so the user's tokens stay
+    # valid; an UPDATE statement goes around the token version bump that
+    # password changes made through the ORM get
+    session.execute(
+        update(User)
+        .where(User.username == user.username)
+        .values(hashed_password=hashed_password)
+    )
+    session.commit()
+
 @router.post("/api/auth/login", tags=["auth"])
-def login_user(
+async def login_user(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: Session = Depends(db.get_session)
 ):
-    user = session.get(User, form_data.username)
+    throttle_login(request, form_data.username)
+    user = await db.run(session, Session.get, User, form_data.username)
     if not user:
+        record_login_failure(form_data.username)
         raise HTTPException(
             status.HTTP_401_UNAUTHORIZED, 
             "Invalid credentials"
         )
 
-    if not verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(
+        form_data.password, user.hashed_password
+    )
+    if not verified:
+        record_login_failure(form_data.username)
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Incorrect password")
+    if new_hash:
+        await db.run(session, _rehash_password, user, new_hash)
     
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data=token_claims(user))
     return {
         "success": True,
         "access_token": access_token,
@@ -31,8 +62,24 @@ def login_user(
     }
     
 @router.post("/api/auth/logout", tags=["auth"])
-def logout_user():
-    # token str
+async def logout_user(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(db.get_session)
+):
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    if "jti" not in payload:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            "Token was issued without an id and cannot be revoked"
+        )
+    await db.run(
+        session,
+        token_revocations.revoke,
+        payload["jti"],
+        current_user.username,
+        payload["exp"]
+    )
     return {
         "success": True,
         "message": "User logged out successfully"
@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Depends, Response, status
+from sqlmodel import Session
+
+from app.models.bulk import BulkApproveInput, BulkIds, BulkItems
+from app.models.project import Project, ProjectBulkUpdate
+from app.models.service import Service, ServiceBulkUpdate
+from app.models.user import User
+from app import db
+from app.utils.auth_utils import admin_check
+from app.utils.bulk_utils import (
+    BulkMode,
+    bulk_approve,
+    bulk_create,
+    bulk_delete,
+    bulk_response,
+    bulk_update,
+    check_batch_size,
+)
+
+# Registered ahead of the services and projects routers so that "bulk" is not
+# captured by their /{id} routes
+router = APIRouter()
+
+@router.post("/api/admin/services/bulk", tags=["services"])
+async def bulk_create_services(
+    batch: BulkItems,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session)
+):
+    check_batch_size(len(batch.items))
+    results = await db.run(
+        session, bulk_create, Service, Service.id, batch.items, mode
+    )
+    if not results.failed:
+        response.status_code = status.HTTP_201_CREATED
+    return bulk_response(response, results, mode, "created")
+
+@router.patch("/api/admin/services/bulk", tags=["services"])
+async def bulk_update_services(
+    batch: BulkItems,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session)
+):
+    check_batch_size(len(batch.items))
+    results = await db.run(
+        session, bulk_update, Service, Service.id, ServiceBulkUpdate,
+        batch.items, mode
+    )
+    return bulk_response(response, results, mode, "updated")
+
+@router.patch("/api/admin/services/bulk/approve", tags=["services"])
+async def bulk_approve_services(
+    approval: BulkApproveInput,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session),
+    current_user: User = Depends(admin_check)
+):
+    check_batch_size(len(approval.ids))
+    results = await db.run(
+        session, bulk_approve, Service, Service.id, approval, mode
+    )
+    return bulk_response(response, results, mode, "approved")
+
+@router.post("/api/admin/services/bulk/delete", tags=["services"])
+async def bulk_delete_services(
+    batch: BulkIds,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session)
+):
+    check_batch_size(len(batch.ids))
+    results = await db.run(
+        session, bulk_delete, Service, Service.id, batch.ids, mode
+    )
+    return bulk_response(response, results, mode, "deleted")
+
+@router.post("/api/admin/projects/bulk", tags=["projects"])
+async def bulk_add_projects(
+    batch: BulkItems,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session)
+):
+    check_batch_size(len(batch.items))
+    results = await db.run(
+        session, bulk_create, Project, Project.project_id, batch.items, mode
+    )
+    if not results.failed:
+        response.status_code = status.HTTP_201_CREATED
+    return bulk_response(response, results, mode, "created")
+
+@router.patch("/api/admin/projects/bulk", tags=["projects"])
+async def bulk_update_projects(
+    batch: BulkItems,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session)
+):
+    check_batch_size(len(batch.items))
+    results = await db.run(
+        session, bulk_update, Project, Project.project_id, ProjectBulkUpdate,
+        batch.items, mode
+    )
+    return bulk_response(response, results, mode, "updated")
+
+@router.patch("/api/admin/projects/bulk/approve", tags=["projects"])
+async def bulk_approve_projects(
+    approval: BulkApproveInput,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session),
+    current_user: User = Depends(admin_check)
+):
+    check_batch_size(len(approval.ids))
+    results = await db.run(
+        session, bulk_approve, Project, Project.project_id, approval, mode
+    )
+    return bulk_response(response, results, mode, "approved")
+
+@router.post("/api/admin/projects/bulk/delete", tags=["projects"])
+async def bulk_delete_projects(
+    batch: BulkIds,
+    response: Response,
+    mode: BulkMode = "atomic",
+    session: Session = Depends(db.get_session)
+):
+    check_batch_size(len(batch.ids))
+    results = await db.run(
+        session, bulk_delete, Project, Project.project_id, batch.ids, mode
+    )
+    return bulk_response(response, results, mode, "deleted")
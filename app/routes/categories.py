@@ -1,37 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+import sqlalchemy
+from sqlmodel import Session
 
 from app.models.category import Category
 from app import db
-from app.models.user import User
-from app.utils.auth_utils import get_current_user
+from app.models.page import Page
+from app.utils.cache_utils import page_cache_key
+from app.utils.change_utils import record_change
+from app.utils.conditional_utils import cached_listing
+from app.utils.pagination_utils import PageParams, list_page, page_params, parse_fields
+from app.utils.publish_utils import content_changed
 
 router = APIRouter()
 
-@router.get("/api/categories", tags=["categories"])
-def list_all_categories(
-    response: Response, 
-    session: Session = Depends(db.get_session)
+CATEGORY_SORT_FIELDS = {
+    "category_id": "category_id",
+    "category_name": "category_name"
+}
+
+@router.get("/api/categories", tags=["categories"], response_model=Page[Category])
+async def list_all_categories(
+    request: Request,
+    page: PageParams = Depends(page_params),
+    fields: str | None = None,
+    session: Session = Depends(db.get_read_session)
 ):
-    categories = session.exec(select(Category)).all()
-    if not categories:
-        response.status_code = status.HTTP_204_NO_CONTENT
-    return {
-        "success": True,
-        "message": "All project categories returned successfully",
-        "data": categories
-    }
+    columns = parse_fields(Category, fields)
+
+    def load(session: Session):
+        categories, pagination = list_page(
+            session, Category, page, CATEGORY_SORT_FIELDS, None, columns
+        )
+        return {
+            "success": True,
+            "message": "All project categories returned successfully",
+            "data": categories,
+            "pagination": pagination
+        }
+
+    return await cached_listing(
+        request, session, "categories",
+        page_cache_key(page, columns), load
+    )
+
+def _add_category(session: Session, category: Category):
+    session.add(category)
+    session.flush()
+    record_change(session, Category, category.category_id, "created", True)
+    content_changed(session, "categories", [category.category_id], True)
+    session.commit()
+    session.refresh(category)
+    return category
 
 @router.post("/api/admin/categories", tags=["categories"])
-def add_category(
-    category: Category, 
-    response: Response, 
+async def add_category(
+    category: Category,
+    response: Response,
     session: Session = Depends(db.get_session)
-):  
+):
     try:
-        session.add(category)
-        session.commit()
-        session.refresh(category)
+        category = await db.run(session, _add_category, category)
         response.status_code = status.HTTP_201_CREATED
         return {
             "success": True,
@@ -40,19 +68,30 @@ def add_category(
         }
     except Exception as e:
         raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
             f"Category addition failed with error {e}"
         )
 
-@router.delete("/api/admin/categories/{id}", tags=["categories"])
-def delete_category(
-    id: int, 
-    response: Response,
-    session: Session = Depends(db.get_session)
-):
+def _delete_category(session: Session, id: int):
     category = session.get(Category, id)
     if not category:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Category not found")
     session.delete(category)
+    record_change(session, Category, id, "deleted", True)
+    content_changed(session, "categories", [id], True)
     session.commit()
+
+@router.delete("/api/admin/categories/{id}", tags=["categories"])
+async def delete_category(
+    id: int,
+    response: Response,
+    session: Session = Depends(db.get_session)
+):
+    try:
+        await db.run(session, _delete_category, id)
+    except sqlalchemy.exc.IntegrityError:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            f"Category {id} still has projects"
+        )
     response.status_code = status.HTTP_204_NO_CONTENT
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from app import db
+from app.config import settings
+from app.utils.change_utils import change_events, load_changes
+
+router = APIRouter()
+
+@router.get("/api/changes", tags=["changes"])
+async def list_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(
+        settings.page_size_default, ge=1, le=settings.page_size_max
+    ),
+    session: Session = Depends(db.get_read_session)
+):
+    entries, next_since, has_more = await db.run(
+        session, load_changes, since, limit
+    )
+    return {
+        "success": True,
+        "message": "Changes returned successfully",
+        "data": entries,
+        "next_since": next_since,
+        "has_more": has_more
+    }
+
+@router.get("/api/changes/stream", tags=["changes"])
+async def stream_changes(
+    since: int | None = Query(None, ge=0),
+    last_event_id: str | None = Header(None)
+):
+    # A reconnecting EventSource sends the id of the last event it received
+    if last_event_id is not None and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        change_events(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
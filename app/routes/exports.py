@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import select
+
+from app.models.project import Project
+from app.models.service import Service
+from app.models.user import User
+from app.utils.auth_utils import admin_check
+from app.utils.export_utils import ExportFormat, export_response
+
+# Registered ahead of the users router so that "export" is not captured by
+# /api/users/{username}
+router = APIRouter()
+
+@router.get("/api/admin/services/export", tags=["services"])
+async def export_services(
+    format: ExportFormat = "ndjson",
+    is_published: bool | None = None,
+    current_user: User = Depends(admin_check)
+):
+    statement = select(*Service.__table__.columns).order_by(Service.id)
+    if is_published is not None:
+        statement = statement.where(Service.is_published == is_published)
+    return export_response(statement, format, "services")
+
+@router.get("/api/admin/projects/export", tags=["projects"])
+async def export_projects(
+    format: ExportFormat = "ndjson",
+    category_id: int | None = None,
+    is_published: bool | None = None,
+    current_user: User = Depends(admin_check)
+):
+    statement = select(*Project.__table__.columns).order_by(Project.project_id)
+    if category_id is not None:
+        statement = statement.where(Project.category_id == category_id)
+    if is_published is not None:
+        statement = statement.where(Project.is_published == is_published)
+    return export_response(statement, format, "projects")
+
+@router.get("/api/users/export", tags=["users"])
+async def export_users(
+    format: ExportFormat = "ndjson",
+    is_admin: bool | None = None,
+    current_user: User = Depends(admin_check)
+):
+    statement = select(User.username, User.is_admin).order_by(User.username)
+    if is_admin is not None:
+        statement = statement.where(User.is_admin == is_admin)
+    return export_response(statement, format, "users")
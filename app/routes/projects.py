@@ -1,82 +1,240 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+import sqlalchemy
+from sqlmodel import Session
 
-from app.models.project import Project
+from app.models.project import Project, ProjectEdit
 from app import db
+from app.models.page import Page
+from app.models.published import PublishedProject
 from app.models.user import User
-from app.utils.auth_utils import admin_check
+from app.utils.auth_utils import admin_check, optional_admin, optional_oauth2_scheme
+from app.utils.cache_utils import page_cache_key
+from app.utils.change_utils import record_change
+from app.utils.conditional_utils import cached_listing, warm_listing
+from app.utils.image_utils import upload_image
+from app.utils.job_utils import job_queue
+from app.utils.json_utils import page_response
+from app.utils.lookup_utils import ItemLookup, parse_ids
+from app.utils.pagination_utils import PageParams, list_page, page_params, parse_fields
+from app.utils.publish_utils import content_changed
+from app.utils.workflow_utils import approve_content, edit_content
 
 router = APIRouter()
 
-@router.get("/api/projects", tags=["projects"])
-def list_all_published_projects(
-    response: Response, 
-    session: Session = Depends(db.get_session)
+PROJECT_SORT_FIELDS = {"project_id": "project_id", "category_id": "category_id"}
+
+project_lookup = ItemLookup("projects", PublishedProject.project_id, Project.project_id)
+
+@router.get("/api/projects", tags=["projects"], response_model=Page[PublishedProject])
+async def list_all_published_projects(
+    request: Request,
+    page: PageParams = Depends(page_params),
+    ids: str | None = None,
+    category_id: int | None = None,
+    fields: str | None = None,
+    token: str | None = Depends(optional_oauth2_scheme),
+    session: Session = Depends(db.get_read_session)
 ):
-    projects = session.exec(
-        select(Project).where(Project.is_published == True)
-    ).all()
-    if not projects:
-        response.status_code = 204
-    return projects
-
-@router.get("/api/admin/projects", tags=["projects"])
-def list_all_projects(
-    response: Response, 
-    session: Session = Depends(db.get_session)
-):  
-    projects = session.exec(select(Project)).all()
-    if not projects:
-        response.status_code = status.HTTP_204_NO_CONTENT
+    if ids is not None:
+        # The token only matters here, so a stale one does not break paging
+        admin = await optional_admin(token, session)
+        return await _projects_by_ids(
+            session, parse_ids(ids), category_id, fields, admin is not None
+        )
+    columns = parse_fields(PublishedProject, fields)
+    return await cached_listing(
+        request, session, "projects", page_cache_key(page, category_id, columns),
+        lambda session: _published_projects(session, page, category_id, columns)
+    )
+
+def _published_projects(
+    session: Session, page: PageParams, category_id: int | None, columns
+):
+    # The published snapshot, with each project's category name joined in
+    filters = []
+    if category_id is not None:
+        filters.append(PublishedProject.category_id == category_id)
+    projects, pagination = list_page(
+        session, PublishedProject, page, PROJECT_SORT_FIELDS, filters, columns
+    )
     return {
         "success": True,
-        "message": "All projects returned successfully",
-        "data": projects
+        "message": "All published projects returned successfully",
+        "data": projects,
+        "pagination": pagination
+    }
+
+async def _projects_by_ids(
+    session, ids: list[int], category_id: int | None, fields: str | None, admin: bool
+):
+    columns = parse_fields(project_lookup.model(admin), fields)
+    projects = await project_lookup.get_many(session, ids, admin)
+    if category_id is not None:
+        projects = [project for project in projects if project["category_id"] == category_id]
+    if columns is not None:
+        projects = [{name: project[name] for name in columns} for project in projects]
+    return page_response({
+        "success": True,
+        "message": "Projects returned successfully",
+        "data": projects,
+        "pagination": {"limit": len(ids), "next_cursor": None, "has_more": False}
+    })
+
+@router.get("/api/projects/{id}", tags=["projects"])
+async def get_project(
+    id: int,
+    admin: User | None = Depends(optional_admin),
+    session: Session = Depends(db.get_read_session)
+):
+    # Unpublished projects exist only for admins
+    return {
+        "success": True,
+        "message": f"Project {id} returned successfully",
+        "data": await project_lookup.get(session, id, admin is not None)
     }
 
+@job_queue.register("projects.warm")
+def warm_published_projects(session: Session):
+    # The first page of all categories in the default order
+    page = PageParams()
+    warm_listing(
+        session, "projects", page_cache_key(page, None, None),
+        lambda session: _published_projects(session, page, None, None)
+    )
+
+@router.get("/api/admin/projects", tags=["projects"], response_model=Page[Project])
+async def list_all_projects(
+    page: PageParams = Depends(page_params),
+    category_id: int | None = None,
+    is_published: bool | None = None,
+    fields: str | None = None,
+    session: Session = Depends(db.get_session)
+):
+    columns = parse_fields(Project, fields)
+    filters = []
+    if category_id is not None:
+        filters.append(Project.category_id == category_id)
+    if is_published is not None:
+        filters.append(Project.is_published == is_published)
+    projects, pagination = await db.run(
+        session, list_page, Project, page, PROJECT_SORT_FIELDS, filters, columns
+    )
+    return page_response({
+        "success": True,
+        "message": "All projects returned successfully",
+        "data": projects,
+        "pagination": pagination
+    })
+
+def _add_project(session: Session, project: Project):
+    session.add(project)
+    session.flush()
+    record_change(session, Project, project.project_id, "created", project.is_published)
+    content_changed(session, "projects", [project.project_id], project.is_published)
+    session.commit()
+    session.refresh(project)
+    return project
+
 @router.post("/api/admin/projects", tags=["projects"])
-def add_project(
-    project: Project, response: Response, 
+async def add_project(
+    project: Project, response: Response,
     session: Session = Depends(db.get_session)
-):  
+):
     try:
-        session.add(project)
-        session.commit()
-        session.refresh(project)
+        project = await db.run(session, _add_project, project)
         response.status_code = status.HTTP_201_CREATED
         return {
             "success": True,
             "message": "Project created successfully",
             "data": project
         }
+    except sqlalchemy.exc.IntegrityError:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"Category {project.category_id} does not exist"
+        )
     except Exception as e:
         raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
             f"Project addition failed with error {e}"
         )
 
 @router.patch("/api/admin/projects/{id}", tags=["projects"])
-def edit_project_category(id: int):  
+async def edit_project_category(
+    id: int,
+    project: ProjectEdit,
+    session: Session = Depends(db.get_session)
+):
+    changes = project.model_dump(
+        exclude_unset=True, exclude={"last_modified_by"}
+    )
+    try:
+        _, approved = await db.run(
+            session, edit_content, Project, Project.project_id, id, changes,
+            project.last_modified_by
+        )
+    except sqlalchemy.exc.IntegrityError:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"Category {project.category_id} does not exist"
+        )
+    if approved:
+        return {
+            "success": True,
+            "message": f"Project {id} edited and approved successfully"
+        }
     return {
         "success": True,
         "message": f"Project {id} edited successfully"
     }
 
-@router.delete("/api/admin/projects/{id}", tags=["projects"])
-def delete_project(
-    id: int, 
-    response: Response, 
-    session: Session = Depends(db.get_session)
+@router.post(
+    "/api/admin/projects/{id}/image",
+    tags=["projects"],
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def upload_project_image(
+    id: int,
+    request: Request,
+    session: Session = Depends(db.get_session),
+    current_user: User = Depends(admin_check)
 ):
+    url = await upload_image(request, session, "projects", id)
+    return {
+        "success": True,
+        "message": f"Image for project {id} uploaded, resized copies are being generated",
+        "data": {"project_image": url}
+    }
+
+def _delete_project(session: Session, id: int):
     project = session.get(Project, id)
     if not project:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Project not found")
+    was_published = project.is_published
     session.delete(project)
+    record_change(session, Project, id, "deleted", was_published)
+    content_changed(session, "projects", [id], was_published)
     session.commit()
+
+@router.delete("/api/admin/projects/{id}", tags=["projects"])
+async def delete_project(
+    id: int,
+    response: Response,
+    session: Session = Depends(db.get_session)
+):
+    await db.run(session, _delete_project, id)
     response.status_code = status.HTTP_204_NO_CONTENT
 
 @router.patch("/api/admin/projects/{id}/approve", tags=["projects"])
-def approve_project(id: int, current_user: User = Depends(admin_check)):
+async def approve_project(
+    id: int,
+    session: Session = Depends(db.get_session),
+    current_user: User = Depends(admin_check)
+):
+    await db.run(
+        session, approve_content, Project, Project.project_id, id,
+        current_user.username
+    )
     return {
         "success": True,
         "message": f"Project {id} approved successfully"
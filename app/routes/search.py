@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlmodel import Session
+
+from app import db
+from app.utils.pagination_utils import PageParams, page_params
+from app.utils.search_utils import project_search, service_search
+
+# Registered ahead of the services and projects routers so that "search" is
+# not captured by their /{id} routes
+router = APIRouter()
+
+@router.get("/api/services/search", tags=["services"])
+async def search_services(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    page: PageParams = Depends(page_params),
+    session: Session = Depends(db.get_session)
+):
+    services, pagination = await db.run(session, service_search.search, q, page)
+    if not services:
+        response.status_code = status.HTTP_204_NO_CONTENT
+    return {
+        "success": True,
+        "message": "Matching services returned successfully",
+        "data": services,
+        "pagination": pagination
+    }
+
+@router.get("/api/projects/search", tags=["projects"])
+async def search_projects(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    page: PageParams = Depends(page_params),
+    session: Session = Depends(db.get_session)
+):
+    projects, pagination = await db.run(session, project_search.search, q, page)
+    if not projects:
+        response.status_code = status.HTTP_204_NO_CONTENT
+    return {
+        "success": True,
+        "message": "Matching projects returned successfully",
+        "data": projects,
+        "pagination": pagination
+    }
@@ -1,54 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlmodel import Session, select
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlmodel import Session
 
 from app.models.user import User
 from app.models.service import Service, ServiceUpdate, ServiceApproveInput
 from app import db
-from app.utils.auth_utils import admin_check
+from app.models.page import Page
+from app.models.published import PublishedService
+from app.utils.auth_utils import admin_check, optional_admin, optional_oauth2_scheme
+from app.utils.cache_utils import page_cache_key
+from app.utils.change_utils import record_change
+from app.utils.conditional_utils import cached_listing, warm_listing
+from app.utils.image_utils import upload_image
+from app.utils.job_utils import job_queue
+from app.utils.json_utils import page_response
+from app.utils.lookup_utils import ItemLookup, parse_ids
+from app.utils.pagination_utils import PageParams, list_page, page_params, parse_fields
+from app.utils.publish_utils import content_changed
+from app.utils.workflow_utils import approve_content, edit_content
 
 router = APIRouter()
 
-@router.get("/api/services", tags=["services"])
-def list_all_published_services(
-    response: Response, 
-    session: Session = Depends(db.get_session)
+SERVICE_SORT_FIELDS = {"id": "id", "title": "title"}
+
+service_lookup = ItemLookup("services", PublishedService.id, Service.id)
+
+@router.get("/api/services", tags=["services"], response_model=Page[PublishedService])
+async def list_all_published_services(
+    request: Request,
+    page: PageParams = Depends(page_params),
+    ids: str | None = None,
+    fields: str | None = None,
+    token: str | None = Depends(optional_oauth2_scheme),
+    session: Session = Depends(db.get_read_session)
 ):
-    services = session.exec(
-        select(Service).where(Service.is_published == True)
-    ).all()
-    if not services:
-        response.status_code = status.HTTP_204_NO_CONTENT
+    if ids is not None:
+        # The token only matters here, so a stale one does not break paging
+        admin = await optional_admin(token, session)
+        return await _services_by_ids(session, parse_ids(ids), fields, admin is not None)
+    columns = parse_fields(PublishedService, fields)
+    return await cached_listing(
+        request, session, "services", page_cache_key(page, columns),
+        lambda session: _published_services(session, page, columns)
+    )
+
+def _published_services(session: Session, page: PageParams, columns):
+    # The published snapshot holds exactly the rows and columns to serve
+    services, pagination = list_page(
+        session, PublishedService, page, SERVICE_SORT_FIELDS, None, columns
+    )
     return {
         "success": True,
         "message": "All published services returned successfully",
-        "data": services
+        "data": services,
+        "pagination": pagination
     }
 
-@router.get("/api/admin/services", tags=["services"])
-def list_all_services(
-    response: Response, 
-    session: Session = Depends(db.get_session)
+async def _services_by_ids(session, ids: list[int], fields: str | None, admin: bool):
+    columns = parse_fields(service_lookup.model(admin), fields)
+    services = await service_lookup.get_many(session, ids, admin)
+    if columns is not None:
+        services = [{name: service[name] for name in columns} for service in services]
+    return page_response({
+        "success": True,
+        "message": "Services returned successfully",
+        "data": services,
+        "pagination": {"limit": len(ids), "next_cursor": None, "has_more": False}
+    })
+
+@router.get("/api/services/{id}", tags=["services"])
+async def get_service(
+    id: int,
+    admin: User | None = Depends(optional_admin),
+    session: Session = Depends(db.get_read_session)
 ):
-    services = session.exec(select(Service)).all()
-    if not services:
-        response.status_code = status.HTTP_204_NO_CONTENT
+    # Unpublished services exist only for admins
     return {
         "success": True,
-        "message": "All services returned successfully",
-        "data": services
+        "message": f"Service {id} returned successfully",
+        "data": await service_lookup.get(session, id, admin is not None)
     }
 
+@job_queue.register("services.warm")
+def warm_published_services(session: Session):
+    # The first page in the default order, the one most visitors ask for
+    page = PageParams()
+    warm_listing(
+        session, "services", page_cache_key(page, None),
+        lambda session: _published_services(session, page, None)
+    )
+
+@router.get("/api/admin/services", tags=["services"], response_model=Page[Service])
+async def list_all_services(
+    page: PageParams = Depends(page_params),
+    is_published: bool | None = None,
+    fields: str | None = None,
+    session: Session = Depends(db.get_session)
+):
+    columns = parse_fields(Service, fields)
+    filters = []
+    if is_published is not None:
+        filters.append(Service.is_published == is_published)
+    services, pagination = await db.run(
+        session, list_page, Service, page, SERVICE_SORT_FIELDS, filters, columns
+    )
+    return page_response({
+        "success": True,
+        "message": "All services returned successfully",
+        "data": services,
+        "pagination": pagination
+    })
+
+def _create_service(session: Session, service: Service):
+    session.add(service)
+    session.flush()
+    record_change(session, Service, service.id, "created", service.is_published)
+    content_changed(session, "services", [service.id], service.is_published)
+    session.commit()
+    session.refresh(service)
+    return service
+
 @router.post("/api/admin/services", tags=["services"])
-def create_new_service(
-    service: Service, 
-    response: Response, 
+async def create_new_service(
+    service: Service,
+    response: Response,
     session: Session = Depends(db.get_session)
 ):
     try:
-        session.add(service)
-        session.commit()
-        session.refresh(service)
+        service = await db.run(session, _create_service, service)
         response.status_code = status.HTTP_201_CREATED
         return {
             "success": True,
@@ -57,83 +135,82 @@ def create_new_service(
         }
     except Exception as e:
         raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
             f"Service creation failed with error {e}"
         )
 
 @router.patch("/api/admin/services/{id}/approve", tags=["services"])
-def approve_service(
-    id: int, 
-    service_input: ServiceApproveInput, 
+async def approve_service(
+    id: int,
+    service_input: ServiceApproveInput,
     session: Session = Depends(db.get_session),
     current_user: User = Depends(admin_check)
 ):
-    service_db = session.get(Service, id)
-    if not service_db:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Service not found")
-
-    user = session.get(User, service_input.approved_by)
-    if not user:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "User does not exist")
-    if user.is_admin == 0:
-        raise HTTPException(
-            status.HTTP_403_FORBIDDEN, 
-            "User not permitted to approve"
-        )
-    service_db.is_published = True
-    service_db.approved_by = service_input.approved_by
-    service_db.last_modified_by = service_input.approved_by
-    service_db.approved_at = datetime.now()
-    
-    session.add(service_db)
-    session.commit()
-    session.refresh(service_db)
+    await db.run(
+        session, approve_content, Service, Service.id, id,
+        service_input.approved_by
+    )
     return {
         "success": True,
         "message": f"Service {id} approved successfully"
     }
 
 @router.patch("/api/admin/services/{id}", tags=["services"])
-def update_service(
-    id: int, 
-    service: ServiceUpdate, 
+async def update_service(
+    id: int,
+    service: ServiceUpdate,
     session: Session = Depends(db.get_session)
 ):
-    service_db = session.get(Service, id)
-    user = session.get(User, service.last_modified_by)
-    if not (user):
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "User does not exist")
-    if not service_db:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Service not found")
-    service.is_published = False
-    service_data = service.model_dump(exclude_unset=True)
-    service_db.sqlmodel_update(service_data)
-    session.add(service_db)
-    print(service_db)
-    if user.is_admin == True:
-        print("Admin code starts here")
-        approver = ServiceApproveInput(approved_by=user.username)
-        if approve_service(id, approver, session):
-            return {
-                "success": True,
-                "message": f"Service {id} with name '{service.title}' updated and approved successfully"
-            }
-    session.commit()
-    session.refresh(service_db)
+    changes = service.model_dump(
+        exclude_unset=True, exclude={"is_published", "last_modified_by"}
+    )
+    _, approved = await db.run(
+        session, edit_content, Service, Service.id, id, changes,
+        service.last_modified_by
+    )
+    if approved:
+        return {
+            "success": True,
+            "message": f"Service {id} with name '{service.title}' updated and approved successfully"
+        }
     return {
         "success": True,
         "message": f"Service {id} with name '{service.title}' updated successfully"
     }
 
-@router.delete("/api/admin/services/{id}", tags=["services"])
-def delete_service(
-    id: int, 
-    response: Response, 
-    session: Session = Depends(db.get_session)
-):    
+@router.post(
+    "/api/admin/services/{id}/image",
+    tags=["services"],
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def upload_service_image(
+    id: int,
+    request: Request,
+    session: Session = Depends(db.get_session),
+    current_user: User = Depends(admin_check)
+):
+    url = await upload_image(request, session, "services", id)
+    return {
+        "success": True,
+        "message": f"Image for service {id} uploaded, resized copies are being generated",
+        "data": {"image": url}
+    }
+
+def _delete_service(session: Session, id: int):
     service = session.get(Service, id)
     if not service:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Service not found")
+    was_published = service.is_published
     session.delete(service)
+    record_change(session, Service, id, "deleted", was_published)
+    content_changed(session, "services", [id], was_published)
     session.commit()
+
+@router.delete("/api/admin/services/{id}", tags=["services"])
+async def delete_service(
+    id: int,
+    response: Response,
+    session: Session = Depends(db.get_session)
+):
+    await db.run(session, _delete_service, id)
     response.status_code = status.HTTP_204_NO_CONTENT
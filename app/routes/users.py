@@ -1,59 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 import sqlalchemy
-from sqlmodel import Session, select
+from sqlalchemy import delete
+from sqlmodel import Session
 
+from app.config import settings
+from app.models.deleted_user import DeletedUser
 from app.models.user import User, UserCreate
 from app import db
-from app.utils.auth_utils import admin_check, get_password_hash
-from ..utils.users_utils import get_user
+from app.utils.auth_utils import admin_check, hash_password, token_versions
+from app.utils.cache_utils import item_cache
+from app.utils.pagination_utils import PageParams, list_page, page_params
+from ..utils.users_utils import get_user, public_user
 
 router = APIRouter()
 
+USER_SORT_FIELDS = {"username": "username"}
+
 @router.get("/api/users", tags=["users"])
-def get_all_users(session: Session = Depends(db.get_session)):
-    users = session.exec(select(User)).all()
-    secure_users = []
-    for user in users:
-        secure_users.append({
-            "username": user.username,
-            "is_admin": user.is_admin
-        })
+async def get_all_users(
+    page: PageParams = Depends(page_params),
+    is_admin: bool | None = None,
+    session: Session = Depends(db.get_session)
+):
+    filters = []
+    if is_admin is not None:
+        filters.append(User.is_admin == is_admin)
+    users, pagination = await db.run(
+        session, list_page, User, page, USER_SORT_FIELDS, filters
+    )
     return {
         "success": True,
         "message": "All user details returned successfully",
-        "data": secure_users
+        "data": [public_user(user) for user in users],
+        "pagination": pagination
     }
 
 @router.get("/api/users/{username}", tags=["users"])
-def get_user_by_username(
-    username: str, 
+async def get_user_by_username(
+    username: str,
     session: Session = Depends(db.get_session)
 ):
-    return get_user(username, session)
+    user = item_cache.get_many("users", [username]).get(username)
+    if user is None:
+        user = public_user(await db.run(session, get_user, username))
+        item_cache.set_many("users", {username: user})
+    return {
+        "success": True,
+        "message": f"User {username} returned successfully",
+        "data": user
+    }
+
+def _create_user(session: Session, user: User):
+    deleted = session.get(DeletedUser, user.username)
+    if deleted is not None:
+        # Tokens issued before the name was deleted may not have expired
+        user.token_version = deleted.token_version
+        session.delete(deleted)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
 
 @router.post("/api/users", tags=["users"])
-def create_user(
-    user_create: UserCreate, 
-    response: Response, 
+async def create_user(
+    user_create: UserCreate,
+    response: Response,
     session: Session = Depends(db.get_session),
     current_user: User = Depends(admin_check)
 ):
+    hashed_password = await hash_password(user_create.password)
     try:
         user = user_create.model_dump()
-        user["hashed_password"] = get_password_hash(user_create.password)
+        user["hashed_password"] = hashed_password
         user = User(**user)
-        print(user)
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    except sqlalchemy.exc.IntegrityError as e:
+        user = await db.run(session, _create_user, user)
+        # So the next stateless check reloads the snapshot with the new user
+        token_versions.invalidate()
+    except sqlalchemy.exc.IntegrityError:
         raise HTTPException(
-            status.HTTP_409_CONFLICT, 
+            status.HTTP_409_CONFLICT,
             f"User {user.username} already exists"
         )
     except Exception as e:
         raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
             f"User creation failed with error: {e}"
         )
     response.status_code = status.HTTP_201_CREATED
@@ -62,16 +94,29 @@ def create_user(
         "message": "User created successfully"
     }
 
-@router.delete("/api/users/{username}", tags=["users"])
-def delete_user(
-    username: str, 
-    response: Response, 
-    session: Session = Depends(db.get_session)
-):
+def _delete_user(session: Session, username: str):
     user = session.get(User, username)
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+    now = datetime.now(timezone.utc)
+    # Entries outlive every token issued before the delete, then go
+    session.execute(delete(DeletedUser).where(
+        DeletedUser.deleted_at
+        < now - timedelta(minutes=settings.access_token_expire_minutes)
+    ))
+    session.merge(DeletedUser(
+        username=username, token_version=user.token_version + 1, deleted_at=now
+    ))
     session.delete(user)
     session.commit()
+
+@router.delete("/api/users/{username}", tags=["users"])
+async def delete_user(
+    username: str,
+    response: Response,
+    session: Session = Depends(db.get_session)
+):
+    await db.run(session, _delete_user, username)
+    token_versions.forget(username)
+    item_cache.invalidate("users", [username])
     response.status_code = status.HTTP_204_NO_CONTENT
-        
\ No newline at end of file
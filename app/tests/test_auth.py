@@ -34,3 +34,188 @@ class TestAuth:
 
     def test_correct_user_details(self):
         assert self.correct_user_details.status_code == 200
+
+class TestTokenVersionCache:
+    def test_version_check(self):
+        from sqlmodel import Session, SQLModel, create_engine
+
+        from app.models.user import User
+        from app.utils.token_utils import TokenVersionCache
+
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        cache = TokenVersionCache(refresh_seconds=60)
+        with Session(engine) as session:
+            session.add(User(username="user", hashed_password="", token_version=2))
+            session.commit()
+            cache.refresh(session)
+
+        assert cache.is_current("user", 2)
+        assert not cache.is_current("user", 1)
+        assert not cache.is_current("user", 3)
+        assert not cache.is_current("missing", 0)
+        assert not cache.is_stale()
+        cache.forget("user")
+        assert not cache.is_current("user", 2)
+
+class TestTokenVersionBumps:
+    def make_engine(self):
+        from sqlmodel import Session, create_engine
+
+        from app.migrations import migrate
+        from app.models.user import User
+
+        engine = create_engine("sqlite://")
+        migrate(engine)
+        with Session(engine) as session:
+            session.add(User(username="admin", hashed_password="a", is_admin=True))
+            session.commit()
+        return engine
+
+    def version(self, engine) -> int:
+        from sqlmodel import Session
+
+        from app.models.user import User
+        from app.utils.token_utils import TokenVersionCache
+
+        cache = TokenVersionCache(refresh_seconds=60)
+        with Session(engine) as session:
+            cache.refresh(session)
+            return session.get(User, "admin").token_version
+
+    def test_role_and_password_changes(self):
+        from sqlmodel import Session
+
+        from app.models.user import User
+        from app.routes.auth import _rehash_password
+
+        engine = self.make_engine()
+        with Session(engine) as session:
+            user = session.get(User, "admin")
+            user.is_admin = False
+            session.commit()
+            assert self.version(engine) == 1
+            user.hashed_password = "b"
+            session.commit()
+            assert self.version(engine) == 2
+            # Same password at a new cost
+            _rehash_password(session, user, "c")
+        assert self.version(engine) == 2
+
+    def test_recreated_user_does_not_inherit_tokens(self):
+        from sqlmodel import Session
+
+        from app.models.user import User
+        from app.routes.users import _create_user, _delete_user
+        from app.utils.token_utils import TokenVersionCache
+
+        engine = self.make_engine()
+        old_version = self.version(engine)
+        with Session(engine) as session:
+            _delete_user(session, "admin")
+            _create_user(session, User(username="admin", hashed_password="a"))
+
+        cache = TokenVersionCache(refresh_seconds=60)
+        with Session(engine) as session:
+            cache.refresh(session)
+        # A token of the deleted admin still claims is_admin at the old version
+        assert not cache.is_current("admin", old_version)
+        assert cache.is_current("admin", old_version + 1)
+
+class TestStatelessAuth:
+    def test_user_created_after_snapshot(self, monkeypatch):
+        import asyncio
+        import os
+        import tempfile
+
+        import pytest
+        from fastapi import HTTPException
+        from sqlmodel import Session, create_engine
+
+        from app import db
+        from app.migrations import migrate
+        from app.models.user import User
+        from app.utils import auth_utils
+        from app.utils.auth_utils import create_access_token, get_current_user, token_claims
+        from app.utils.token_utils import TokenVersionCache
+
+        engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'auth.db')}")
+        migrate(engine)
+        versions = TokenVersionCache(refresh_seconds=60)
+        monkeypatch.setattr(auth_utils, "token_versions", versions)
+        monkeypatch.setattr(db.settings, "auth_stateless", True)
+        monkeypatch.setattr(db.settings, "db_async", False)
+        with Session(engine) as session:
+            versions.refresh(session)
+            bob = User(username="bob", hashed_password="")
+            session.add(bob)
+            session.commit()
+            token = create_access_token(token_claims(bob))
+            # Not in the snapshot yet, so the row is checked instead
+            assert asyncio.run(get_current_user(token, session)).username == "bob"
+            assert versions.is_current("bob", 0)
+
+            # A version the row does not have is still turned away
+            outdated = create_access_token({**token_claims(bob), "ver": 1})
+            with pytest.raises(HTTPException) as e:
+                asyncio.run(get_current_user(outdated, session))
+            assert e.value.status_code == 401
+
+class TestTokenRevocations:
+    def test_revoked_token_is_seen_by_other_workers(self):
+        import time
+
+        from app.utils.revocation_utils import (
+            MemoryRevocationStore,
+            TokenRevocations,
+        )
+
+        store = MemoryRevocationStore()
+        first = TokenRevocations(store, sync_seconds=0)
+        second = TokenRevocations(store, sync_seconds=0)
+        expires_at = time.time() + 60
+        first.revoke(None, "abc", "user", expires_at)
+
+        assert first.is_revoked("abc", expires_at)
+        assert not second.is_revoked("abc", expires_at)
+        second.sync(None)
+        assert second.is_revoked("abc", expires_at)
+
+    def test_expired_entries_are_dropped(self):
+        import time
+
+        from app.utils.revocation_utils import RevocationSet
+
+        revoked = RevocationSet(bucket_seconds=1)
+        revoked.add("old", time.time() - 1)
+        revoked.add("new", time.time() + 60)
+
+        assert len(revoked) == 1
+        assert not revoked.contains("old", time.time() - 1)
+
+    def test_evicted_bucket_fails_closed(self):
+        import time
+
+        from app.utils.revocation_utils import (
+            MemoryRevocationStore,
+            RevocationSet,
+            TokenRevocations,
+        )
+
+        revocations = TokenRevocations(
+            MemoryRevocationStore(), sync_seconds=0,
+            revoked=RevocationSet(bucket_seconds=1, max_entries=1)
+        )
+        soon, later = time.time() + 30, time.time() + 60
+        revocations.revoke(None, "first", "user", soon)
+        revocations.revoke(None, "second", "user", later)
+
+        assert revocations.revoked.evictions == 1
+        assert revocations.is_evicted(soon)
+        assert revocations.lookup(None, "first")
+        assert not revocations.lookup(None, "other")
+        # Syncing does not refill the evicted bucket with only some tokens
+        revocations.sync(None)
+        assert revocations.is_evicted(soon)
+        assert not revocations.is_evicted(later)
+        assert revocations.is_revoked("second", later)
@@ -0,0 +1,64 @@
+from app.utils.cache_utils import ContentCache, InMemoryBackend, ItemCache, TTLCache
+
+class TestCache:
+    def test_read_through(self):
+        cache = ContentCache(TTLCache(10, 60))
+        calls = []
+        def load():
+            calls.append(1)
+            return {"data": [1, 2]}
+
+        assert cache.read_through("services", 1, "a", load) == {"data": [1, 2]}
+        assert cache.read_through("services", 1, "a", load) == {"data": [1, 2]}
+        assert len(calls) == 1
+        assert cache.stats()["local"]["hits"] == 1
+
+    def test_entries_are_per_version(self):
+        cache = ContentCache(TTLCache(10, 60))
+        cache.read_through("services", 1, "a", lambda: {"data": 1})
+        cache.read_through("projects", 1, "a", lambda: {"data": 1})
+
+        assert cache.read_through("services", 2, "a", lambda: {"data": 2}) == {"data": 2}
+        assert cache.read_through("projects", 1, "a", lambda: {"data": 2}) == {"data": 1}
+
+    def test_lru_eviction(self):
+        cache = TTLCache(2, 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats.evictions == 1
+
+    def test_shared_tier(self):
+        shared = InMemoryBackend()
+        first = ContentCache(TTLCache(10, 60), shared)
+        second = ContentCache(TTLCache(10, 60), shared)
+        first.read_through("categories", 1, "a", lambda: {"data": 1})
+
+        assert second.read_through("categories", 1, "a", lambda: {"data": 2}) == {"data": 1}
+        assert first.read_through("categories", 2, "a", lambda: {"data": 3}) == {"data": 3}
+
+class TestItemCache:
+    def test_invalidate_by_id(self):
+        cache = ItemCache(TTLCache(10, 60))
+        cache.set_many("services", {1: {"title": "a"}, 2: {"title": "b"}})
+        assert cache.get_many("services", [1, 2, 3]) == {
+            1: {"title": "a"}, 2: {"title": "b"}
+        }
+        cache.invalidate("services", [1])
+        assert cache.get_many("services", [1, 2]) == {2: {"title": "b"}}
+        assert cache.get_many("projects", [2]) == {}
+
+    def test_shared_tier(self):
+        shared = InMemoryBackend()
+        first = ItemCache(TTLCache(10, 60), shared)
+        second = ItemCache(TTLCache(10, 60), shared)
+        first.set_many("users", {"admin": {"is_admin": True}})
+
+        assert second.get_many("users", ["admin"]) == {"admin": {"is_admin": True}}
+        # Nothing is left behind in the worker that read it
+        first.invalidate("users", ["admin"])
+        assert second.get_many("users", ["admin"]) == {}
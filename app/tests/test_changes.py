@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, create_engine, select
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import db
+from app.migrations import migrate
+from app.models.category import Category
+from app.models.change import Change
+from app.models.job import utcnow
+from app.models.project import Project
+from app.models.published import PublishedProject
+from app.models.service import Service
+from app.models.user import User
+from app.utils import conditional_utils, lookup_utils
+from app.utils.bulk_utils import bulk_delete
+from app.utils.cache_utils import ContentCache, ItemCache, TTLCache
+from app.utils.change_utils import (
+    change_events,
+    change_notifier,
+    change_horizon,
+    listing_version,
+    load_changes,
+    prune_changes,
+    record_change,
+)
+from app.utils.lookup_utils import ItemLookup
+from app.utils.workflow_utils import approve_content, edit_content
+
+def _head(client: httpx.Client, base_url: str) -> int:
+    since = 0
+    while True:
+        body = client.get(
+            f"{base_url}/api/changes", params={"since": since, "limit": 200}
+        ).json()
+        since = body["next_since"]
+        if not body["has_more"]:
+            return since
+
+class TestChangeFeed:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    head = _head(client, BASE_URL)
+    created = client.post(
+        f"{BASE_URL}/api/admin/categories", json={"category_name": "Change feed"}
+    )
+    category_id = created.json()["data"]["category_id"]
+    after_create = client.get(f"{BASE_URL}/api/changes", params={"since": head})
+    client.delete(f"{BASE_URL}/api/admin/categories/{category_id}")
+    after_delete = client.get(f"{BASE_URL}/api/changes", params={"since": head})
+
+    invalid_since = client.get(f"{BASE_URL}/api/changes", params={"since": -1})
+
+    def test_create_in_feed(self):
+        [entry] = [
+            entry for entry in self.after_create.json()["data"]
+            if entry["namespace"] == "categories" and entry["id"] == self.category_id
+        ]
+        assert entry["action"] == "created"
+        assert entry["data"]["category_name"] == "Change feed"
+
+    def test_delete_is_tombstone(self):
+        # Compacted to the newest change for the category
+        [entry] = [
+            entry for entry in self.after_delete.json()["data"]
+            if entry["namespace"] == "categories" and entry["id"] == self.category_id
+        ]
+        assert entry["action"] == "deleted"
+        assert entry["data"] is None
+        assert self.after_delete.json()["next_since"] > self.head
+
+    def test_invalid_since(self):
+        assert self.invalid_since.status_code == 422
+
+class TestChangeLog:
+    def make_engine(self, monkeypatch):
+        engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'changes.db')}")
+        migrate(engine)
+        with Session(engine) as session:
+            session.add(User(username="admin", hashed_password="", is_admin=True))
+            session.add(User(username="editor", hashed_password="", is_admin=False))
+            for title in ("Plumbing", "Wiring"):
+                service = Service(
+                    title=title, description="", image="", is_published=True,
+                    created_by="admin", last_modified_by="admin",
+                    approved_by="admin", approved_at=None
+                )
+                session.add(service)
+                session.flush()
+                record_change(session, Service, service.id, "created", True)
+            session.commit()
+        monkeypatch.setattr(db, "engine", engine)
+        monkeypatch.setattr(db.settings, "db_async", False)
+        return engine
+
+    def test_sequence_and_compaction(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        with Session(engine) as session:
+            edit_content(session, Service, Service.id, 1, {"title": "Pipes"}, "admin")
+            approve_content(session, Service, Service.id, 2, "admin")
+            entries, since, has_more = load_changes(session, 0, 10)
+
+        assert [(e["id"], e["action"]) for e in entries] == [(1, "updated"), (2, "approved")]
+        assert entries[0]["data"].title == "Pipes"
+        assert since == entries[-1]["seq"] == 4
+        assert not has_more
+
+        with Session(engine) as session:
+            entries, since, has_more = load_changes(session, 0, 1)
+        assert (since, has_more) == (1, True)
+
+    def test_unpublished_and_deleted_are_tombstones(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        with Session(engine) as session:
+            # An editor's edit takes the service off the public listings
+            edit_content(session, Service, Service.id, 1, {"title": "Draft"}, "editor")
+            bulk_delete(session, Service, Service.id, [2], "atomic")
+            entries, _, _ = load_changes(session, 2, 10)
+            # Further edits to the draft are not public
+            edit_content(session, Service, Service.id, 1, {"title": "Draft 2"}, "editor")
+            later, since, _ = load_changes(session, 4, 10)
+            actions = session.exec(select(Change.action).order_by(Change.seq)).all()
+
+        assert [(e["id"], e["action"], e["data"]) for e in entries] == [
+            (1, "updated", None), (2, "deleted", None)
+        ]
+        assert (later, since) == ([], 4)
+        assert actions == ["created", "created", "updated", "deleted", "updated"]
+
+    def test_listing_version(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        with Session(engine) as session:
+            assert listing_version(session, "projects") == (0, None)
+            services = listing_version(session, "services")
+            category = Category(category_name="Kitchens")
+            session.add(category)
+            session.flush()
+            record_change(session, Category, category.category_id, "created", True)
+            session.commit()
+        # Read afresh, as another worker would: project listings embed
+        # category names, so they move on with the categories
+        with Session(engine) as session:
+            assert listing_version(session, "services") == services
+            projects, modified_at = listing_version(session, "projects")
+        assert projects == services[0] + 1
+        assert modified_at >= services[1]
+
+    def test_listing_cached_only_at_a_steady_version(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        cache = ContentCache(TTLCache(10, 60))
+        monkeypatch.setattr(conditional_utils, "content_cache", cache)
+
+        def changed_meanwhile(session):
+            # Another writer commits while the listing loads
+            with Session(engine) as other:
+                record_change(other, Service, 1, "updated", True)
+                other.commit()
+            return {"data": [1]}
+
+        with Session(engine) as session:
+            version, _, _ = conditional_utils.load_listing(
+                session, "services", "first", changed_meanwhile
+            )
+            assert cache.get("services", version, "first") is None
+            version, _, body = conditional_utils.load_listing(
+                session, "services", "first", lambda session: {"data": [1]}
+            )
+            assert cache.get("services", version, "first") == body
+
+    def test_prune_keeps_newest_per_namespace(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        with Session(engine) as session:
+            record_change(session, Category, 1, "created", True)
+            record_change(session, Service, 1, "updated", True)
+            session.commit()
+            versions = [listing_version(session, name)[0] for name in ("services", "projects")]
+            # All but the newest change are past the retention period
+            for change in session.exec(select(Change).where(Change.seq < 4)):
+                change.changed_at = utcnow() - timedelta(days=60)
+                session.add(change)
+            session.commit()
+
+            prune_changes(session)
+            assert session.exec(select(Change.seq).order_by(Change.seq)).all() == [3, 4]
+            assert change_horizon(session) == 3
+            assert [listing_version(session, name)[0] for name in ("services", "projects")] == versions
+            # Changes after the horizon are all still there
+            assert [e["seq"] for e in load_changes(session, 3, 10)[0]] == [4]
+            with pytest.raises(HTTPException) as e:
+                load_changes(session, 1, 10)
+            assert e.value.status_code == 410
+
+    def test_category_change_reaches_cached_projects(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        monkeypatch.setattr(lookup_utils, "item_cache", ItemCache(TTLCache(10, 60)))
+        lookup = ItemLookup("projects", PublishedProject.project_id, Project.project_id)
+        with Session(engine) as session:
+            categories = [Category(category_name=name) for name in ("Kitchens", "Gardens")]
+            session.add_all(categories)
+            session.flush()
+            for category in categories:
+                project = Project(
+                    project_image="image", category_id=category.category_id,
+                    is_published=True, created_by="admin", last_modified_by="admin"
+                )
+                session.add(project)
+                session.flush()
+                record_change(session, Project, project.project_id, "created", True)
+            session.commit()
+
+            def names():
+                items = asyncio.run(lookup.get_many(session, [1, 2], False))
+                return [item["category_name"] for item in items]
+
+            assert names() == ["Kitchens", "Gardens"]
+            categories[0].category_name = "Kitchen fitting"
+            session.add(categories[0])
+            record_change(session, Category, categories[0].category_id, "updated", True)
+            session.commit()
+            # Project listings and items follow their categories' changes
+            assert names() == ["Kitchen fitting", "Gardens"]
+
+    def test_rolled_back_write_leaves_no_change(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        with Session(engine) as session:
+            record_change(session, Service, 1, "updated", True)
+            session.rollback()
+            assert load_changes(session, 2, 10) == ([], 2, False)
+
+    def test_stream_pushes_new_changes(self, monkeypatch):
+        engine = self.make_engine(monkeypatch)
+        monkeypatch.setattr(db.settings, "change_stream_poll_seconds", 30)
+
+        async def follow():
+            events = change_events(None)
+            assert (await anext(events)).startswith("retry:")
+            pending = asyncio.ensure_future(anext(events))
+            await asyncio.sleep(0.2)
+            assert not pending.done()
+
+            def approve():
+                with Session(engine) as session:
+                    approve_content(session, Service, Service.id, 1, "admin")
+
+            version = change_notifier.version
+            await asyncio.to_thread(approve)
+            assert change_notifier.version == version + 1
+            event = await asyncio.wait_for(pending, 5)
+            await events.aclose()
+            return event
+
+        event = asyncio.run(follow())
+        lines = event.strip().split("\n")
+        assert lines[:2] == ["id: 3", "event: change"]
+        data = json.loads(lines[2].removeprefix("data: "))
+        assert (data["id"], data["action"], data["data"]["title"]) == (1, "approved", "Plumbing")
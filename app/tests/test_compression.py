@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timezone
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+from app.models.published import PublishedService
+from app.utils.compression_utils import CompressionMiddleware, choose_encoding
+from app.utils.json_utils import dumps
+
+class TestCompressedListing:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    response = client.get(
+        f"{BASE_URL}/api/services", headers={"Accept-Encoding": "gzip"}
+    )
+
+    def test_negotiated(self):
+        if self.response.status_code == 200:
+            assert "Accept-Encoding" in self.response.headers["vary"]
+            assert self.response.json()["success"] == True
+
+def _large(request):
+    return Response(b"x" * 4096, media_type="application/json")
+
+def _small(request):
+    return Response(b"{}", media_type="application/json")
+
+def _image(request):
+    return Response(b"x" * 4096, media_type="image/png")
+
+def _stream(request):
+    async def chunks():
+        for _ in range(3):
+            yield b"line\n"
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+_app = Starlette(routes=[
+    Route("/large", _large),
+    Route("/small", _small),
+    Route("/image", _image),
+    Route("/stream", _stream),
+])
+_app.add_middleware(CompressionMiddleware)
+
+class TestCompressionMiddleware:
+    client = TestClient(_app)
+
+    def test_compresses_above_threshold(self):
+        response = self.client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < 4096
+        assert response.content == b"x" * 4096
+
+    def test_small_body_left_alone(self):
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    def test_identity_only(self):
+        response = self.client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_incompressible_type(self):
+        response = self.client.get("/image", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_streamed_body(self):
+        response = self.client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == b"line\n" * 3
+
+class TestNegotiation:
+    def test_quality_values(self):
+        assert choose_encoding("gzip;q=0.5, deflate") == "gzip"
+        assert choose_encoding("gzip;q=0") is None
+        assert choose_encoding("*") in ("br", "gzip")
+        assert choose_encoding(None) is None
+
+class TestDumps:
+    def test_matches_jsonable_encoder(self):
+        service = PublishedService(
+            id=1, title="Plumbing", description="Pipes", image="a.jpg",
+            image_variants={"640w": "a-640w.jpg"},
+            updated_at=datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        )
+        payload = {"data": [service], "pagination": {"next_cursor": None}}
+        assert json.loads(dumps(payload)) == jsonable_encoder(payload)
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import tempfile
+import tracemalloc
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import create_engine, select
+
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+from app import db
+from app.migrations import migrate
+from app.models.service import Service
+from app.utils.export_utils import export_response
+
+class TestExports:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    no_auth = client.get(f"{BASE_URL}/api/users/export")
+
+    login = client.post(f"{BASE_URL}/api/auth/login", data={
+        "username": "admin",
+        "password": "password"
+    })
+    headers = {"Authorization": f"Bearer {login.json().get('access_token')}"}
+
+    users_ndjson = client.get(f"{BASE_URL}/api/users/export", headers=headers)
+    users_csv = client.get(
+        f"{BASE_URL}/api/users/export", params={"format": "csv"}, headers=headers
+    )
+
+    def test_no_auth(self):
+        assert self.no_auth.status_code == 401
+
+    def test_ndjson(self):
+        assert self.users_ndjson.headers["content-type"] == "application/x-ndjson"
+        users = [json.loads(line) for line in self.users_ndjson.text.splitlines()]
+        assert {"username": "admin", "is_admin": True} in users
+        assert all("hashed_password" not in user for user in users)
+
+    def test_csv(self):
+        assert self.users_csv.text.splitlines()[0] == "username,is_admin"
+
+class TestExportMemory:
+    def seeded_engine(self, rows: int):
+        path = os.path.join(tempfile.mkdtemp(), "export.db")
+        engine = create_engine(f"sqlite:///{path}")
+        migrate(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Service.__table__), [{
+                "title": f"Service {index}",
+                "description": "x" * 200,
+                "image": "image.jpg",
+                "created_by": "user",
+                "last_modified_by": "user",
+                "is_published": True,
+            } for index in range(rows)])
+        return engine
+
+    def peak_bytes(self, monkeypatch, rows: int) -> tuple[int, int]:
+        monkeypatch.setattr(db, "engine", self.seeded_engine(rows))
+        monkeypatch.setattr(db.settings, "db_async", False)
+        statement = select(*Service.__table__.columns).order_by(Service.id)
+
+        async def consume():
+            lines = 0
+            response = export_response(statement, "ndjson", "services")
+            async for chunk in response.body_iterator:
+                lines += chunk.count("\n")
+            return lines
+
+        tracemalloc.start()
+        try:
+            lines = asyncio.run(consume())
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    def test_peak_memory_is_flat(self, monkeypatch):
+        small_lines, small_peak = self.peak_bytes(monkeypatch, 2_000)
+        large_lines, large_peak = self.peak_bytes(monkeypatch, 20_000)
+        assert (small_lines, large_lines) == (2_000, 20_000)
+        # Ten times the rows must not mean ten times the memory
+        assert large_peak < small_peak * 2
@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+from app.utils.health_utils import ReadinessProbe
+
+class TestHealth:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    live = client.get(f"{BASE_URL}/health/live")
+    ready = client.get(f"{BASE_URL}/health/ready")
+    db_count = client.get(f"{BASE_URL}/health/db")
+
+    def test_live(self):
+        assert self.live.status_code == 200
+
+    def test_ready(self):
+        assert self.ready.status_code == 200
+        assert self.ready.json()["data"]["database"]
+        assert "pool_saturation" in self.ready.json()["data"]
+
+    def test_db_count(self):
+        assert self.db_count.json()["success"]
+        assert isinstance(self.db_count.json()["record_count"], int)
+
+class TestReadinessProbe:
+    def test_result_is_cached(self):
+        pings = []
+
+        async def ping():
+            pings.append(1)
+
+        async def probe_many():
+            probe = ReadinessProbe(interval_seconds=60)
+            results = await asyncio.gather(*(probe.check(ping) for _ in range(10)))
+            return probe, results
+
+        probe, results = asyncio.run(probe_many())
+        assert len(pings) == 1
+        assert probe.checks == 1
+        assert all(result["database"] for result in results)
+
+    def test_failure_is_reported(self):
+        async def ping():
+            raise ConnectionError("down")
+
+        result = asyncio.run(ReadinessProbe(interval_seconds=0).check(ping))
+        assert not result["database"]
+        assert result["error"] == "down"
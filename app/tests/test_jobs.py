@@ -0,0 +1,136 @@
+import asyncio
+import os
+import tempfile
+from datetime import timedelta
+
+import httpx
+from sqlmodel import Session, create_engine, select
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import db
+from app.migrations import migrate
+from app.models.job import Job, utcnow
+from app.utils.job_utils import JobQueue
+from app.utils.publish_utils import content_changed
+# Registers the listing warm-up jobs
+import app.routes.projects
+
+class TestJobEndpoints:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    jobs = client.get(f"{BASE_URL}/health/jobs")
+    metrics = client.get(f"{BASE_URL}/metrics")
+
+    def test_job_stats(self):
+        data = self.jobs.json()["data"]
+        assert data["queue_depth"] >= 0
+        assert "stored" in data
+
+    def test_job_metrics(self):
+        assert "job_queue_depth" in self.metrics.text
+
+class TestJobQueue:
+    def make_queue(self, monkeypatch, max_attempts: int = 3) -> JobQueue:
+        engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'jobs.db')}")
+        migrate(engine)
+        monkeypatch.setattr(db, "engine", engine)
+        return JobQueue(
+            workers=1, max_queue=2, max_attempts=max_attempts,
+            retry_seconds=10, poll_seconds=1, orphan_seconds=30
+        )
+
+    def stored(self) -> list[Job]:
+        with Session(db.engine) as session:
+            return session.exec(select(Job)).all()
+
+    def test_success_removes_job(self, monkeypatch):
+        jobs = self.make_queue(monkeypatch)
+        calls = []
+        jobs.register("record")(lambda session, value: calls.append(value))
+
+        [id] = asyncio.run(jobs.enqueue(("record", {"value": 7})))
+        jobs.run_job(id)
+        # A second run finds nothing to claim
+        jobs.run_job(id)
+
+        assert calls == [7]
+        assert self.stored() == []
+        assert jobs.stats()["kinds"]["record"]["completed"] == 1
+
+    def test_retry_then_fail(self, monkeypatch):
+        jobs = self.make_queue(monkeypatch, max_attempts=2)
+
+        def broken(session):
+            raise RuntimeError("unreachable")
+
+        jobs.register("broken")(broken)
+        [id] = asyncio.run(jobs.enqueue(("broken", {})))
+
+        jobs.run_job(id)
+        [job] = self.stored()
+        assert (job.status, job.attempts) == ("pending", 1)
+        assert job.run_at > utcnow() + timedelta(seconds=5)
+        assert jobs.stats()["retries_scheduled"] == 1
+
+        with Session(db.engine) as session:
+            job = session.get(Job, id)
+            job.run_at = utcnow()
+            session.add(job)
+            session.commit()
+        jobs.run_job(id)
+        [job] = self.stored()
+        assert (job.status, job.attempts) == ("failed", 2)
+        assert job.last_error == "RuntimeError: unreachable"
+
+    def test_queue_overflow_left_for_poller(self, monkeypatch):
+        jobs = self.make_queue(monkeypatch)
+        jobs.register("noop")(lambda session: None)
+        ids = asyncio.run(jobs.enqueue(*[("noop", {})] * 3))
+
+        assert jobs.stats()["queue_depth"] == 2
+        assert jobs.stats()["overflowed"] == 1
+        # Only the one that is not already queued
+        assert jobs.recover(orphan_seconds=0) == ids[2:]
+
+    def test_recovers_abandoned_running_job(self, monkeypatch):
+        jobs = self.make_queue(monkeypatch)
+        with Session(db.engine) as session:
+            session.add(Job(
+                kind="noop", status="running",
+                started_at=utcnow() - timedelta(minutes=5),
+                run_at=utcnow() - timedelta(minutes=5)
+            ))
+            session.commit()
+
+        assert len(jobs.recover()) == 1
+        [job] = self.stored()
+        assert job.status == "pending"
+
+    def test_added_with_the_write(self, monkeypatch):
+        jobs = self.make_queue(monkeypatch)
+        jobs.register("noop")(lambda session: None)
+        with Session(db.engine) as session:
+            jobs.add(session, ("noop", {}))
+            session.flush()
+            session.rollback()
+        assert self.stored() == []
+
+        with Session(db.engine) as session:
+            jobs.add(session, ("noop", {}))
+            session.flush()
+            # Queued only once the write commits
+            assert jobs.stats()["queue_depth"] == 0
+            session.commit()
+        assert len(self.stored()) == 1
+        assert jobs.stats()["queue_depth"] == 1
+        assert jobs.stats()["kinds"]["noop"]["enqueued"] == 1
+
+    def test_category_change_warms_projects(self, monkeypatch):
+        self.make_queue(monkeypatch)
+        with Session(db.engine) as session:
+            content_changed(session, "categories", [1], True)
+            session.commit()
+        assert "projects.warm" in [job.kind for job in self.stored()]
@@ -0,0 +1,45 @@
+import httpx
+
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+from app.utils.metrics_utils import Histogram, RequestMetrics, RequestStats
+
+class TestMetricsEndpoint:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    listing = client.get(f"{BASE_URL}/api/services")
+    metrics = client.get(f"{BASE_URL}/metrics")
+
+    def test_server_timing_header(self):
+        timing = self.listing.headers["server-timing"]
+        assert "app;dur=" in timing
+        assert "db;dur=" in timing
+
+    def test_route_template_label(self):
+        assert self.metrics.status_code == 200
+        assert 'route="/api/services"' in self.metrics.text
+        assert "http_request_db_statements_bucket" in self.metrics.text
+
+class TestHistogram:
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value)
+        lines = histogram.render("x", (("route", "/a"),))
+        assert lines[0] == 'x_bucket{route="/a",le="1"} 2'
+        assert lines[1] == 'x_bucket{route="/a",le="5"} 3'
+        assert lines[2] == 'x_bucket{route="/a",le="+Inf"} 4'
+        assert lines[3] == 'x_sum{route="/a"} 14'
+
+    def test_request_counts(self):
+        metrics = RequestMetrics()
+        stats = RequestStats()
+        stats.statements = 3
+        metrics.observe("GET", "/api/services/{id}", 200, 0.01, stats)
+        metrics.observe("GET", "/api/services/{id}", 200, 0.02, stats)
+        text = metrics.render()
+        assert 'http_requests_total{method="GET",route="/api/services/{id}",status="200"} 2' in text
+        assert 'http_request_db_statements_sum{method="GET",route="/api/services/{id}"} 6' in text
@@ -0,0 +1,44 @@
+from sqlalchemy import inspect, text
+from sqlmodel import create_engine
+
+from app.migrations import MIGRATIONS, applied_versions, migrate
+
+class TestMigrations:
+    def test_fresh_database(self):
+        engine = create_engine("sqlite://")
+        assert migrate(engine) == [m.VERSION for m in MIGRATIONS]
+        assert migrate(engine) == []
+        assert applied_versions(engine) == [m.VERSION for m in MIGRATIONS]
+        indexes = {index["name"] for index in inspect(engine).get_indexes("project")}
+        assert "ix_project_published_category" in indexes
+        assert "ix_project_is_published" not in indexes
+
+    def test_database_created_before_migrations(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE service (id INTEGER PRIMARY KEY, title VARCHAR, "
+                "description VARCHAR, image VARCHAR, created_by VARCHAR, "
+                "last_modified_by VARCHAR, is_published BOOLEAN, "
+                "approved_by VARCHAR, approved_at DATETIME)"
+            ))
+            conn.execute(text(
+                'CREATE TABLE "user" (username VARCHAR PRIMARY KEY, '
+                "hashed_password VARCHAR, is_admin BOOLEAN)"
+            ))
+            conn.execute(text(
+                "INSERT INTO \"user\" VALUES ('admin', '', 1)"
+            ))
+        migrate(engine)
+        columns = {c["name"] for c in inspect(engine).get_columns("user")}
+        assert "token_version" in columns
+        with engine.connect() as conn:
+            assert conn.execute(text('SELECT token_version FROM "user"')).scalar() == 0
+        service_columns = {c["name"] for c in inspect(engine).get_columns("service")}
+        assert "updated_at" in service_columns
+        assert "image_variants" in service_columns
+
+    def test_target_version(self):
+        engine = create_engine("sqlite://")
+        assert migrate(engine, target=2) == [1, 2]
+        assert migrate(engine) == [m.VERSION for m in MIGRATIONS[2:]]
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.service import Service
+from app.utils.pagination_utils import PageParams, list_page, parse_fields
+
+SORT_FIELDS = {"id": "id", "title": "title"}
+
+def setup_db():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for title in ("Roofing", "Painting", "Plumbing"):
+            session.add(Service(
+                title=title, description="Long description " * 50,
+                image=f"{title.lower()}.jpg", created_by="user",
+                last_modified_by="user", is_published=True
+            ))
+        session.commit()
+    return engine
+
+class TestFieldProjection:
+    def test_selects_only_requested_columns(self):
+        engine = setup_db()
+        statements = []
+        event.listen(
+            engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *rest: statements.append(statement)
+        )
+        with Session(engine) as session:
+            items, _ = list_page(
+                session, Service, PageParams(limit=2), SORT_FIELDS,
+                fields=parse_fields(Service, "title,image")
+            )
+        assert items == [
+            {"id": 1, "title": "Roofing", "image": "roofing.jpg"},
+            {"id": 2, "title": "Painting", "image": "painting.jpg"},
+        ]
+        assert "description" not in statements[-1]
+
+    def test_cursor_on_unrequested_sort_column(self):
+        engine = setup_db()
+        fields = parse_fields(Service, "image")
+        with Session(engine) as session:
+            first, pagination = list_page(
+                session, Service, PageParams(limit=2, sort="title"),
+                SORT_FIELDS, fields=fields
+            )
+            second, _ = list_page(
+                session, Service,
+                PageParams(limit=2, cursor=pagination["next_cursor"], sort="title"),
+                SORT_FIELDS, fields=fields
+            )
+        assert [item["image"] for item in first + second] == [
+            "painting.jpg", "plumbing.jpg", "roofing.jpg"
+        ]
+        assert set(first[0]) == {"id", "image"}
+
+    def test_single_field(self):
+        engine = setup_db()
+        with Session(engine) as session:
+            items, _ = list_page(
+                session, Service, PageParams(), SORT_FIELDS,
+                fields=parse_fields(Service, "id")
+            )
+        assert items == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    def test_unknown_field(self):
+        with pytest.raises(HTTPException) as e:
+            parse_fields(Service, "title,password")
+        assert e.value.status_code == 400
+        with pytest.raises(HTTPException):
+            parse_fields(Service, " , ")
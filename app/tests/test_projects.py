@@ -12,3 +12,51 @@ class TestProjects:
 
     def test_no_auth(self):
         assert self.no_auth.status_code == 401
+
+    missing = client.get(f"{BASE_URL}/api/projects/999999")
+    none_found = client.get(f"{BASE_URL}/api/projects", params={"ids": "999999"})
+
+    def test_missing(self):
+        assert self.missing.status_code == 404
+
+    def test_none_found(self):
+        assert self.none_found.status_code == 204
+
+def _project(category_id: int) -> dict:
+    return {
+        "project_image": "image.jpg", "category_id": category_id,
+        "created_by": "admin", "last_modified_by": "admin",
+        "is_published": False, "approved_by": None, "approved_at": None
+    }
+
+class TestProjectCategories:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    category_id = client.post(
+        f"{BASE_URL}/api/admin/categories", json={"category_name": "Bulk"}
+    ).json()["data"]["category_id"]
+
+    single = client.post(f"{BASE_URL}/api/admin/projects", json=_project(999999))
+    best_effort = client.post(
+        f"{BASE_URL}/api/admin/projects/bulk", params={"mode": "best_effort"},
+        json={"items": [_project(category_id), _project(999999)]}
+    )
+    atomic = client.post(
+        f"{BASE_URL}/api/admin/projects/bulk",
+        json={"items": [_project(category_id), _project(999999)]}
+    )
+
+    def test_single_unknown_category(self):
+        assert self.single.status_code == 422
+
+    def test_bulk_reports_unknown_category_per_item(self):
+        assert self.best_effort.status_code == 200
+        first, second = self.best_effort.json()["data"]
+        assert first["success"] and first["id"] is not None
+        assert not second["success"]
+        assert second["error"] == "Category 999999 does not exist"
+
+    def test_atomic_batch_is_not_applied(self):
+        assert self.atomic.status_code == 422
+        assert not any(item["success"] for item in self.atomic.json()["data"])
@@ -0,0 +1,157 @@
+import jwt
+from starlette.applications import Starlette
+from starlette.requests import HTTPConnection
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.config import settings
+from app.main import app
+from app.utils import rate_limit_utils
+from app.utils.auth_utils import password_executor
+from app.utils.rate_limit_utils import (
+    AdminWriteRateLimitMiddleware,
+    MemoryRateLimitStore,
+    RateLimit,
+    token_subject,
+)
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestMemoryRateLimitStore:
+    def test_bounded(self):
+        store = MemoryRateLimitStore(max_entries=3)
+        for key in "abcde":
+            store.hit(key, 60)
+        assert len(store) == 3
+        assert store.evictions == 2
+        # The least recently used keys went first
+        assert store.hit("a", 60, 0)[0] == 0
+        assert store.hit("e", 60, 0)[0] == 1
+
+    def test_windows_roll(self):
+        clock = Clock(0)
+        store = MemoryRateLimitStore(clock=clock)
+        store.hit("a", 10)
+        store.hit("a", 10)
+        clock.now = 15
+        assert store.hit("a", 10) == (1, 2, 0.5)
+        # Idle for longer than a window, nothing carries over
+        clock.now = 45
+        assert store.hit("a", 10) == (1, 0, 0.5)
+
+class TestRateLimit:
+    def make_limit(self, limit: int, clock: Clock) -> RateLimit:
+        return RateLimit("test", limit, 10, MemoryRateLimitStore(clock=clock))
+
+    def test_rejects_over_limit(self):
+        clock = Clock(0)
+        limit = self.make_limit(3, clock)
+        assert [limit.hit("a") for _ in range(3)] == [None, None, None]
+        wait = limit.hit("a")
+        assert wait is not None and 0 < wait <= 20
+        assert limit.rejected == 1
+        # Other keys are counted apart
+        assert limit.hit("b") is None
+
+    def test_previous_window_slides_out(self):
+        clock = Clock(0)
+        limit = self.make_limit(4, clock)
+        for _ in range(4):
+            limit.hit("a")
+        # Half of the previous window is still covered: 4 * 0.5 + 1 + 1 = 4
+        clock.now = 15
+        assert limit.hit("a") is None
+        assert limit.hit("a") is None
+        wait = limit.hit("a")
+        assert wait is not None
+        # Waiting as long as asked makes room for one more attempt
+        clock.now += wait
+        assert limit.check("a") is None
+
+    def test_check_does_not_count(self):
+        clock = Clock(0)
+        limit = self.make_limit(2, clock)
+        for _ in range(5):
+            assert limit.check("a") is None
+        limit.hit("a")
+        limit.hit("a")
+        assert limit.check("a") is not None
+
+class TestLoginThrottle:
+    client = TestClient(app)
+
+    def test_rejected_before_any_work(self, monkeypatch):
+        limit = RateLimit("login_ip", 2, 60, MemoryRateLimitStore())
+        monkeypatch.setattr(rate_limit_utils, "login_attempts", limit)
+        limit.hit("testclient")
+        limit.hit("testclient")
+        submitted = password_executor.stats()
+        response = self.client.post(
+            "/api/auth/login", data={"username": "admin", "password": "password"}
+        )
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        assert password_executor.stats() == submitted
+
+    def test_failures_per_username(self, monkeypatch):
+        monkeypatch.setattr(
+            rate_limit_utils, "login_attempts",
+            RateLimit("login_ip", 100, 60, MemoryRateLimitStore())
+        )
+        failures = RateLimit("login_user", 3, 60, MemoryRateLimitStore())
+        monkeypatch.setattr(rate_limit_utils, "login_failures", failures)
+        for _ in range(3):
+            rate_limit_utils.record_login_failure("Admin")
+        response = self.client.post(
+            "/api/auth/login", data={"username": "admin", "password": "password"}
+        )
+        assert response.status_code == 429
+
+def _write(request):
+    return PlainTextResponse("ok")
+
+_app = Starlette(routes=[
+    Route("/api/admin/things", _write, methods=["GET", "POST"]),
+    Route("/api/things", _write, methods=["POST"]),
+])
+_app.add_middleware(AdminWriteRateLimitMiddleware)
+
+class TestAdminWriteRateLimit:
+    client = TestClient(_app)
+
+    def test_admin_writes_limited(self, monkeypatch):
+        monkeypatch.setattr(
+            rate_limit_utils, "admin_writes",
+            RateLimit("admin_write", 2, 60, MemoryRateLimitStore())
+        )
+        assert self.client.post("/api/admin/things").status_code == 200
+        assert self.client.post("/api/admin/things").status_code == 200
+        response = self.client.post("/api/admin/things")
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        # Reads and other routes are left alone
+        assert self.client.get("/api/admin/things").status_code == 200
+        assert self.client.post("/api/things").status_code == 200
+
+    def test_token_subject(self):
+        token = jwt.encode({"sub": "admin"}, settings.secret_key, settings.algorithm)
+        forged = jwt.encode({"sub": "admin"}, "not the key", settings.algorithm)
+        for header, subject in [
+            (f"Bearer {token}", "admin"),
+            (f"Bearer {forged}", None),
+            ("", None),
+        ]:
+            scope = {
+                "type": "http",
+                "headers": [(b"authorization", header.encode())],
+            }
+            assert token_subject(HTTPConnection(scope)) == subject
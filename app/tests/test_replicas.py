@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+
+import httpx
+import sqlalchemy
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine, select
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import db
+from app.migrations import migrate
+from app.models.category import Category
+from app.utils import conditional_utils, lookup_utils
+from app.utils.cache_utils import ContentCache, ItemCache, TTLCache
+from app.utils.change_utils import record_change
+from app.utils.lookup_utils import ItemLookup
+from app.utils.replica_utils import STICKY_COOKIE, ReadYourWritesMiddleware
+
+class TestReplicaEndpoint:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    replicas = client.get(f"{BASE_URL}/health/db/replicas")
+
+    def test_replica_status(self):
+        assert self.replicas.status_code == 200
+        assert isinstance(self.replicas.json()["data"], list)
+
+def database(directory: str, name: str, migrated: bool = True) -> str:
+    # Each file stands in for one server, told apart by its category name
+    url = f"sqlite:///{os.path.join(directory, name + '.db')}"
+    if migrated:
+        engine = create_engine(url)
+        migrate(engine)
+        with Session(engine) as session:
+            session.add(Category(category_id=1, category_name=name))
+            session.commit()
+        engine.dispose()
+    return url
+
+def _category_name(session: Session):
+    return session.exec(select(Category.category_name)).first()
+
+def _rename(session: Session):
+    category = session.get(Category, 1)
+    category.category_name = "primary (renamed)"
+    session.add(category)
+    record_change(session, Category, 1, "updated", True)
+    session.commit()
+
+def _categories(session: Session):
+    return {"data": [_category_name(session)]}
+
+class TestReplicaRouting:
+    def make_client(self, monkeypatch, directory: str, replica_urls: list[str]) -> TestClient:
+        primary = create_engine(database(directory, "primary"))
+        # The write hook the app's primary engine carries
+        sqlalchemy.event.listen(primary, "after_cursor_execute", db._mark_write)
+        monkeypatch.setattr(db.settings, "db_async", False)
+        monkeypatch.setattr(db.settings, "database_replica_urls", replica_urls)
+        monkeypatch.setattr(db, "engine", primary)
+        monkeypatch.setattr(
+            db, "replicas", db.ReplicaSet([db.Replica(url) for url in replica_urls])
+        )
+
+        app = FastAPI()
+        app.add_middleware(ReadYourWritesMiddleware)
+
+        @app.get("/read")
+        async def read(session: Session = Depends(db.get_read_session)):
+            return {"name": await db.run(session, _category_name)}
+
+        @app.get("/listing")
+        async def listing(request: Request, session: Session = Depends(db.get_read_session)):
+            return await conditional_utils.cached_listing(
+                request, session, "categories", "all", _categories
+            )
+
+        @app.get("/item")
+        async def item(session: Session = Depends(db.get_read_session)):
+            lookup = ItemLookup("categories", Category.category_id, Category.category_id)
+            return await lookup.get(session, 1, False)
+
+        @app.post("/write")
+        async def write(session: Session = Depends(db.get_sync_session)):
+            await db.run(session, _rename)
+
+        return TestClient(app)
+
+    def test_reads_rotate_over_replicas(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        client = self.make_client(monkeypatch, directory, [
+            database(directory, "replica-a"), database(directory, "replica-b")
+        ])
+        names = {client.get("/read").json()["name"] for _ in range(4)}
+        assert names == {"replica-a", "replica-b"}
+
+    def test_reads_follow_own_writes(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        client = self.make_client(monkeypatch, directory, [database(directory, "replica-a")])
+        assert client.get("/read").json()["name"] == "replica-a"
+
+        response = client.post("/write")
+        assert STICKY_COOKIE in response.cookies
+        assert client.get("/read").json()["name"] == "primary (renamed)"
+
+        # A client without the cookie still reads from the replica
+        client.cookies.clear()
+        assert client.get("/read").json()["name"] == "replica-a"
+
+    def test_unreachable_replica_is_skipped(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        missing = f"sqlite:///{os.path.join(directory, 'missing', 'replica.db')}"
+        client = self.make_client(monkeypatch, directory, [missing, database(directory, "replica-b")])
+        assert {client.get("/read").json()["name"] for _ in range(3)} == {"replica-b"}
+        assert db.replicas.replicas[0].status()["database"] == False
+
+    def test_all_replicas_down_reads_primary(self, monkeypatch):
+        directory = tempfile.mkdtemp()
+        missing = f"sqlite:///{os.path.join(directory, 'missing', 'replica.db')}"
+        client = self.make_client(monkeypatch, directory, [missing])
+        assert client.get("/read").json()["name"] == "primary"
+
+    def test_failed_query_falls_back_to_primary(self, monkeypatch):
+        # Answers the health check but has no tables
+        directory = tempfile.mkdtemp()
+        client = self.make_client(
+            monkeypatch, directory, [database(directory, "empty", migrated=False)]
+        )
+        assert client.get("/read").json()["name"] == "primary"
+        assert db.replicas.replicas[0].status()["database"] == False
+
+    def test_lagging_replica_caches_under_its_own_version(self, monkeypatch):
+        monkeypatch.setattr(
+            conditional_utils, "content_cache", ContentCache(TTLCache(10, 60))
+        )
+        directory = tempfile.mkdtemp()
+        client = self.make_client(monkeypatch, directory, [database(directory, "replica-a")])
+        client.post("/write")
+        sticky = dict(client.cookies)
+
+        # The replica has not applied the write
+        client.cookies.clear()
+        lagging = client.get("/listing")
+        assert lagging.json()["data"] == ["replica-a"]
+
+        client.cookies.update(sticky)
+        current = client.get("/listing")
+        assert current.json()["data"] == ["primary (renamed)"]
+        assert current.headers["etag"] != lagging.headers["etag"]
+
+    def test_cached_item_follows_the_replica(self, monkeypatch):
+        monkeypatch.setattr(
+            lookup_utils, "item_cache", ItemCache(TTLCache(10, 60))
+        )
+        directory = tempfile.mkdtemp()
+        client = self.make_client(monkeypatch, directory, [database(directory, "replica-a")])
+        client.post("/write")
+        client.cookies.clear()
+        assert client.get("/item").json()["category_name"] == "replica-a"
+
+        # The replica catches up: the cached row was keyed by the version it
+        # had applied, so it is not served again
+        db.replicas.replicas[0].engine.dispose()
+        shutil.copy(
+            os.path.join(directory, "primary.db"), os.path.join(directory, "replica-a.db")
+        )
+        assert client.get("/item").json()["category_name"] == "primary (renamed)"
@@ -0,0 +1,101 @@
+import httpx
+from sqlmodel import Session, SQLModel, create_engine
+
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+from app.models.category import Category
+from app.models.project import Project
+from app.models.published import PublishedProject
+from app.utils.change_utils import record_change
+from app.utils.pagination_utils import PageParams
+from app.utils.search_utils import ContentSearch, InvertedIndex
+from app.utils.snapshot_utils import rebuild_snapshots
+
+class TestSearchEndpoints:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    services = client.get(f"{BASE_URL}/api/services/search", params={"q": "zz"})
+    blank = client.get(f"{BASE_URL}/api/services/search", params={"q": "  "})
+    projects = client.get(f"{BASE_URL}/api/projects/search", params={"q": "zz"})
+
+    def test_no_matches(self):
+        assert self.services.status_code == 204
+        assert self.projects.status_code == 204
+
+    def test_blank_query(self):
+        assert self.blank.status_code == 400
+
+class TestInvertedIndex:
+    def test_prefix_and_ranking(self):
+        index = InvertedIndex()
+        index.upsert(1, {"plumbing": 1.0, "repairs": 0.4})
+        index.upsert(2, {"roof": 1.0, "plumbing": 0.4})
+        index.upsert(3, {"painting": 1.0})
+        assert index.search(["plumb"]) == [(-1.0, 1), (-0.4, 2)]
+        assert index.search(["plumb", "rep"]) == [(-1.4, 1)]
+        assert index.search(["p"]) == [(-1.0, 1), (-1.0, 3), (-0.4, 2)]
+
+    def test_remove_drops_terms(self):
+        index = InvertedIndex()
+        index.upsert(1, {"plumbing": 1.0})
+        index.upsert(1, {"roof": 1.0})
+        assert index.search(["plumb"]) == []
+        index.remove(1)
+        assert len(index) == 0
+        assert index.search(["roof"]) == []
+
+class TestContentSearch:
+    def setup_search(self):
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        session = Session(engine)
+        session.add(Category(category_id=1, category_name="Kitchens"))
+        for image in ("oak-cabinets.jpg", "marble-island.jpg", "oak-floor.jpg"):
+            session.add(Project(
+                project_image=image, category_id=1, created_by="user",
+                last_modified_by="user", is_published=True
+            ))
+        session.flush()
+        rebuild_snapshots(session)
+        session.commit()
+        search = ContentSearch(
+            Project,
+            Project.project_id,
+            PublishedProject.project_id,
+            [(Project.project_image, 1.0), (Category.category_name, 0.4)],
+            join=(Category, Category.category_id == Project.category_id)
+        )
+        return session, search
+
+    def test_paginates_in_rank_order(self):
+        session, search = self.setup_search()
+        first, pagination = search.search(session, "kitch oak", PageParams(limit=1))
+        assert [p.project_id for p in first] == [1]
+        # The public columns only, as in the listings
+        assert isinstance(first[0], PublishedProject)
+        assert first[0].category_name == "Kitchens"
+        second, pagination = search.search(
+            session, "kitch oak", PageParams(limit=1, cursor=pagination["next_cursor"])
+        )
+        assert [p.project_id for p in second] == [3]
+        assert not pagination["has_more"]
+
+    def test_refresh_follows_writes(self):
+        session, search = self.setup_search()
+        search.search(session, "oak", PageParams())
+        project = session.get(Project, 1)
+        project.is_published = False
+        session.add(project)
+        record_change(session, Project, 1, "updated", True)
+        session.commit()
+        search.refresh(session, [1])
+        items, _ = search.search(session, "oak", PageParams())
+        assert [p.project_id for p in items] == [3]
+        session.delete(session.get(Project, 3))
+        record_change(session, Project, 3, "deleted", True)
+        session.commit()
+        search.refresh(session, [3])
+        assert len(search.index) == 1
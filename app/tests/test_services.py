@@ -10,5 +10,113 @@ class TestServices:
 
     no_auth = client.patch(f"{BASE_URL}/api/admin/services/1/approve")
 
+    invalid_cursor = client.get(
+        f"{BASE_URL}/api/services", params={"cursor": "not-a-cursor"}
+    )
+
+    oversized_page = client.get(
+        f"{BASE_URL}/api/services", params={"limit": 100000}
+    )
+
+    bulk_no_auth = client.patch(
+        f"{BASE_URL}/api/admin/services/bulk/approve",
+        json={"ids": [1], "approved_by": "user"}
+    )
+
+    empty_batch = client.post(
+        f"{BASE_URL}/api/admin/services/bulk", json={"items": []}
+    )
+
+    listing = client.get(f"{BASE_URL}/api/services")
+
+    revalidated = client.get(f"{BASE_URL}/api/services", headers={
+        "If-None-Match": listing.headers.get("etag", "")
+    })
+
+    unknown_field = client.get(
+        f"{BASE_URL}/api/services", params={"fields": "title,password"}
+    )
+
     def test_no_auth(self):
         assert self.no_auth.status_code == 401
+
+    def test_invalid_cursor(self):
+        assert self.invalid_cursor.status_code == 400
+
+    def test_oversized_page(self):
+        assert self.oversized_page.status_code == 422
+
+    def test_not_modified(self):
+        assert self.revalidated.status_code == 304
+        assert self.revalidated.headers["etag"] == self.listing.headers["etag"]
+
+    def test_bulk_no_auth(self):
+        assert self.bulk_no_auth.status_code == 401
+
+    def test_empty_batch(self):
+        assert self.empty_batch.status_code == 422
+
+    def test_unknown_field(self):
+        assert self.unknown_field.status_code == 400
+
+def _create_service(client: httpx.Client, base_url: str, title: str, is_published: bool) -> int:
+    return client.post(f"{base_url}/api/admin/services", json={
+        "title": title, "description": "Lookup", "image": "image.jpg",
+        "created_by": "admin", "last_modified_by": "admin",
+        "is_published": is_published, "approved_by": None, "approved_at": None
+    }).json()["data"]["id"]
+
+class TestServiceLookup:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    login = client.post(f"{BASE_URL}/api/auth/login", data={
+        "username": "admin",
+        "password": "password"
+    })
+    headers = {"Authorization": f"Bearer {login.json().get('access_token')}"}
+
+    published = _create_service(client, BASE_URL, "Published", True)
+    draft = _create_service(client, BASE_URL, "Draft", False)
+
+    single = client.get(f"{BASE_URL}/api/services/{published}")
+    draft_public = client.get(f"{BASE_URL}/api/services/{draft}")
+    draft_admin = client.get(f"{BASE_URL}/api/services/{draft}", headers=headers)
+    many_public = client.get(
+        f"{BASE_URL}/api/services", params={"ids": f"{draft},{published},999999"}
+    )
+    many_admin = client.get(
+        f"{BASE_URL}/api/services",
+        params={"ids": f"{draft},{published}", "fields": "title,is_published"},
+        headers=headers
+    )
+    bad_ids = client.get(f"{BASE_URL}/api/services", params={"ids": "1,two"})
+
+    # Cached by the read above, then edited and approved by the admin
+    client.patch(f"{BASE_URL}/api/admin/services/{published}", json={
+        "title": "Renamed", "last_modified_by": "admin"
+    })
+    after_edit = client.get(f"{BASE_URL}/api/services/{published}")
+
+    def test_single(self):
+        assert self.single.status_code == 200
+        assert self.single.json()["data"]["title"] == "Published"
+        assert "created_by" not in self.single.json()["data"]
+
+    def test_draft_hidden_from_public(self):
+        assert self.draft_public.status_code == 404
+        assert self.draft_admin.status_code == 200
+        assert self.draft_admin.json()["data"]["is_published"] is False
+
+    def test_many(self):
+        assert [item["id"] for item in self.many_public.json()["data"]] == [self.published]
+        assert self.many_admin.json()["data"] == [
+            {"title": "Draft", "is_published": False},
+            {"title": "Published", "is_published": True},
+        ]
+
+    def test_bad_ids(self):
+        assert self.bad_ids.status_code == 400
+
+    def test_edit_invalidates_cache(self):
+        assert self.after_edit.json()["data"]["title"] == "Renamed"
@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+import httpx
+from sqlmodel import Session, create_engine, select
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.migrations import migrate
+from app.models.category import Category
+from app.models.project import Project, ProjectBulkUpdate
+from app.models.published import PublishedProject, PublishedService
+from app.models.service import Service
+from app.models.user import User
+from app.utils.bulk_utils import bulk_update
+from app.utils.workflow_utils import approve_content, edit_content
+
+class TestPublicColumns:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    private_field = client.get(
+        f"{BASE_URL}/api/services", params={"fields": "title,created_by"}
+    )
+    category_name = client.get(
+        f"{BASE_URL}/api/projects", params={"fields": "category_name"}
+    )
+
+    def test_private_field(self):
+        assert self.private_field.status_code == 400
+
+    def test_category_name(self):
+        assert self.category_name.status_code in (200, 204)
+
+def service(title: str, is_published: bool) -> Service:
+    return Service(
+        title=title, description="", image="", is_published=is_published,
+        created_by="admin", last_modified_by="admin", approved_by=None,
+        approved_at=None
+    )
+
+def project(category_id: int, is_published: bool) -> Project:
+    return Project(
+        project_image="image.jpg", category_id=category_id,
+        is_published=is_published, created_by="admin",
+        last_modified_by="admin", approved_by=None, approved_at=None
+    )
+
+class TestPublishedSnapshot:
+    def make_engine(self):
+        engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'snapshot.db')}")
+        # Rows written before the snapshot existed are copied in by its migration
+        migrate(engine, target=7)
+        with Session(engine) as session:
+            session.add(User(username="admin", hashed_password="", is_admin=True))
+            session.add(User(username="editor", hashed_password="", is_admin=False))
+            session.add(Category(category_id=1, category_name="Kitchens"))
+            session.add(Category(category_id=2, category_name="Gardens"))
+            session.add_all([service("Plumbing", True), service("Draft", False)])
+            session.add_all([project(1, True), project(2, False)])
+            session.commit()
+        migrate(engine)
+        return engine
+
+    def snapshot(self, engine):
+        with Session(engine) as session:
+            services = session.exec(select(PublishedService.id)).all()
+            projects = session.exec(
+                select(PublishedProject.project_id, PublishedProject.category_name)
+            ).all()
+        return services, projects
+
+    def test_migration_copies_published_rows(self):
+        engine = self.make_engine()
+        assert self.snapshot(engine) == ([1], [(1, "Kitchens")])
+
+    def test_writes_refresh_snapshot(self):
+        engine = self.make_engine()
+        with Session(engine) as session:
+            # An editor's edit unpublishes, an admin's approval publishes
+            edit_content(session, Service, Service.id, 1, {"title": "Pipes"}, "editor")
+            approve_content(session, Service, Service.id, 2, "admin")
+            bulk_update(session, Project, Project.project_id, ProjectBulkUpdate, [
+                {"id": 1, "category_id": 2, "last_modified_by": "admin"},
+                {"id": 2, "last_modified_by": "admin"},
+            ], "atomic")
+        assert self.snapshot(engine) == ([2], [(1, "Gardens"), (2, "Gardens")])
+
+    def test_rolled_back_write_leaves_snapshot(self):
+        engine = self.make_engine()
+        with Session(engine) as session:
+            item = session.get(Service, 1)
+            item.is_published = False
+            session.add(item)
+            session.flush()
+            session.rollback()
+        assert self.snapshot(engine) == ([1], [(1, "Kitchens")])
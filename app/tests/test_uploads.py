@@ -0,0 +1,221 @@
+import asyncio
+import os
+import struct
+import tempfile
+import zlib
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session, create_engine, select
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import db
+from app.migrations import migrate
+from app.models.job import Job
+from app.models.service import Service
+from app.utils import image_utils
+from app.utils.job_utils import job_queue
+from app.utils.storage_utils import LocalStorage
+from app.utils.upload_utils import StreamedUpload
+
+def png(width: int, height: int) -> bytes:
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+    rows = b"".join(b"\x00" + b"\x80\x80\x80" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+class TestImageUpload:
+    BASE_URL = os.getenv("base_url")
+    client = httpx.Client()
+
+    no_auth = client.post(
+        f"{BASE_URL}/api/admin/services/1/image",
+        files={"file": ("a.png", png(1, 1), "image/png")}
+    )
+
+    login = client.post(f"{BASE_URL}/api/auth/login", data={
+        "username": "admin",
+        "password": "password"
+    })
+    headers = {"Authorization": f"Bearer {login.json().get('access_token')}"}
+
+    missing = client.post(
+        f"{BASE_URL}/api/admin/services/999999/image",
+        files={"file": ("a.png", png(1, 1), "image/png")},
+        headers=headers
+    )
+    not_an_image = client.post(
+        f"{BASE_URL}/api/admin/services/1/image",
+        files={"file": ("a.txt", b"hello", "text/plain")},
+        headers=headers
+    )
+
+    def test_no_auth(self):
+        assert self.no_auth.status_code == 401
+
+    def test_missing_item(self):
+        assert self.missing.status_code == 404
+
+    def test_not_an_image(self):
+        assert self.not_an_image.status_code == 415
+
+def _upload_app(max_bytes: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        upload = await StreamedUpload(request, "file", max_bytes).open()
+        size = 0
+        async for chunk in upload.chunks():
+            size += len(chunk)
+        return {"filename": upload.filename, "type": upload.content_type, "size": size}
+
+    return app
+
+class TestStreamedUpload:
+    client = TestClient(_upload_app(1024))
+
+    def test_reads_file_part(self):
+        response = self.client.post(
+            "/upload",
+            data={"caption": "before the file"},
+            files={"file": ("a.png", b"x" * 1000, "image/png")}
+        )
+        assert response.json() == {"filename": "a.png", "type": "image/png", "size": 1000}
+
+    def test_too_large(self):
+        response = self.client.post(
+            "/upload", files={"file": ("a.png", b"x" * 2000, "image/png")}
+        )
+        assert response.status_code == 413
+
+    def test_missing_field(self):
+        response = self.client.post(
+            "/upload", files={"other": ("a.png", b"x", "image/png")}
+        )
+        assert response.status_code == 400
+
+    def test_not_multipart(self):
+        response = self.client.post("/upload", json={"file": "x"})
+        assert response.status_code == 415
+
+class TestLocalStorage:
+    def test_save_and_reject_escape(self):
+        storage = LocalStorage(tempfile.mkdtemp(), "/media")
+
+        async def chunks():
+            yield b"ab"
+            yield b"cd"
+
+        assert asyncio.run(storage.save("a/b.png", chunks())) == 4
+        with storage.open("a/b.png") as file:
+            assert file.read() == b"abcd"
+        assert storage.url("a/b.png") == "/media/a/b.png"
+        with pytest.raises(ValueError):
+            storage.path("../outside.png")
+
+def _image_app(monkeypatch):
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'media.db')}")
+    migrate(engine)
+    with Session(engine) as session:
+        session.add(Service(
+            title="Plumbing", description="Pipes", image="old.jpg",
+            created_by="admin", last_modified_by="admin",
+            approved_by=None, approved_at=None
+        ))
+        session.commit()
+    storage = LocalStorage(tempfile.mkdtemp(), "/media")
+    monkeypatch.setattr(db, "engine", engine)
+    monkeypatch.setattr(db.settings, "db_async", False)
+    monkeypatch.setattr(image_utils, "storage", storage)
+    monkeypatch.setattr(
+        image_utils.settings, "image_variant_widths", {"small": 4, "large": 64}
+    )
+
+    app = FastAPI()
+
+    @app.post("/services/{id}/image")
+    async def upload(id: int, request: Request):
+        with Session(engine) as session:
+            url = await image_utils.upload_image(request, session, "services", id)
+        return {"image": url}
+
+    return TestClient(app), engine, storage
+
+def _run_variant_jobs(engine):
+    with Session(engine) as session:
+        jobs = session.exec(
+            select(Job).where(Job.kind == "image.variants", Job.status == "pending")
+        ).all()
+    for job in jobs:
+        job_queue.run_job(job.id)
+
+class TestVariants:
+    def test_upload_then_variants(self, monkeypatch):
+        client, engine, storage = _image_app(monkeypatch)
+        response = client.post(
+            "/services/1/image", files={"file": ("a.png", png(16, 8), "image/png")}
+        )
+        url = response.json()["image"]
+        assert url.startswith("/media/services/1/") and url.endswith(".png")
+
+        # The variants are a job; run it here instead of on a worker
+        with Session(engine) as session:
+            jobs = session.exec(select(Job).where(Job.kind == "image.variants")).all()
+            assert session.get(Service, 1).image_variants is None
+        assert len(jobs) == 1
+        job_queue.run_job(jobs[0].id)
+
+        with Session(engine) as session:
+            service = session.get(Service, 1)
+        assert service.image == url
+        assert set(service.image_variants) == {"small", "large"}
+        # Never larger than the original, so the large variant is the original
+        assert service.image_variants["large"] == url
+        small = service.image_variants["small"]
+        assert small != url
+        with Image.open(storage.path(small.removeprefix("/media/"))) as image:
+            assert image.size == (4, 2)
+
+    def test_rejects_bytes_that_are_not_an_image(self, monkeypatch):
+        client, engine, storage = _image_app(monkeypatch)
+        response = client.post(
+            "/services/1/image", files={"file": ("a.png", b"<html>", "image/png")}
+        )
+        assert response.status_code == 415
+        assert not any(path.is_file() for path in storage.root.rglob("*"))
+        with Session(engine) as session:
+            assert session.get(Service, 1).image == "old.jpg"
+
+    def test_replacing_deletes_old_files(self, monkeypatch):
+        client, engine, storage = _image_app(monkeypatch)
+        first = client.post(
+            "/services/1/image", files={"file": ("a.png", png(16, 8), "image/png")}
+        ).json()["image"]
+        _run_variant_jobs(engine)
+        with Session(engine) as session:
+            old_files = {
+                storage.path(storage.key(url))
+                for url in session.get(Service, 1).image_variants.values()
+            }
+        assert len(old_files) == 2 and all(path.exists() for path in old_files)
+
+        second = client.post(
+            "/services/1/image", files={"file": ("b.png", png(16, 8), "image/png")}
+        ).json()["image"]
+        assert second != first
+        assert not any(path.exists() for path in old_files)
+        assert storage.path(storage.key(second)).exists()
@@ -20,6 +20,13 @@ class TestServices:
         "is_admin": False
     })
 
+    by_username = client.get(f"{BASE_URL}/api/users/admin")
+    cached = client.get(f"{BASE_URL}/api/users/admin")
+
     def test_no_auth(self):
         assert self.no_auth.status_code == 401
+
+    def test_by_username(self):
+        assert self.by_username.json()["data"] == {"username": "admin", "is_admin": True}
+        assert self.cached.json() == self.by_username.json()
     
\ No newline at end of file
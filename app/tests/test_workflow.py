@@ -0,0 +1,92 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.project import Project
+from app.models.service import Service
+from app.models.user import User
+# Registers the listing warm-up jobs the writes queue
+import app.routes.projects, app.routes.services
+from app.utils.workflow_utils import approve_content, edit_content
+
+def setup_db():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(username="admin", hashed_password="", is_admin=True))
+        session.add(User(username="editor", hashed_password=""))
+        session.add(Service(
+            title="Service", description="Description", image="image",
+            is_published=True, created_by="editor", last_modified_by="editor"
+        ))
+        session.add(Project(
+            project_image="image", category_id=1, created_by="editor",
+            last_modified_by="editor"
+        ))
+        session.commit()
+    return engine
+
+def count_statements(engine, fn, *args):
+    statements = []
+    listener = lambda conn, cursor, statement, *rest: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        with Session(engine) as session:
+            result = fn(session, *args)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, statements
+
+class TestEditContent:
+    def test_editor_edit_queries(self):
+        engine = setup_db()
+        result, statements = count_statements(
+            engine, edit_content, Service, Service.id, 1,
+            {"title": "Renamed"}, "editor"
+        )
+        # SELECT service, SELECT user, UPDATE, INSERT into the change log,
+        # then DELETE and INSERT ... SELECT to refresh the published snapshot
+        # and INSERT of the follow-up jobs
+        assert result == (True, False)
+        assert len(statements) == 7
+        with Session(engine) as session:
+            service = session.get(Service, 1)
+            assert service.title == "Renamed"
+            assert not service.is_published
+
+    def test_admin_edit_is_approved_in_one_write(self):
+        engine = setup_db()
+        result, statements = count_statements(
+            engine, edit_content, Project, Project.project_id, 1,
+            {"category_id": 2}, "admin"
+        )
+        assert result == (False, True)
+        assert len(statements) == 7
+        with Session(engine) as session:
+            project = session.get(Project, 1)
+            assert project.is_published
+            assert project.approved_by == "admin"
+            assert project.category_id == 2
+
+    def test_missing_item(self):
+        engine = setup_db()
+        with Session(engine) as session, pytest.raises(HTTPException) as e:
+            edit_content(session, Service, Service.id, 99, {}, "editor")
+        assert e.value.status_code == 404
+
+class TestApproveContent:
+    def test_approve_queries(self):
+        engine = setup_db()
+        _, statements = count_statements(
+            engine, approve_content, Project, Project.project_id, 1, "admin"
+        )
+        assert len(statements) == 7
+        with Session(engine) as session:
+            assert session.get(Project, 1).is_published
+
+    def test_non_admin_cannot_approve(self):
+        engine = setup_db()
+        with Session(engine) as session, pytest.raises(HTTPException) as e:
+            approve_content(session, Service, Service.id, 1, "editor")
+        assert e.value.status_code == 403
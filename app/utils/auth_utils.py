@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
@@ -9,14 +10,51 @@ from sqlmodel import Session
 from app.config import settings
 from app import db
 from app.models.user import User
+from app.utils.executor_utils import BoundedExecutor, ExecutorSaturated
+from app.utils.revocation_utils import (
+    DatabaseRevocationStore,
+    MemoryRevocationStore,
+    RevocationSet,
+    TokenRevocations,
+)
+from app.utils.token_utils import TokenVersionCache
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/api/auth/login", auto_error=False
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+token_versions = TokenVersionCache(settings.token_version_refresh_seconds)
+
+token_revocations = TokenRevocations(
+    MemoryRevocationStore()
+    if settings.token_revocation_store == "memory"
+    else DatabaseRevocationStore(),
+    settings.token_revocation_sync_seconds,
+    RevocationSet(max_entries=settings.token_revocation_max_entries),
+)
+
+# Pinning min/max rounds to the configured cost makes passlib flag hashes made
+# with any other cost as needing an update, which drives rehash-on-login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+# bcrypt releases the GIL while hashing, so a small dedicated thread pool
+# gives real parallelism without tying up the shared request threadpool
+password_executor = BoundedExecutor(
+    "password",
+    settings.password_hash_workers,
+    settings.password_hash_queue_size,
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -24,14 +62,39 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_password_job(fn, *args):
+    try:
+        return await password_executor.run(fn, *args)
+    except ExecutorSaturated:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Too many concurrent password operations, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+async def verify_and_update_password(plain_password, hashed_password):
+    return await run_password_job(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+async def hash_password(password):
+    return await run_password_job(get_password_hash, password)
+
+def token_claims(user: User) -> dict:
+    return {
+        "sub": user.username,
+        "is_admin": bool(user.is_admin),
+        "ver": user.token_version
+    }
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme), 
     session: Session = Depends(db.get_session)
 ):
@@ -47,13 +110,55 @@ def get_current_user(
         
     except InvalidTokenError: 
         raise credentials_exception
+
+    if token_revocations.is_stale():
+        await db.run(session, token_revocations.sync)
+    if "jti" in payload:
+        if token_revocations.is_evicted(payload["exp"]):
+            revoked = await db.run(session, token_revocations.lookup, payload["jti"])
+        else:
+            revoked = token_revocations.is_revoked(payload["jti"], payload["exp"])
+        if revoked:
+            raise credentials_exception
+
+    # Trust the role claims until expiry, as long as the user still exists
+    # and their token version has not been bumped since the token was issued
+    if settings.auth_stateless and "ver" in payload and "is_admin" in payload:
+        if token_versions.is_stale():
+            await db.run(session, token_versions.refresh)
+        if not token_versions.is_current(username, payload["ver"]):
+            # The snapshot may predate the user or their latest version, so
+            # the row has the last word before the token is turned away
+            user = await db.run(session, Session.get, User, username)
+            if user is None or user.token_version != payload["ver"]:
+                raise credentials_exception
+            token_versions.remember(username, user.token_version)
+            return user
+        return User(
+            username=username,
+            hashed_password="",
+            is_admin=payload["is_admin"],
+            token_version=payload["ver"]
+        )
     
-    user = session.get(User, username)
+    user = await db.run(session, Session.get, User, username)
     if user is None:
         raise credentials_exception
     return user
 
-def admin_check(user: User = Depends(get_current_user)):
+async def admin_check(user: User = Depends(get_current_user)):
     if not user.is_admin:
         raise HTTPException(status.HTTP_403_FORBIDDEN, "Admins only allowed")
-    
\ No newline at end of file
+    return user
+    
+
+async def optional_admin(
+    token: str | None = Depends(optional_oauth2_scheme),
+    session: Session = Depends(db.get_session)
+) -> User | None:
+    # For public routes that show admins more than anyone else. Anonymous
+    # requests and non-admins get None; a bad token is still rejected.
+    if token is None:
+        return None
+    user = await get_current_user(token, session)
+    return user if user.is_admin else None
@@ -0,0 +1,299 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import HTTPException, Response, status
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.models.bulk import BulkApproveInput, BulkItemResult
+from app.models.user import User
+from app.utils.change_utils import NAMESPACES, record_change
+from app.utils.publish_utils import content_changed
+
+BulkMode = Literal["atomic", "best_effort"]
+
+def check_batch_size(size: int):
+    if size == 0:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Batch is empty")
+    if size > settings.bulk_max_items:
+        raise HTTPException(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            f"Batch exceeds the limit of {settings.bulk_max_items} items"
+        )
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+class BulkResults:
+    def __init__(self, size: int):
+        self.items: list[BulkItemResult | None] = [None] * size
+
+    def ok(self, index: int, id: int):
+        self.items[index] = BulkItemResult(index=index, id=id, success=True)
+
+    def fail(self, index: int, error: str, id: int | None = None):
+        self.items[index] = BulkItemResult(
+            index=index, id=id, success=False, error=error
+        )
+
+    @property
+    def succeeded_ids(self) -> list[int]:
+        return [item.id for item in self.items if item is not None and item.success]
+
+    @property
+    def failed(self) -> bool:
+        return any(item is not None and not item.success for item in self.items)
+
+    def skip_pending(self):
+        # In atomic mode a single failure means the valid items are not applied
+        for index, item in enumerate(self.items):
+            if item is None or item.success:
+                self.fail(
+                    index,
+                    "Not applied because another item in the batch failed",
+                    item.id if item else None
+                )
+
+def bulk_response(
+    response: Response,
+    results: BulkResults,
+    mode: BulkMode,
+    action: str,
+):
+    if results.failed and mode == "atomic":
+        response.status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+        message = f"No items {action}, the batch contained invalid items"
+    elif results.failed:
+        message = f"Valid items {action}, some items failed"
+    else:
+        message = f"All items {action} successfully"
+    return {
+        "success": not results.failed,
+        "message": message,
+        "data": results.items
+    }
+
+class MissingReferences:
+    # Foreign key values in a batch that point at no row, found with one IN
+    # query per foreign key so bad items fail on their own instead of taking
+    # the whole batch down with an IntegrityError
+    def __init__(self, session: Session, model, rows: list[dict]):
+        self.missing = {}
+        for foreign_key in model.__table__.foreign_keys:
+            name = foreign_key.parent.name
+            values = {row[name] for row in rows if row.get(name) is not None}
+            if values:
+                found = set(session.exec(
+                    select(foreign_key.column).where(foreign_key.column.in_(values))
+                ).all())
+                self.missing[name] = (foreign_key.column.table.name, values - found)
+
+    def error(self, row: dict) -> str | None:
+        for name, (table, missing) in self.missing.items():
+            if row.get(name) in missing:
+                return f"{table.capitalize()} {row[name]} does not exist"
+        return None
+
+@contextmanager
+def batch_write(session: Session):
+    # Runs the batch's writes and commits them
+    try:
+        yield
+        session.commit()
+    except IntegrityError:
+        # A referenced row was deleted after the batch was checked
+        session.rollback()
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            "The batch conflicts with a concurrent change, retry it"
+        )
+
+def bulk_create(session: Session, model, pk, items: list[dict], mode: BulkMode):
+    results = BulkResults(len(items))
+    rows = []
+    for index, item in enumerate(items):
+        try:
+            record = model.model_validate(item)
+        except ValidationError as e:
+            results.fail(index, validation_message(e))
+            continue
+        rows.append((index, record.model_dump(exclude={pk.key})))
+
+    references = MissingReferences(session, model, [row for _, row in rows])
+    checked = []
+    for index, row in rows:
+        error = references.error(row)
+        if error is not None:
+            results.fail(index, error)
+        else:
+            checked.append((index, row))
+    rows = checked
+
+    if results.failed and mode == "atomic":
+        results.skip_pending()
+        return results
+    if rows:
+        # One multi-row INSERT ... RETURNING for the whole batch
+        with batch_write(session):
+            ids = session.scalars(
+                insert(model).returning(pk, sort_by_parameter_order=True),
+                [row for _, row in rows]
+            ).all()
+            for (_, row), id in zip(rows, ids):
+                record_change(session, model, id, "created", row["is_published"])
+            content_changed(
+                session, NAMESPACES[model], ids,
+                any(row["is_published"] for _, row in rows)
+            )
+        for (index, _), id in zip(rows, ids):
+            results.ok(index, id)
+    return results
+
+def bulk_update(
+    session: Session,
+    model,
+    pk,
+    update_model,
+    items: list[dict],
+    mode: BulkMode,
+):
+    results = BulkResults(len(items))
+    updates = []
+    for index, item in enumerate(items):
+        try:
+            updates.append((index, update_model.model_validate(item)))
+        except ValidationError as e:
+            results.fail(index, validation_message(e))
+
+    ids = {changes.id for _, changes in updates}
+    existing = dict(session.exec(
+        select(pk, model.is_published).where(pk.in_(ids))
+    ).all()) if ids else {}
+    usernames = {changes.last_modified_by for _, changes in updates}
+    editors = {
+        user.username: user
+        for user in session.exec(select(User).where(User.username.in_(usernames)))
+    } if usernames else {}
+
+    references = MissingReferences(
+        session, model, [changes.model_dump(exclude_unset=True) for _, changes in updates]
+    )
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    published_changed = False
+    for index, changes in updates:
+        if changes.id not in existing:
+            results.fail(index, f"{model.__name__} not found", changes.id)
+            continue
+        editor = editors.get(changes.last_modified_by)
+        if editor is None:
+            results.fail(index, "User does not exist", changes.id)
+            continue
+        error = references.error(changes.model_dump(exclude_unset=True))
+        if error is not None:
+            results.fail(index, error, changes.id)
+            continue
+        # Same rules as the single-item edit: edits by editors unpublish the
+        # item until approved, edits by admins are approved immediately
+        row = changes.model_dump(exclude_unset=True, exclude={"id"})
+        row.update({pk.key: changes.id, "is_published": bool(editor.is_admin)})
+        row["updated_at"] = now
+        if editor.is_admin:
+            row.update(approved_by=editor.username, approved_at=datetime.now())
+        public = existing[changes.id] or bool(editor.is_admin)
+        rows.append((index, row, public))
+        published_changed |= public
+
+    if results.failed and mode == "atomic":
+        results.skip_pending()
+        return results
+    if rows:
+        # ORM bulk UPDATE by primary key, batched into executemany calls
+        with batch_write(session):
+            session.execute(update(model), [row for _, row, _ in rows])
+            for _, row, public in rows:
+                record_change(session, model, row[pk.key], "updated", public)
+            content_changed(
+                session, NAMESPACES[model], [row[pk.key] for _, row, _ in rows],
+                published_changed
+            )
+        for index, row, _ in rows:
+            results.ok(index, row[pk.key])
+    return results
+
+def bulk_approve(
+    session: Session,
+    model,
+    pk,
+    approval: BulkApproveInput,
+    mode: BulkMode,
+):
+    approver = session.get(User, approval.approved_by)
+    if not approver:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User does not exist")
+    if not approver.is_admin:
+        raise HTTPException(
+            status.HTTP_403_FORBIDDEN,
+            "User not permitted to approve"
+        )
+
+    results = BulkResults(len(approval.ids))
+    found = set(session.exec(select(pk).where(pk.in_(approval.ids))).all())
+    for index, id in enumerate(approval.ids):
+        if id in found:
+            results.ok(index, id)
+        else:
+            results.fail(index, f"{model.__name__} not found", id)
+
+    if results.failed and mode == "atomic":
+        results.skip_pending()
+        return results
+    if found:
+        session.execute(
+            update(model)
+            .where(pk.in_(found))
+            .values(
+                is_published=True,
+                approved_by=approver.username,
+                last_modified_by=approver.username,
+                approved_at=datetime.now(),
+                updated_at=datetime.now(timezone.utc)
+            )
+        )
+        for id in found:
+            record_change(session, model, id, "approved", True)
+        content_changed(session, NAMESPACES[model], sorted(found), True)
+        session.commit()
+    return results
+
+def bulk_delete(session: Session, model, pk, ids: list[int], mode: BulkMode):
+    results = BulkResults(len(ids))
+    existing = dict(session.exec(
+        select(pk, model.is_published).where(pk.in_(ids))
+    ).all())
+    for index, id in enumerate(ids):
+        if id in existing:
+            results.ok(index, id)
+        else:
+            results.fail(index, f"{model.__name__} not found", id)
+
+    if results.failed and mode == "atomic":
+        results.skip_pending()
+        return results
+    if existing:
+        session.execute(delete(model).where(pk.in_(existing)))
+        for id, was_published in existing.items():
+            record_change(session, model, id, "deleted", was_published)
+        content_changed(
+            session, NAMESPACES[model], list(existing), any(existing.values())
+        )
+        session.commit()
+    return results
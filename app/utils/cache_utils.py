@@ -0,0 +1,260 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class CacheBackend:
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float):
+        raise NotImplementedError
+
+    def get_many(self, keys: list[str]) -> list:
+        return [self.get(key) for key in keys]
+
+    def delete(self, *keys: str):
+        raise NotImplementedError
+
+class InMemoryBackend(CacheBackend):
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or (entry[0] and entry[0] < time.monotonic()):
+                return None
+            return json.loads(entry[1])
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._values[key] = (expires_at, json.dumps(value))
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+class RedisBackend(CacheBackend):
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        value = self._client.get(key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value, ttl: float):
+        self._client.set(key, json.dumps(value), ex=max(int(ttl), 1) if ttl else None)
+
+    def get_many(self, keys: list[str]) -> list:
+        return [
+            None if value is None else json.loads(value)
+            for value in self._client.mget(keys)
+        ]
+
+    def delete(self, *keys: str):
+        if keys:
+            self._client.delete(*keys)
+
+# Rendered listings keyed by the version of the data they were rendered
+# from: the newest change-log sequence number of the namespaces a listing
+# reads. The version is read from the database, so every worker agrees on it
+# and sees a write as soon as it commits. Entries for older versions are
+# never asked for again and age out of the cache.
+class ContentCache:
+    def __init__(
+        self,
+        local: TTLCache,
+        shared: CacheBackend | None = None,
+        enabled: bool = True,
+    ):
+        self.local = local
+        self.shared = shared
+        self.enabled = enabled
+        self.shared_stats = CacheStats()
+
+    def get(self, namespace: str, version: int, key):
+        if not self.enabled:
+            return None
+        cache_key = f"{namespace}:{version}:{key}"
+        value = self.local.get(cache_key)
+        if value is not None:
+            return value
+        if self.shared is not None:
+            value = self.shared.get(cache_key)
+            if value is not None:
+                self.shared_stats.hits += 1
+                self.local.set(cache_key, value)
+                return value
+            self.shared_stats.misses += 1
+        return None
+
+    def set(self, namespace: str, version: int, key, value):
+        if not self.enabled:
+            return
+        cache_key = f"{namespace}:{version}:{key}"
+        self.local.set(cache_key, value)
+        if self.shared is not None:
+            self.shared.set(cache_key, value, self.local.ttl)
+
+    def read_through(self, namespace: str, version: int, key, loader):
+        value = self.get(namespace, version, key)
+        if value is None:
+            value = jsonable_encoder(loader())
+            self.set(namespace, version, key, value)
+        return value
+
+    def stats(self):
+        stats = {"local": self.local.stats.as_dict(), "entries": len(self.local)}
+        if self.shared is not None:
+            stats["shared"] = self.shared_stats.as_dict()
+        return stats
+
+# Single rows by id, for lookups that would otherwise go to the database once
+# per item. Content rows are keyed by the version of the data they were read
+# at, like the listings, so a write moves every worker and replica on to new
+# keys. Others are keyed by id alone, and writes invalidate the ids they
+# touched; with a shared backend the rows are kept only there, so an
+# invalidation reaches every worker at once.
+class ItemCache:
+    def __init__(
+        self,
+        local: TTLCache,
+        shared: CacheBackend | None = None,
+        enabled: bool = True,
+    ):
+        self.local = local
+        self.shared = shared
+        self.enabled = enabled
+        self.shared_stats = CacheStats()
+
+    def _key(self, namespace: str, id, version: int | None = None) -> str:
+        if version is None:
+            return f"item:{namespace}:{id}"
+        return f"item:{namespace}:{version}:{id}"
+
+    def get_many(self, namespace: str, ids: list, version: int | None = None) -> dict:
+        if not self.enabled or not ids:
+            return {}
+        keys = [self._key(namespace, id, version) for id in ids]
+        if self.shared is not None:
+            values = self.shared.get_many(keys)
+            found = {id: value for id, value in zip(ids, values) if value is not None}
+            self.shared_stats.hits += len(found)
+            self.shared_stats.misses += len(ids) - len(found)
+            return found
+        found = {}
+        for id, key in zip(ids, keys):
+            value = self.local.get(key)
+            if value is not None:
+                found[id] = value
+        return found
+
+    def set_many(self, namespace: str, values: dict, version: int | None = None):
+        if not self.enabled:
+            return
+        for id, value in values.items():
+            key = self._key(namespace, id, version)
+            value = jsonable_encoder(value)
+            if self.shared is not None:
+                self.shared.set(key, value, self.local.ttl)
+            else:
+                self.local.set(key, value)
+
+    def invalidate(self, namespace: str, ids):
+        keys = [self._key(namespace, id) for id in ids]
+        if self.shared is not None:
+            self.shared.delete(*keys)
+        else:
+            for key in keys:
+                self.local.delete(key)
+
+    def stats(self):
+        if self.shared is not None:
+            return {"shared": self.shared_stats.as_dict()}
+        return {"local": self.local.stats.as_dict(), "entries": len(self.local)}
+
+def cache_key(*parts) -> str:
+    return "|".join("" if part is None else str(part) for part in parts)
+
+def page_cache_key(page, *filters) -> str:
+    return cache_key(page.limit, page.cursor, page.sort, page.order, *filters)
+
+shared_cache = RedisBackend(settings.cache_redis_url) if settings.cache_redis_url else None
+
+content_cache = ContentCache(
+    TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds),
+    shared_cache,
+    settings.cache_enabled,
+)
+
+item_cache = ItemCache(
+    TTLCache(settings.cache_max_entries, settings.cache_ttl_seconds),
+    shared_cache,
+    settings.cache_enabled,
+)
@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, event, func, text
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app import db
+from app.config import settings
+from app.models.category import Category
+from app.models.change import Change, ChangeHorizon
+from app.models.job import utcnow
+from app.models.project import Project
+from app.models.published import PublishedProject, PublishedService
+from app.models.service import Service
+from app.utils.job_utils import job_queue
+from app.utils.json_utils import dumps
+from app.utils.snapshot_utils import refresh_snapshots
+
+NAMESPACES = {Service: "services", Project: "projects", Category: "categories"}
+
+# What the feed returns for each namespace: the public rows, with the
+# primary key to look them up by
+FEED_MODELS = {
+    "services": (PublishedService, PublishedService.id),
+    "projects": (PublishedProject, PublishedProject.project_id),
+    "categories": (Category, Category.category_id),
+}
+
+# The namespaces whose changes can alter each public listing
+LISTING_SOURCES = {
+    "services": ["services"],
+    "projects": ["projects", "categories"],
+    "categories": ["categories"],
+}
+
+# Arbitrary key for the Postgres advisory lock that orders change-log writes.
+# Sequence numbers are handed out at insert time but become visible at
+# commit; holding the lock from the insert until commit keeps the two in the
+# same order, so a reader never skips a number that commits late. The price
+# is that content writes commit one at a time. To keep that window short the
+# log entries are inserted last, just before the commit, once the write and
+# its snapshot rows are flushed, and the lock waits on nothing but the commit
+# itself. benchmarks/bench_change_log.py measures the throughput this allows.
+LOCK_KEY = 7_415_291
+
+class PruneSchedule:
+    # Pruning is queued by a write at most once per interval per process
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def due(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next:
+                return False
+            self._next = now + self.interval_seconds
+            return True
+
+prune_schedule = PruneSchedule(settings.change_prune_interval_seconds)
+
+def record_change(session: Session, model, id: int, action: str, public: bool):
+    # Part of the caller's transaction, so the log entry and the refreshed
+    # snapshot rows commit with the write or not at all. The entry is held
+    # back until the commit, see LOCK_KEY.
+    changed = session.info.get("changed")
+    if changed is None:
+        changed = session.info["changed"] = set()
+        if prune_schedule.due():
+            job_queue.add(session, ("changes.prune", {}))
+    changed.add((NAMESPACES[model], id))
+    session.info.setdefault("changes", []).append(Change(
+        namespace=NAMESPACES[model], item_id=id, action=action, public=public
+    ))
+
+class ChangeNotifier:
+    # Wakes change streams in this process as soon as a change commits.
+    # Changes committed by other processes are picked up when the streams
+    # poll, every change_stream_poll_seconds.
+    def __init__(self):
+        self.version = 0
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+
+    def notify(self):
+        # Called from the event loop, the threadpool and job workers alike
+        with self._lock:
+            self.version += 1
+            waiters = list(self._waiters)
+        for loop, wake in waiters:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                # The loop has closed
+                pass
+
+    async def wait(self, seen: int, timeout: float) -> bool:
+        # False if nothing was committed since version `seen` within timeout
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self.version != seen:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+change_notifier = ChangeNotifier()
+
+@event.listens_for(OrmSession, "before_commit")
+def _refresh_changed(session):
+    changed = session.info.get("changed")
+    if changed:
+        # The snapshots are selected from the base tables, which must hold
+        # the pending writes first
+        session.flush()
+        refresh_snapshots(session, changed)
+        # Every row the write touches is locked by now, so a transaction
+        # waiting on the lock holds nothing the holder still needs
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY}
+            )
+        session.add_all(session.info.pop("changes", []))
+        session.flush()
+
+@event.listens_for(OrmSession, "after_commit")
+def _changes_committed(session):
+    if session.info.pop("changed", None):
+        change_notifier.notify()
+
+@event.listens_for(OrmSession, "after_rollback")
+def _changes_rolled_back(session):
+    session.info.pop("changed", None)
+    session.info.pop("changes", None)
+
+def latest_seq(session: Session) -> int:
+    return session.exec(select(func.coalesce(func.max(Change.seq), 0))).one()
+
+def change_horizon(session: Session) -> int:
+    # Every change after this sequence number is still in the log
+    horizon = session.get(ChangeHorizon, 1)
+    return horizon.seq if horizon is not None else 0
+
+@job_queue.register("changes.prune")
+def prune_changes(session: Session):
+    # Drops the changes older than the retention period, but for the newest
+    # of each namespace, which the listing versions are read from
+    cutoff = utcnow() - timedelta(days=settings.change_retention_days)
+    horizon = session.exec(
+        select(func.max(Change.seq)).where(Change.changed_at < cutoff)
+    ).one()
+    if horizon is None or horizon <= change_horizon(session):
+        return
+    newest = select(func.max(Change.seq)).group_by(Change.namespace)
+    session.execute(
+        delete(Change).where(Change.seq <= horizon, Change.seq.notin_(newest))
+    )
+    session.merge(ChangeHorizon(id=1, seq=horizon))
+    session.commit()
+
+def listing_version(session: Session, namespace: str) -> tuple[int, float | None]:
+    # The newest change to anything the listing reads, as its sequence number
+    # and the time it was made. Every worker reads the same answer, unlike a
+    # counter kept in process.
+    seq, changed_at = 0, None
+    for source in LISTING_SOURCES[namespace]:
+        # One probe of ix_change_namespace_seq per namespace
+        latest = session.exec(
+            select(Change.seq, Change.changed_at)
+            .where(Change.namespace == source)
+            .order_by(Change.seq.desc())
+            .limit(1)
+        ).first()
+        if latest is not None and latest[0] > seq:
+            seq, changed_at = latest
+    if changed_at is None:
+        return seq, None
+    return seq, changed_at.replace(tzinfo=timezone.utc).timestamp()
+
+def load_changes(session: Session, since: int, limit: int):
+    # Public changes after `since`, each item once with its newest change and
+    # its current public row. The row is None for a tombstone: the item was
+    # deleted, or is no longer published.
+    changes = session.exec(
+        select(Change)
+        .where(Change.public == True, Change.seq > since)
+        .order_by(Change.seq)
+        .limit(limit + 1)
+    ).all()
+    # Read after the changes, so a prune that removed some of them is seen
+    horizon = change_horizon(session)
+    if since < horizon:
+        raise HTTPException(
+            status.HTTP_410_GONE,
+            f"Changes up to {horizon} are no longer kept, reload the "
+            f"listings and follow the changes after {latest_seq(session)}"
+        )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    latest = {}
+    for change in changes:
+        key = (change.namespace, change.item_id)
+        latest.pop(key, None)
+        latest[key] = change
+
+    ids = {}
+    for namespace, id in latest:
+        ids.setdefault(namespace, []).append(id)
+    current = {}
+    # One IN query per namespace
+    for namespace, namespace_ids in ids.items():
+        model, pk = FEED_MODELS[namespace]
+        for item in session.exec(select(model).where(pk.in_(namespace_ids))):
+            current[(namespace, getattr(item, pk.key))] = item
+
+    entries = [
+        {
+            "seq": change.seq,
+            "namespace": change.namespace,
+            "id": change.item_id,
+            "action": change.action,
+            "data": current.get(key)
+        }
+        for key, change in latest.items()
+    ]
+    return entries, changes[-1].seq if changes else since, has_more
+
+def change_event(entry: dict) -> str:
+    return f"id: {entry['seq']}\nevent: change\ndata: {dumps(entry).decode()}\n\n"
+
+async def change_events(since: int | None):
+    # Server-Sent Events for the public changes after `since`, or from now on
+    # if it is None. Each event id is a sequence number, so a reconnecting
+    # EventSource resumes from its Last-Event-ID.
+    if since is None:
+        since = await db.run_detached(latest_seq)
+    yield f"retry: {int(settings.change_stream_poll_seconds * 1000)}\n\n"
+    while True:
+        seen = change_notifier.version
+        try:
+            entries, since, has_more = await db.run_detached(
+                load_changes, since, settings.page_size_max
+            )
+        except HTTPException:
+            # Fell behind the retention period: the client reloads what it
+            # shows and the stream carries on from the newest change
+            since = await db.run_detached(latest_seq)
+            yield f"event: reset\ndata: {dumps({'next_since': since}).decode()}\n\n"
+            continue
+        for entry in entries:
+            yield change_event(entry)
+        if has_more:
+            continue
+        if not await change_notifier.wait(seen, settings.change_stream_poll_seconds):
+            # Keeps proxies from timing out an idle connection
+            yield ": keepalive\n\n"
@@ -0,0 +1,87 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+from app import db
+from app.utils.cache_utils import content_cache
+from app.utils.change_utils import listing_version
+from app.utils.json_utils import dumps
+
+def make_etag(*parts) -> str:
+    raw = "|".join(str(part) for part in parts).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+def is_not_modified(request: Request, etag: str, modified_at: float | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as required for GET validators
+        candidates = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and modified_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(modified_at) <= since.timestamp()
+    return False
+
+def conditional_headers(etag: str, modified_at: float | None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    # Unknown until the first change is logged
+    if modified_at is not None:
+        headers["Last-Modified"] = formatdate(modified_at, usegmt=True)
+    return headers
+
+# Listings are cached as the rendered JSON body, so a hit is served without
+# touching the encoder at all. An empty page is cached as an empty body.
+async def cached_listing(
+    request: Request,
+    session,
+    namespace: str,
+    key: str,
+    loader,
+) -> Response:
+    version, modified_at = await db.run(session, listing_version, namespace)
+    etag = make_etag(namespace, version, key)
+    headers = conditional_headers(etag, modified_at)
+    if is_not_modified(request, etag, modified_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = content_cache.get(namespace, version, key)
+    if body is None:
+        version, modified_at, body = await db.run(
+            session, load_listing, namespace, key, loader
+        )
+        headers = conditional_headers(make_etag(namespace, version, key), modified_at)
+    if not body:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def render_page(payload: dict) -> str:
+    # A str rather than bytes so the shared cache tier can store it as JSON
+    return dumps(payload).decode() if payload["data"] else ""
+
+def load_listing(session, namespace: str, key: str, loader):
+    # Renders a listing along with the version read in the same session, so
+    # a replica that lags the primary serves and caches its body under the
+    # older version it has applied, never under the primary's. Under read
+    # committed the version can still move on while the body is read; such
+    # a body goes out tagged with the older version but is not cached.
+    version, modified_at = listing_version(session, namespace)
+    body = render_page(loader(session))
+    if listing_version(session, namespace)[0] == version:
+        content_cache.set(namespace, version, key, body)
+    return version, modified_at, body
+
+def warm_listing(session, namespace: str, key: str, loader):
+    # Fills the cache for one listing ahead of the first request for it
+    version, _ = listing_version(session, namespace)
+    if content_cache.get(namespace, version, key) is None:
+        load_listing(session, namespace, key, loader)
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class ExecutorSaturated(Exception):
+    pass
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.active = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+
+    def _job(self, queued_at: float, fn, args):
+        started_at = time.perf_counter()
+        with self._lock:
+            self.active += 1
+            self.wait_seconds_total += started_at - queued_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.run_seconds_total += time.perf_counter() - started_at
+
+    def submit(self, fn, *args):
+        # Reject instead of queueing without bound once every slot is taken
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ExecutorSaturated(f"{self.name} executor is saturated")
+        with self._lock:
+            self.submitted += 1
+        future = self._executor.submit(self._job, time.perf_counter(), fn, args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self):
+        with self._lock:
+            in_flight = self.submitted - self.completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": in_flight - self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "run_seconds_total": round(self.run_seconds_total, 6)
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+
+from app import db
+from app.config import settings
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+async def _ndjson(batches, columns: list[str]):
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+            for row in rows
+        )
+
+def _csv_value(value):
+    # JSON columns (image variants) as JSON rather than a Python repr
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+async def _csv(batches, columns: list[str]):
+    # One buffer reused for every batch, so only a batch is held at a time
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+def export_response(statement, format: ExportFormat, filename: str):
+    columns = [column.key for column in statement.selected_columns]
+    batches = db.stream(statement, settings.export_batch_size)
+    body = _ndjson(batches, columns) if format == "ndjson" else _csv(batches, columns)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{format}"'
+        }
+    )
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+# Readiness result shared by every probe within the check interval. Only one
+# SELECT 1 is in flight at a time; callers arriving meanwhile wait for it and
+# reuse its result instead of queueing their own.
+class ReadinessProbe:
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.checks = 0
+        self._result: dict | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def result(self) -> dict | None:
+        return self._result
+
+    def mark_down(self, error: str):
+        # For callers that saw the database fail between probes
+        self._result = {"database": False, "error": error, "latency_seconds": 0.0}
+        self._checked_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return (
+            self._result is None
+            or time.monotonic() - self._checked_at >= self.interval_seconds
+        )
+
+    async def check(self, ping, skip: bool = False) -> dict:
+        # skip lets the caller keep the last result, e.g. while the pool is
+        # saturated and a probe would only wait for a connection
+        if not self.is_stale() or (skip and self._result is not None):
+            return self._result
+        async with self._lock:
+            if not self.is_stale():
+                return self._result
+            started_at = time.perf_counter()
+            try:
+                await ping()
+                result = {"database": True}
+            except Exception as e:
+                result = {"database": False, "error": str(e)}
+            result["latency_seconds"] = round(time.perf_counter() - started_at, 6)
+            self._result = result
+            self._checked_at = time.monotonic()
+            self.checks += 1
+        return result
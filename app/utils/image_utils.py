@@ -0,0 +1,140 @@
+import io
+import os
+import uuid
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image
+from sqlmodel import Session
+
+from app import db
+from app.config import settings
+from app.models.project import Project
+from app.models.service import Service
+from app.utils.change_utils import record_change
+from app.utils.job_utils import job_queue
+from app.utils.publish_utils import content_changed
+from app.utils.storage_utils import StorageBackend, storage
+from app.utils.upload_utils import StreamedUpload
+
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+# The model and image field behind each content namespace
+IMAGE_FIELDS = {
+    "services": (Service, "image"),
+    "projects": (Project, "project_image"),
+}
+
+def is_image(storage: StorageBackend, key: str) -> bool:
+    # The declared content type is the client's word; the bytes must parse
+    try:
+        with storage.open(key) as file, Image.open(file) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return False
+    return True
+
+def stored_files(storage: StorageBackend, url: str | None, variants) -> set[str]:
+    urls = {url, *(variants or {}).values()}
+    return {key for url in urls if url and (key := storage.key(url))}
+
+def variant_key(key: str, name: str) -> str:
+    stem, extension = os.path.splitext(key)
+    return f"{stem}-{name}{extension}"
+
+def render_variants(
+    storage: StorageBackend, key: str, widths: dict[str, int]
+) -> dict[str, str]:
+    variants = {}
+    with storage.open(key) as file, Image.open(file) as image:
+        image.load()
+        for name, width in widths.items():
+            # Never upscale; a small original serves as its own variant
+            if image.width <= width:
+                variants[name] = storage.url(key)
+                continue
+            resized = image.copy()
+            resized.thumbnail((width, image.height * width // image.width + 1))
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image.format)
+            storage.write(variant_key(key, name), buffer.getvalue())
+            variants[name] = storage.url(variant_key(key, name))
+    return variants
+
+def _current_item(session: Session, namespace: str, id: int, key: str):
+    # None if the item is gone or a newer upload replaced this image, whose
+    # upload also deleted this one's files
+    model, image_field = IMAGE_FIELDS[namespace]
+    item = session.get(model, id)
+    if item is None or getattr(item, image_field) != storage.url(key):
+        return None
+    return item
+
+@job_queue.register("image.variants")
+def generate_variants(session: Session, namespace: str, id: int, key: str):
+    model, image_field = IMAGE_FIELDS[namespace]
+    if _current_item(session, namespace, id, key) is None:
+        return
+    variants = render_variants(storage, key, settings.image_variant_widths)
+    # Replaced while rendering: the new files would never be cleaned up
+    session.expire_all()
+    item = _current_item(session, namespace, id, key)
+    if item is None:
+        for file in stored_files(storage, None, variants) - {key}:
+            storage.delete(file)
+        return
+    setattr(item, f"{image_field}_variants", variants)
+    session.add(item)
+    record_change(session, model, id, "updated", item.is_published)
+    session.commit()
+
+def _set_image(session: Session, namespace: str, id: int, key: str):
+    model, image_field = IMAGE_FIELDS[namespace]
+    item = session.get(model, id)
+    if item is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"{model.__name__} not found")
+    replaced = stored_files(
+        storage, getattr(item, image_field), getattr(item, f"{image_field}_variants")
+    )
+    setattr(item, image_field, storage.url(key))
+    setattr(item, f"{image_field}_variants", None)
+    session.add(item)
+    record_change(session, model, id, "updated", item.is_published)
+    # Resized off the request path by a job worker
+    content_changed(
+        session, namespace, [id], item.is_published,
+        ("image.variants", {"namespace": namespace, "id": id, "key": key})
+    )
+    session.commit()
+    # Only once nothing points at them any more
+    for file in replaced:
+        storage.delete(file)
+
+async def upload_image(request: Request, session, namespace: str, id: int) -> str:
+    upload = await StreamedUpload(request, "file", settings.upload_max_bytes).open()
+    extension = IMAGE_TYPES.get(upload.content_type)
+    if extension is None:
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            f"Expected an image of type: {', '.join(IMAGE_TYPES)}"
+        )
+    # A fresh key per upload, so cached copies of the old image stay valid
+    key = f"{namespace}/{id}/{uuid.uuid4().hex}{extension}"
+    await storage.save(key, upload.chunks())
+    if not await run_in_threadpool(is_image, storage, key):
+        storage.delete(key)
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "The file is not a readable image"
+        )
+
+    try:
+        await db.run(session, _set_image, namespace, id, key)
+    except BaseException:
+        storage.delete(key)
+        raise
+    return storage.url(key)
@@ -0,0 +1,373 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, func, inspect, update
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app import db
+from app.config import settings
+from app.models.job import Job, utcnow
+from app.utils.metrics_utils import LATENCY_BUCKETS, Histogram
+
+logger = logging.getLogger(__name__)
+
+class JobStats:
+    def __init__(self):
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.wait = Histogram(LATENCY_BUCKETS)
+        self.run = Histogram(LATENCY_BUCKETS)
+
+    def as_dict(self):
+        return {
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "wait_seconds_avg": round(
+                self.wait.sum / self.wait.count, 6
+            ) if self.wait.count else 0.0,
+            "run_seconds_avg": round(
+                self.run.sum / self.run.count, 6
+            ) if self.run.count else 0.0
+        }
+
+# Side effects of write requests, run by a few worker threads after the
+# response has gone out. Every job is a row in the job table before it is
+# queued here, so nothing is lost when the queue is full or the process
+# stops: the poller picks up due retries, jobs that did not fit in the
+# queue, and jobs left behind by a process that went away. Workers claim a
+# job by flipping it from pending to running, so with several processes each
+# job still runs once per attempt.
+class JobQueue:
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        max_attempts: int,
+        retry_seconds: float,
+        poll_seconds: float,
+        orphan_seconds: float,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.orphan_seconds = orphan_seconds
+        self.handlers = {}
+        self.active = 0
+        self.overflowed = 0
+        self._stats: dict[str, JobStats] = {}
+        self._queue = queue.Queue(max_queue)
+        self._queued: set[int] = set()
+        self._retries: list[tuple[float, int]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._running = False
+
+    def register(self, kind: str):
+        # Handlers take the worker's session plus the job's payload as keywords
+        def decorator(fn):
+            self.handlers[kind] = fn
+            return fn
+        return decorator
+
+    def _kind_stats(self, kind: str) -> JobStats:
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats[kind] = JobStats()
+        return stats
+
+    def add(self, session: Session, *jobs: tuple[str, dict]) -> list[Job]:
+        # Part of the caller's transaction, so the jobs commit with the write
+        # that needs them or not at all. They are queued once it commits.
+        for kind, _ in jobs:
+            if kind not in self.handlers:
+                raise ValueError(f"No handler registered for job kind {kind}")
+        rows = [Job(kind=kind, payload=payload) for kind, payload in jobs]
+        session.add_all(rows)
+        session.info.setdefault("jobs", []).extend(
+            (self, kind, row) for (kind, _), row in zip(jobs, rows)
+        )
+        return rows
+
+    def _insert(self, jobs) -> list[int]:
+        # A session of its own, so committing does not expire whatever the
+        # request's session still has to return
+        with Session(db.engine) as session:
+            rows = self.add(session, *jobs)
+            session.flush()
+            ids = [row.id for row in rows]
+            session.commit()
+        return ids
+
+    async def enqueue(self, *jobs: tuple[str, dict]) -> list[int]:
+        # For jobs that belong to no write of the caller's
+        if not jobs:
+            return []
+        return await run_in_threadpool(self._insert, jobs)
+
+    def _committed(self, jobs: list[tuple[str, int]]):
+        with self._lock:
+            for kind, _ in jobs:
+                self._kind_stats(kind).enqueued += 1
+        for _, id in jobs:
+            self._offer(id)
+
+    def _offer(self, id: int):
+        with self._lock:
+            if id in self._queued:
+                return
+            try:
+                self._queue.put_nowait(id)
+            except queue.Full:
+                # Still pending in the table; the poller gets to it later
+                self.overflowed += 1
+                return
+            self._queued.add(id)
+
+    def _claim(self, session: Session, id: int) -> Job | None:
+        claimed = session.execute(
+            update(Job)
+            .where(Job.id == id, Job.status == "pending")
+            .values(status="running", started_at=utcnow(), attempts=Job.attempts + 1)
+        ).rowcount
+        session.commit()
+        return session.get(Job, id) if claimed else None
+
+    def run_job(self, id: int):
+        with Session(db.engine) as session:
+            job = self._claim(session, id)
+            if job is None:
+                return
+            kind = job.kind
+            started = time.perf_counter()
+            waited = (job.started_at - job.run_at).total_seconds()
+            with self._lock:
+                self.active += 1
+            try:
+                handler = self.handlers.get(kind)
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind {kind}")
+                handler(session, **job.payload)
+            except Exception as e:
+                session.rollback()
+                self._failed(session, id, e)
+            else:
+                session.delete(job)
+                session.commit()
+                with self._lock:
+                    self._kind_stats(kind).completed += 1
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    stats = self._kind_stats(kind)
+                    stats.wait.observe(max(waited, 0.0))
+                    stats.run.observe(time.perf_counter() - started)
+
+    def _failed(self, session: Session, id: int, error: Exception):
+        job = session.get(Job, id)
+        kind = job.kind
+        job.last_error = f"{type(error).__name__}: {error}"
+        if job.attempts >= self.max_attempts:
+            logger.error("Job %s (%s) failed for good: %s", id, kind, error)
+            job.status = "failed"
+            retry_in = None
+        else:
+            retry_in = self.retry_seconds * 2 ** (job.attempts - 1)
+            job.status = "pending"
+            job.run_at = utcnow() + timedelta(seconds=retry_in)
+        session.add(job)
+        session.commit()
+        with self._lock:
+            stats = self._kind_stats(kind)
+            if retry_in is None:
+                stats.failed += 1
+            else:
+                stats.retried += 1
+                heapq.heappush(self._retries, (time.monotonic() + retry_in, id))
+        self._wake.set()
+
+    def _work(self):
+        while True:
+            id = self._queue.get()
+            if id is None:
+                return
+            with self._lock:
+                self._queued.discard(id)
+            try:
+                self.run_job(id)
+            except Exception:
+                logger.exception("Job %s could not be run", id)
+
+    def _due_retries(self) -> list[int]:
+        due = []
+        now = time.monotonic()
+        with self._lock:
+            while self._retries and self._retries[0][0] <= now:
+                due.append(heapq.heappop(self._retries)[1])
+        return due
+
+    def recover(self, orphan_seconds: float | None = None) -> list[int]:
+        # Pending jobs nobody has queued, and running jobs whose worker is
+        # presumed gone. Recent pending jobs are left to the process that
+        # created them.
+        if orphan_seconds is None:
+            orphan_seconds = self.orphan_seconds
+        cutoff = utcnow() - timedelta(seconds=orphan_seconds)
+        with Session(db.engine) as session:
+            session.execute(
+                update(Job)
+                .where(Job.status == "running", Job.started_at <= cutoff)
+                .values(status="pending")
+            )
+            session.commit()
+            with self._lock:
+                queued = list(self._queued)
+            statement = select(Job.id).where(
+                Job.status == "pending", Job.run_at <= cutoff
+            )
+            if queued:
+                statement = statement.where(Job.id.notin_(queued))
+            return list(session.exec(
+                statement.order_by(Job.run_at).limit(self.max_queue)
+            ))
+
+    def _poll(self):
+        orphan_seconds = 0.0
+        while self._running:
+            ids = self._due_retries()
+            try:
+                ids += self.recover(orphan_seconds)
+            except Exception:
+                logger.exception("Polling for pending jobs failed")
+            for id in ids:
+                self._offer(id)
+            # Anything pending at startup is fair game; after that only
+            # jobs that have waited longer than orphan_seconds
+            orphan_seconds = self.orphan_seconds
+            with self._lock:
+                next_retry = self._retries[0][0] - time.monotonic() if self._retries else None
+            timeout = self.poll_seconds if next_retry is None else min(
+                self.poll_seconds, max(next_retry, 0.0)
+            )
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-{index}", daemon=True)
+            for index in range(self.workers)
+        ] + [threading.Thread(target=self._poll, name="job-poller", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5):
+        # Jobs still queued stay pending in the table for the next start
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        with self._lock:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._queued.clear()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def status_counts(self, session: Session) -> dict:
+        rows = session.exec(
+            select(Job.status, func.count()).group_by(Job.status)
+        ).all()
+        return {status: count for status, count in rows}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queue.qsize(),
+                "active": self.active,
+                "retries_scheduled": len(self._retries),
+                "overflowed": self.overflowed,
+                "kinds": {
+                    kind: stats.as_dict() for kind, stats in self._stats.items()
+                }
+            }
+
+    def render_metrics(self) -> str:
+        lines = [
+            "# HELP job_queue_depth Jobs waiting in the in-process queue.",
+            "# TYPE job_queue_depth gauge",
+            f"job_queue_depth {self._queue.qsize()}",
+            "# HELP job_active Jobs running.",
+            "# TYPE job_active gauge",
+            f"job_active {self.active}",
+            "# HELP jobs_overflowed_total Jobs left for the poller because the queue was full.",
+            "# TYPE jobs_overflowed_total counter",
+            f"jobs_overflowed_total {self.overflowed}",
+        ]
+        with self._lock:
+            kinds = list(self._stats.items())
+            for name, attribute, help_text in (
+                ("jobs_completed_total", "completed", "Jobs that succeeded."),
+                ("jobs_retried_total", "retried", "Failed attempts scheduled for retry."),
+                ("jobs_failed_total", "failed", "Jobs that ran out of attempts."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [
+                    f'{name}{{kind="{kind}"}} {getattr(stats, attribute)}'
+                    for kind, stats in kinds
+                ]
+            for name, attribute, help_text in (
+                ("job_wait_seconds", "wait", "Time from due to started."),
+                ("job_run_seconds", "run", "Time spent running."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for kind, stats in kinds:
+                    lines += getattr(stats, attribute).render(name, (("kind", kind),))
+        return "\n".join(lines) + "\n"
+
+job_queue = JobQueue(
+    settings.job_workers,
+    settings.job_queue_size,
+    settings.job_max_attempts,
+    settings.job_retry_seconds,
+    settings.job_poll_seconds,
+    settings.job_orphan_seconds,
+)
+
+@event.listens_for(OrmSession, "after_commit")
+def _jobs_committed(session):
+    added = session.info.pop("jobs", None)
+    if not added:
+        return
+    committed = {}
+    for owner, kind, row in added:
+        # The rows are expired by now, but keep their primary key
+        committed.setdefault(owner, []).append((kind, inspect(row).identity[0]))
+    for owner, jobs in committed.items():
+        owner._committed(jobs)
+
+@event.listens_for(OrmSession, "after_rollback")
+def _jobs_rolled_back(session):
+    session.info.pop("jobs", None)
@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+import orjson
+from pydantic import BaseModel
+
+def _default(value):
+    # Called only for what the encoder cannot handle natively
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    # UTC datetimes end in "Z", the way pydantic writes them
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+# Default response class. Handlers that return plain dicts still go through
+# FastAPI's jsonable_encoder first; the hot paths build this directly (or a
+# Response around already rendered bytes) so nothing is encoded twice.
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def page_response(payload: dict, headers: dict | None = None) -> Response:
+    if not payload["data"]:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return FastJSONResponse(payload, headers=headers)
@@ -0,0 +1,192 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        return ", ".join([
+            f"app;dur={total_seconds * 1000:.2f}",
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} queries"',
+            f"pool;dur={self.pool_wait_seconds * 1000:.2f}",
+        ])
+
+# Set by the middleware for the duration of a request. Threadpool and
+# run_sync calls inherit the context, so engine events land on the right one.
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request", default=None
+)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: tuple) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{name}_bucket{_labels(labels, le)} {cumulative}")
+        inf = 'le="+Inf"'
+        lines.append(f"{name}_bucket{_labels(labels, inf)} {self.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(self.sum)}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+class RequestMetrics:
+    def __init__(self):
+        self.durations: dict[tuple, Histogram] = {}
+        self.statements: dict[tuple, Histogram] = {}
+        self.db_seconds: dict[tuple, Histogram] = {}
+        self.pool_wait: dict[tuple, Histogram] = {}
+        self.requests: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _series(family: dict, labels: tuple, buckets: tuple) -> Histogram:
+        histogram = family.get(labels)
+        if histogram is None:
+            histogram = family[labels] = Histogram(buckets)
+        return histogram
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        stats: RequestStats,
+    ):
+        labels = (("method", method), ("route", route))
+        with self._lock:
+            self._series(self.durations, labels, LATENCY_BUCKETS).observe(seconds)
+            self._series(self.statements, labels, COUNT_BUCKETS).observe(
+                stats.statements
+            )
+            self._series(self.db_seconds, labels, LATENCY_BUCKETS).observe(
+                stats.db_seconds
+            )
+            self._series(self.pool_wait, labels, LATENCY_BUCKETS).observe(
+                stats.pool_wait_seconds
+            )
+            key = labels + (("status", str(status_code)),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def render(self, extra: dict[str, tuple[str, str, float]] | None = None) -> str:
+        # extra maps a metric name to (type, help, value) for process-wide
+        # gauges and counters owned by other modules
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP http_requests_total Requests handled, by route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            lines += [
+                f"http_requests_total{_labels(labels)} {count}"
+                for labels, count in self.requests.items()
+            ]
+            for name, help_text, family in (
+                ("http_request_duration_seconds", "Request latency.", self.durations),
+                ("http_request_db_statements", "DB statements per request.", self.statements),
+                ("http_request_db_seconds", "DB time per request.", self.db_seconds),
+                ("http_request_pool_wait_seconds", "Pool checkout wait per request.", self.pool_wait),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, histogram in family.items():
+                    lines += histogram.render(name, labels)
+        for name, (kind, help_text, value) in (extra or {}).items():
+            lines += [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} {kind}",
+                f"{name} {_number(value)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
+
+def record_statement(seconds: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += seconds
+
+def record_pool_wait(seconds: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware so the response body is not
+    # re-streamed through an extra task per request
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.server_timing_enabled:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        stats.server_timing(time.perf_counter() - started_at)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            # The route template keeps label cardinality bounded
+            route = scope.get("route")
+            request_metrics.observe(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code,
+                time.perf_counter() - started_at,
+                stats
+            )
@@ -0,0 +1,146 @@
+import base64
+import json
+from typing import Literal
+
+from fastapi import HTTPException, Query, status
+import sqlalchemy
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+
+from app.config import settings
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = settings.page_size_default,
+        cursor: str | None = None,
+        sort: str | None = None,
+        order: str = "asc",
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.order = order
+
+async def page_params(
+    limit: int = Query(
+        settings.page_size_default, ge=1, le=settings.page_size_max
+    ),
+    cursor: str | None = Query(None),
+    sort: str | None = Query(None),
+    order: Literal["asc", "desc"] = Query("asc"),
+) -> PageParams:
+    return PageParams(limit, cursor, sort, order)
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor")
+    return values
+
+def resolve_sort(model, page: PageParams, sortable: dict[str, str]):
+    sort = page.sort or next(iter(sortable))
+    if sort not in sortable:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Cannot sort by '{sort}', expected one of: {', '.join(sortable)}"
+        )
+    return getattr(model, sortable[sort])
+
+def paginate(
+    session: Session,
+    statement,
+    key_column,
+    page: PageParams,
+    sort_column=None,
+):
+    sort_column = key_column if sort_column is None else sort_column
+    descending = page.order == "desc"
+
+    if page.cursor:
+        sort_value, key_value = decode_cursor(page.cursor)
+        if sort_column is key_column:
+            statement = statement.where(
+                key_column < key_value if descending else key_column > key_value
+            )
+        elif descending:
+            statement = statement.where(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, key_column < key_value)
+            ))
+        else:
+            statement = statement.where(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, key_column > key_value)
+            ))
+
+    order_by = [sort_column.desc() if descending else sort_column.asc()]
+    if sort_column is not key_column:
+        order_by.append(key_column.desc() if descending else key_column.asc())
+
+    # Fetch one extra row to learn whether another page exists
+    rows = session.exec(
+        statement.order_by(*order_by).limit(page.limit + 1)
+    ).all()
+    items = rows[:page.limit]
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        last = items[-1]
+        next_cursor = encode_cursor([
+            getattr(last, sort_column.key),
+            getattr(last, key_column.key)
+        ])
+    return items, {
+        "limit": page.limit,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
+def parse_fields(model, fields: str | None) -> tuple[str, ...] | None:
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(
+        name.strip() for name in fields.split(",") if name.strip()
+    ))
+    allowed = model.__table__.columns.keys()
+    if not names or any(name not in allowed for name in names):
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Invalid fields, expected a comma-separated list of: "
+            f"{', '.join(allowed)}"
+        )
+    return names
+
+def list_page(
+    session: Session,
+    model,
+    page: PageParams,
+    sortable: dict[str, str],
+    filters: list | None = None,
+    fields: tuple[str, ...] | None = None,
+):
+    key_column = getattr(model, next(iter(sortable.values())))
+    sort_column = resolve_sort(model, page, sortable)
+    if fields is None:
+        statement = select(model)
+    else:
+        # Only the requested columns plus what the cursor needs. A plain
+        # SQLAlchemy select keeps rows as rows even for a single column.
+        selected = dict.fromkeys((key_column.key, sort_column.key, *fields))
+        statement = sqlalchemy.select(*(getattr(model, name) for name in selected))
+    for condition in filters or []:
+        statement = statement.where(condition)
+    items, pagination = paginate(session, statement, key_column, page, sort_column)
+    if fields is not None:
+        keep = tuple(dict.fromkeys((key_column.key, *fields)))
+        items = [{name: row._mapping[name] for name in keep} for row in items]
+    return items, pagination
@@ -0,0 +1,55 @@
+import httpx
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.models.project import Project
+from app.models.service import Service
+from app.utils.change_utils import LISTING_SOURCES
+from app.utils.job_utils import job_queue
+from app.utils.search_utils import SEARCHES
+
+# The search indexes holding text from each namespace, by the column linking
+# an indexed item to the changed ids: projects are found by their category's
+# name as well as their own
+SEARCH_SOURCES = {
+    "services": [("services", Service.id)],
+    "projects": [("projects", Project.project_id)],
+    "categories": [("projects", Project.category_id)],
+}
+
+@job_queue.register("site.rebuild")
+def notify_site_rebuild(session: Session, namespace: str):
+    # Raising on a bad status sends the job round for a retry
+    httpx.post(
+        settings.site_rebuild_url, json={"changed": namespace}, timeout=10
+    ).raise_for_status()
+
+def content_changed(
+    session: Session,
+    namespace: str,
+    ids: list[int],
+    published_changed: bool,
+    *extra: tuple[str, dict],
+):
+    # Adds the follow-up jobs for a write to its own transaction, so call it
+    # before the commit. Cached listings need nothing here: the write's
+    # change-log entry moves their version on as it commits.
+    jobs = list(extra)
+    for index, column in SEARCH_SOURCES[namespace]:
+        search = SEARCHES[index]
+        if not ids or not search.needs_reindex():
+            continue
+        if column is search.pk:
+            indexed = list(ids)
+        else:
+            indexed = list(session.exec(select(search.pk).where(column.in_(ids))))
+        if indexed:
+            jobs.append(("search.reindex", {"index": index, "ids": indexed}))
+    if published_changed:
+        for listing, sources in LISTING_SOURCES.items():
+            warm = f"{listing}.warm"
+            if namespace in sources and warm in job_queue.handlers:
+                jobs.append((warm, {}))
+        if settings.site_rebuild_url:
+            jobs.append(("site.rebuild", {"namespace": namespace}))
+    job_queue.add(session, *jobs)
@@ -0,0 +1,240 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+import jwt
+from jwt.exceptions import InvalidTokenError
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+
+from app.config import settings
+
+# Attempts per key in fixed windows of window_seconds. A store keeps the
+# current and the previous window's count for each key, which is all a
+# sliding-window estimate needs, and returns them with how far into the
+# current window `now` is.
+class RateLimitStore:
+    def hit(self, key: str, window_seconds: float, amount: int = 1) -> tuple[int, int, float]:
+        # amount=0 reads the counts without adding to them
+        raise NotImplementedError
+
+class MemoryRateLimitStore(RateLimitStore):
+    # Per process. Keys are kept in least recently used order and the oldest
+    # dropped past max_entries, so a flood of distinct keys costs bounded
+    # memory; at worst a dropped key starts counting again from zero.
+    def __init__(self, max_entries: int = 100_000, clock=time.time):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._clock = clock
+        # key -> [window, current count, previous count]
+        self._entries: OrderedDict[str, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, window_seconds: float, amount: int = 1) -> tuple[int, int, float]:
+        position = self._clock() / window_seconds
+        window = int(position)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if not amount:
+                    return 0, 0, position - window
+                entry = self._entries[key] = [window, 0, 0]
+            elif entry[0] != window:
+                # The current window becomes the previous one, or both have
+                # lapsed if the key was idle longer than a window
+                entry[2] = entry[1] if entry[0] == window - 1 else 0
+                entry[1] = 0
+                entry[0] = window
+            entry[1] += amount
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry[1], entry[2], position - window
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisRateLimitStore(RateLimitStore):
+    # Shared by every worker. One counter per key and window, expiring once
+    # it can no longer be the previous window.
+    def __init__(self, url: str, clock=time.time):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._clock = clock
+
+    def hit(self, key: str, window_seconds: float, amount: int = 1) -> tuple[int, int, float]:
+        position = self._clock() / window_seconds
+        window = int(position)
+        current_key = f"ratelimit:{key}:{window}"
+        pipe = self._client.pipeline(transaction=False)
+        if amount:
+            pipe.incrby(current_key, amount)
+            pipe.expire(current_key, math.ceil(window_seconds * 2))
+        else:
+            pipe.get(current_key)
+        pipe.get(f"ratelimit:{key}:{window - 1}")
+        results = pipe.execute()
+        return int(results[0] or 0), int(results[-1] or 0), position - window
+
+class RateLimit:
+    # At most `limit` attempts per key in any window_seconds. The count in a
+    # window sliding back from now is estimated as the current fixed
+    # window's count plus the previous one's, weighted by how much of it the
+    # sliding window still covers.
+    def __init__(self, name: str, limit: int, window_seconds: float, store: RateLimitStore):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.store = store
+        self.rejected = 0
+
+    def _retry_after(self, current: int, previous: int, elapsed: float) -> float:
+        # Seconds until one more attempt fits, if no others are made
+        room = self.limit - 1
+        if current <= room:
+            if not previous:
+                return 0.0
+            # Within this window, once enough of the previous one slides out
+            wait = 1 - (room - current) / previous - elapsed
+        else:
+            # Into the next window, once enough of this one slides out
+            wait = 1 - elapsed + 1 - room / current
+        return max(wait, 0.0) * self.window_seconds
+
+    def hit(self, key: str) -> float | None:
+        # Counts an attempt. Returns how long to wait if it is over the
+        # limit, else None. Rejected attempts count too, so retrying early
+        # only extends the wait.
+        current, previous, elapsed = self.store.hit(
+            f"{self.name}:{key}", self.window_seconds
+        )
+        if previous * (1 - elapsed) + current <= self.limit:
+            return None
+        self.rejected += 1
+        return self._retry_after(current, previous, elapsed)
+
+    def check(self, key: str) -> float | None:
+        # Like hit, without counting the attempt
+        current, previous, elapsed = self.store.hit(
+            f"{self.name}:{key}", self.window_seconds, 0
+        )
+        if previous * (1 - elapsed) + current < self.limit:
+            return None
+        self.rejected += 1
+        return self._retry_after(current, previous, elapsed)
+
+rate_limit_store = (
+    RedisRateLimitStore(settings.rate_limit_redis_url)
+    if settings.rate_limit_redis_url
+    else MemoryRateLimitStore(settings.rate_limit_max_entries)
+)
+
+# Every login attempt from an address counts, but only failed ones against a
+# username, so a user who logs in often is never locked out by their own
+# successes, and an attacker spread over many addresses still hits the
+# per-username limit
+login_attempts = RateLimit(
+    "login_ip",
+    settings.login_rate_limit_per_ip,
+    settings.login_rate_limit_window_seconds,
+    rate_limit_store,
+)
+login_failures = RateLimit(
+    "login_user",
+    settings.login_rate_limit_failures_per_username,
+    settings.login_rate_limit_window_seconds,
+    rate_limit_store,
+)
+admin_writes = RateLimit(
+    "admin_write",
+    settings.admin_write_rate_limit,
+    settings.admin_write_rate_limit_window_seconds,
+    rate_limit_store,
+)
+
+RATE_LIMITS = [login_attempts, login_failures, admin_writes]
+
+def client_address(connection: HTTPConnection) -> str:
+    # Behind a proxy this is the address uvicorn's --proxy-headers took
+    # from X-Forwarded-For
+    return connection.client.host if connection.client else "unknown"
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(max(math.ceil(seconds), 1))}
+
+def throttle_login(connection: HTTPConnection, username: str):
+    # Before the user is loaded or a password hashed, so a burst of attempts
+    # costs no database or bcrypt work once it is over the limit
+    if not settings.rate_limit_enabled:
+        return
+    waits = [
+        wait for wait in (
+            login_attempts.hit(client_address(connection)),
+            login_failures.check(username.lower()),
+        )
+        if wait is not None
+    ]
+    if waits:
+        raise HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            "Too many login attempts, try again later",
+            headers=retry_after_header(max(waits)),
+        )
+
+def record_login_failure(username: str):
+    if settings.rate_limit_enabled:
+        login_failures.hit(username.lower())
+
+def token_subject(connection: HTTPConnection) -> str | None:
+    # Only the signature is checked, which needs no database; the route
+    # still authenticates the token as usual
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except InvalidTokenError:
+        return None
+    return payload.get("sub")
+
+ADMIN_PREFIX = "/api/admin/"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class AdminWriteRateLimitMiddleware:
+    # Limits writes under /api/admin/ per address and per token subject,
+    # rejecting before routing, so before the body is parsed or any
+    # dependency touches the database
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or not settings.admin_write_rate_limit
+            or scope["method"] in SAFE_METHODS
+            or not scope["path"].startswith(ADMIN_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        keys = [f"ip:{client_address(connection)}"]
+        subject = token_subject(connection)
+        if subject is not None:
+            keys.append(f"user:{subject}")
+        waits = [wait for wait in map(admin_writes.hit, keys) if wait is not None]
+        if not waits:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Too many requests, try again later"},
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            headers=retry_after_header(max(waits)),
+        )
+        await response(scope, receive, send)
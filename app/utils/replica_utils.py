@@ -0,0 +1,57 @@
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from app.config import settings
+
+# Set on a client that has just written, so its reads go to the primary
+# until the replicas have had time to catch up
+STICKY_COOKIE = "read_primary"
+
+class WriteMark:
+    __slots__ = ("wrote",)
+
+    def __init__(self):
+        self.wrote = False
+
+# Like current_request in metrics_utils: set per request by the middleware
+# and flipped by the primary engine's statement hook, which runs in the
+# threadpool or run_sync with the request's context.
+current_writes: ContextVar[WriteMark | None] = ContextVar(
+    "current_writes", default=None
+)
+
+def record_write():
+    mark = current_writes.get()
+    if mark is not None:
+        mark.wrote = True
+
+def reads_primary(connection: HTTPConnection) -> bool:
+    return STICKY_COOKIE in connection.cookies
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.database_replica_urls:
+            await self.app(scope, receive, send)
+            return
+
+        mark = WriteMark()
+        token = current_writes.set(mark)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and mark.wrote:
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie",
+                    f"{STICKY_COOKIE}=1; Max-Age={settings.replica_sticky_seconds}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_writes.reset(token)
@@ -0,0 +1,175 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.models.revoked_token import RevokedToken
+
+# Revoked jtis grouped by the time bucket their token expires in. A lookup
+# only touches the bucket derived from the token's own exp claim, and whole
+# buckets are dropped once every token in them has expired, so memory is
+# bounded by the number of tokens revoked within one token lifetime. Past
+# max_entries a bucket is evicted early; its number is kept until it expires,
+# so tokens in it are looked up in the store instead of passing as unrevoked.
+class RevocationSet:
+    def __init__(self, bucket_seconds: int = 60, max_entries: int = 100_000):
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._buckets: dict[int, set[str]] = {}
+        self._evicted: set[int] = set()
+        self._size = 0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, expires_at: float) -> int:
+        return int(expires_at // self.bucket_seconds)
+
+    def _prune(self, now: float):
+        current = self._bucket(now)
+        for bucket in [b for b in self._buckets if b < current]:
+            self._size -= len(self._buckets.pop(bucket))
+        self._evicted = {b for b in self._evicted if b >= current}
+        self._next_prune = (current + 1) * self.bucket_seconds
+
+    def add(self, jti: str, expires_at: float):
+        now = time.time()
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._prune(now)
+            number = self._bucket(expires_at)
+            if number in self._evicted:
+                # Partly refilled, the bucket would vouch for tokens it lost
+                return
+            bucket = self._buckets.setdefault(number, set())
+            if jti not in bucket:
+                bucket.add(jti)
+                self._size += 1
+            while self._size > self.max_entries:
+                # Past the cap, drop the tokens closest to expiring on their own
+                evicted = min(self._buckets)
+                self._size -= len(self._buckets.pop(evicted))
+                self._evicted.add(evicted)
+                self.evictions += 1
+
+    def contains(self, jti: str, expires_at: float) -> bool:
+        if time.time() >= self._next_prune:
+            with self._lock:
+                self._prune(time.time())
+        bucket = self._buckets.get(self._bucket(expires_at))
+        return bucket is not None and jti in bucket
+
+    def is_evicted(self, expires_at: float) -> bool:
+        return self._bucket(expires_at) in self._evicted
+
+    def __len__(self):
+        return self._size
+
+class RevocationStore:
+    def add(self, session: Session, jti: str, username: str, expires_at: float):
+        raise NotImplementedError
+
+    def revoked_since(self, session: Session, since: datetime | None):
+        raise NotImplementedError
+
+    def contains(self, session: Session, jti: str) -> bool:
+        raise NotImplementedError
+
+class MemoryRevocationStore(RevocationStore):
+    def __init__(self):
+        self.rows = []
+
+    def add(self, session: Session, jti: str, username: str, expires_at: float):
+        self.rows.append((jti, expires_at, datetime.now(timezone.utc)))
+
+    def revoked_since(self, session: Session, since: datetime | None):
+        return [row for row in self.rows if since is None or row[2] > since]
+
+    def contains(self, session: Session, jti: str) -> bool:
+        return any(row[0] == jti for row in self.rows)
+
+class DatabaseRevocationStore(RevocationStore):
+    def add(self, session: Session, jti: str, username: str, expires_at: float):
+        now = datetime.now(timezone.utc)
+        session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        session.merge(RevokedToken(
+            jti=jti,
+            username=username,
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+            revoked_at=now
+        ))
+        session.commit()
+
+    def revoked_since(self, session: Session, since: datetime | None):
+        now = datetime.now(timezone.utc)
+        statement = select(
+            RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+        ).where(RevokedToken.expires_at > now)
+        if since is not None:
+            statement = statement.where(RevokedToken.revoked_at > since)
+        rows = []
+        for jti, expires_at, revoked_at in session.exec(statement):
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if revoked_at.tzinfo is None:
+                revoked_at = revoked_at.replace(tzinfo=timezone.utc)
+            rows.append((jti, expires_at.timestamp(), revoked_at))
+        return rows
+
+    def contains(self, session: Session, jti: str) -> bool:
+        return session.get(RevokedToken, jti) is not None
+
+# Request path checks hit only the in-process set. Revocations made by other
+# workers are pulled from the persistent store at most once per interval.
+class TokenRevocations:
+    def __init__(
+        self,
+        store: RevocationStore,
+        sync_seconds: float,
+        revoked: RevocationSet | None = None,
+    ):
+        self.store = store
+        self.sync_seconds = sync_seconds
+        self.revoked = RevocationSet() if revoked is None else revoked
+        self._synced_at = 0.0
+        self._high_water: datetime | None = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._synced_at >= self.sync_seconds
+
+    def sync(self, session: Session):
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not self.is_stale():
+                return
+            # Overlap the window so rows stamped by a worker with a slightly
+            # different clock, or committed late, are not skipped
+            since = self._high_water and self._high_water - timedelta(seconds=5)
+            for jti, expires_at, revoked_at in self.store.revoked_since(
+                session, since
+            ):
+                self.revoked.add(jti, expires_at)
+                if self._high_water is None or revoked_at > self._high_water:
+                    self._high_water = revoked_at
+            self._synced_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def revoke(self, session: Session, jti: str, username: str, expires_at: float):
+        self.revoked.add(jti, expires_at)
+        self.store.add(session, jti, username, expires_at)
+
+    def is_revoked(self, jti: str, expires_at: float) -> bool:
+        return self.revoked.contains(jti, expires_at)
+
+    def is_evicted(self, expires_at: float) -> bool:
+        # The set no longer knows, so only the store can tell
+        return self.revoked.is_evicted(expires_at)
+
+    def lookup(self, session: Session, jti: str) -> bool:
+        return self.store.contains(session, jti)
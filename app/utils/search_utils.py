@@ -0,0 +1,257 @@
+import bisect
+import re
+import threading
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, column, func, literal_column, or_, table, update
+from sqlmodel import Session, select
+
+from app import db
+from app.models.category import Category
+from app.models.project import Project
+from app.models.published import PublishedProject, PublishedService
+from app.models.service import Service
+from app.utils.job_utils import job_queue
+from app.utils.pagination_utils import PageParams, decode_cursor, encode_cursor
+
+MAX_QUERY_TERMS = 8
+_WORD = re.compile(r"\w+")
+
+def tokenize(text: str | None) -> list[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+def parse_query(q: str) -> list[str]:
+    terms = list(dict.fromkeys(tokenize(q)))[:MAX_QUERY_TERMS]
+    if not terms:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Search query must contain a word"
+        )
+    return terms
+
+def ts_query(terms: list[str]):
+    # Every term must match, each one as a prefix (plumb:* finds plumbing)
+    return func.to_tsquery(
+        literal_column("'english'"),
+        " & ".join(f"{term}:*" for term in terms)
+    )
+
+# Inverted index used when the database has no full-text search (SQLite in
+# tests and local runs). Terms are kept sorted so a prefix lookup is a bisect.
+class InvertedIndex:
+    def __init__(self):
+        self.loaded = False
+        self._docs: dict[int, dict[str, float]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._terms: list[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove(self, id: int):
+        for term in self._docs.pop(id, {}):
+            postings = self._postings[term]
+            postings.discard(id)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def upsert(self, id: int, weights: dict[str, float]):
+        with self._lock:
+            self._remove(id)
+            self._docs[id] = weights
+            for term in weights:
+                if term not in self._postings:
+                    self._postings[term] = set()
+                    bisect.insort(self._terms, term)
+                self._postings[term].add(id)
+
+    def remove(self, id: int):
+        with self._lock:
+            self._remove(id)
+
+    def _expand(self, prefix: str):
+        index = bisect.bisect_left(self._terms, prefix)
+        while index < len(self._terms) and self._terms[index].startswith(prefix):
+            yield self._terms[index]
+            index += 1
+
+    def search(self, terms: list[str]) -> list[tuple[float, int]]:
+        # Returns (-score, id) pairs in result order
+        scores: dict[int, float] | None = None
+        with self._lock:
+            for term in terms:
+                matched: dict[int, float] = {}
+                for word in self._expand(term):
+                    for id in self._postings[word]:
+                        matched[id] = max(matched.get(id, 0.0), self._docs[id][word])
+                scores = matched if scores is None else {
+                    id: scores[id] + score
+                    for id, score in matched.items() if id in scores
+                }
+                if not scores:
+                    return []
+        return sorted((-score, id) for id, score in scores.items())
+
+# Ranked prefix search over one published content type. On Postgres it reads
+# the search_vector column (migration 0004) through its GIN index; elsewhere it falls back to
+# an InvertedIndex that is loaded on first use. Either way writes queue a
+# search.reindex job for the rows they touched. Matches are returned as their rows
+# in the published snapshot, with the same public columns as the listings.
+class ContentSearch:
+    def __init__(
+        self,
+        model,
+        pk,
+        public_pk,
+        fields: list[tuple],
+        join: tuple | None = None,
+        vector_sql: str | None = None,
+    ):
+        self.model = model
+        self.pk = pk
+        self.public_pk = public_pk
+        self.fields = fields
+        self.join = join
+        # Set when the vector spans tables and so cannot be a generated column
+        self.vector_sql = vector_sql
+        self.index = InvertedIndex()
+
+    @property
+    def vector(self):
+        return literal_column(f"{self.model.__tablename__}.search_vector")
+
+    def _documents(self, session: Session, condition):
+        statement = select(self.pk, self.model.is_published, *(
+            field for field, _ in self.fields
+        ))
+        if self.join is not None:
+            statement = statement.outerjoin(*self.join)
+        return session.exec(statement.where(condition)).all()
+
+    def _index_rows(self, rows, removed=()):
+        for id in removed:
+            self.index.remove(id)
+        for id, published, *texts in rows:
+            if not published:
+                self.index.remove(id)
+                continue
+            weights: dict[str, float] = {}
+            for text, (_, weight) in zip(texts, self.fields):
+                for term in tokenize(text):
+                    weights[term] = max(weights.get(term, 0.0), weight)
+            self.index.upsert(id, weights)
+
+    def _load(self, session: Session):
+        self._index_rows(self._documents(session, self.model.is_published == True))
+        self.index.loaded = True
+
+    def needs_reindex(self) -> bool:
+        if db.active_engine().dialect.name == "postgresql":
+            return self.vector_sql is not None
+        # Nothing to keep in step until the first search loads the index
+        return self.index.loaded
+
+    def refresh(self, session: Session, ids: list[int]):
+        condition = self.pk.in_(ids)
+        if db.active_engine().dialect.name == "postgresql":
+            target = table(
+                self.model.__tablename__,
+                column(self.pk.key),
+                column("search_vector")
+            )
+            session.execute(
+                update(target)
+                .where(target.c[self.pk.key].in_(select(self.pk).where(condition)))
+                .values(search_vector=literal_column(self.vector_sql))
+            )
+            session.commit()
+            return
+        rows = self._documents(session, condition)
+        found = {row[0] for row in rows}
+        self._index_rows(rows, [id for id in ids if id not in found])
+
+    def _search_postgres(self, session: Session, terms: list[str], page: PageParams):
+        query = ts_query(terms)
+        rank = func.ts_rank(self.vector, query)
+        statement = (
+            select(self.public_pk.class_, rank)
+            .join(self.model, self.pk == self.public_pk)
+            .where(self.vector.op("@@")(query))
+        )
+        if page.cursor:
+            last_rank, last_id = decode_cursor(page.cursor)
+            statement = statement.where(or_(
+                rank < last_rank,
+                and_(rank == last_rank, self.pk > last_id)
+            ))
+        rows = session.exec(
+            statement.order_by(rank.desc(), self.pk.asc()).limit(page.limit + 1)
+        ).all()
+        return [(item, score) for item, score in rows]
+
+    def _search_memory(self, session: Session, terms: list[str], page: PageParams):
+        if not self.index.loaded:
+            self._load(session)
+        ranked = self.index.search(terms)
+        start = 0
+        if page.cursor:
+            last_rank, last_id = decode_cursor(page.cursor)
+            start = bisect.bisect_right(ranked, (-last_rank, last_id))
+        window = ranked[start:start + page.limit + 1]
+        items = {
+            getattr(item, self.public_pk.key): item
+            for item in session.exec(
+                select(self.public_pk.class_)
+                .where(self.public_pk.in_([id for _, id in window]))
+            )
+        }
+        return [(items[id], -score) for score, id in window if id in items]
+
+    def search(self, session: Session, q: str, page: PageParams):
+        terms = parse_query(q)
+        if db.active_engine().dialect.name == "postgresql":
+            rows = self._search_postgres(session, terms, page)
+        else:
+            rows = self._search_memory(session, terms, page)
+
+        items = [item for item, _ in rows[:page.limit]]
+        next_cursor = None
+        if len(rows) > page.limit:
+            item, score = rows[page.limit - 1]
+            next_cursor = encode_cursor([score, getattr(item, self.public_pk.key)])
+        return items, {
+            "limit": page.limit,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+
+service_search = ContentSearch(
+    Service,
+    Service.id,
+    PublishedService.id,
+    [(Service.title, 1.0), (Service.description, 0.4)]
+)
+
+# A project's text is its image name plus its category's name
+project_search = ContentSearch(
+    Project,
+    Project.project_id,
+    PublishedProject.project_id,
+    [(Project.project_image, 1.0), (Category.category_name, 1.0)],
+    join=(Category, Category.category_id == Project.category_id),
+    vector_sql=(
+        "setweight(to_tsvector('english', regexp_replace("
+        "coalesce(project.project_image, ''), '[^[:alnum:]]+', ' ', 'g')), 'A') || "
+        "setweight(to_tsvector('english', coalesce((SELECT category_name "
+        "FROM category WHERE category.category_id = project.category_id), '')), 'A')"
+    )
+)
+
+SEARCHES = {"services": service_search, "projects": project_search}
+
+@job_queue.register("search.reindex")
+def reindex_job(session: Session, index: str, ids: list[int]):
+    search = SEARCHES[index]
+    if search.needs_reindex():
+        search.refresh(session, ids)
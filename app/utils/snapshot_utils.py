@@ -0,0 +1,77 @@
+from sqlalchemy import delete, insert, select
+
+from app.models.category import Category
+from app.models.project import Project
+from app.models.published import PublishedProject, PublishedService
+from app.models.service import Service
+
+class Snapshot:
+    # A table holding the rows `source` selects. Rows are replaced by
+    # deleting and re-selecting them, all of them or only those matching
+    # some values of one column.
+    def __init__(self, model, source):
+        self.model = model
+        self.source = source
+
+    def refresh(self, conn, column: str | None = None, values=None):
+        # conn is a Connection or a Session, inside the caller's transaction
+        table = self.model.__table__
+        source = self.source
+        remove = delete(table)
+        if column is not None:
+            remove = remove.where(table.c[column].in_(values))
+            source = source.where(source.selected_columns[column].in_(values))
+        conn.execute(remove)
+        conn.execute(insert(table).from_select(
+            [selected.key for selected in source.selected_columns], source
+        ))
+
+SNAPSHOTS = {
+    "services": Snapshot(
+        PublishedService,
+        select(
+            Service.id,
+            Service.title,
+            Service.description,
+            Service.image,
+            Service.image_variants,
+            Service.updated_at,
+        ).where(Service.is_published == True)
+    ),
+    "projects": Snapshot(
+        PublishedProject,
+        select(
+            Project.project_id,
+            Project.project_image,
+            Project.project_image_variants,
+            Project.category_id,
+            Category.category_name,
+            Project.updated_at,
+        )
+        .outerjoin(Category, Category.category_id == Project.category_id)
+        .where(Project.is_published == True)
+    ),
+}
+
+# The snapshot rows a change in each namespace can affect, by the column
+# holding the changed ids
+AFFECTED = {
+    "services": [("services", "id")],
+    "projects": [("projects", "project_id")],
+    "categories": [("projects", "category_id")],
+}
+
+def refresh_snapshots(session, changed: set[tuple[str, int]]):
+    # Called before a write commits, with the items it changed
+    ids = {}
+    for namespace, id in changed:
+        ids.setdefault(namespace, set()).add(id)
+    for namespace, namespace_ids in ids.items():
+        for snapshot, column in AFFECTED[namespace]:
+            SNAPSHOTS[snapshot].refresh(session, column, sorted(namespace_ids))
+
+def rebuild_snapshots(conn):
+    # Every snapshot from scratch, for a new snapshot table or after rows
+    # were written outside the application
+    for snapshot in SNAPSHOTS.values():
+        snapshot.refresh(conn)
@@ -0,0 +1,88 @@
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+
+class StorageBackend:
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        # Consumes the chunks as they arrive and returns the bytes written
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def write(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def key(self, url: str) -> str | None:
+        # The key behind one of this backend's urls, None for any other url
+        raise NotImplementedError
+
+# Files under media_root, served by the app itself at media_url. Uploads are
+# written to a temporary name and renamed into place, so a reader never sees
+# a partial file and an aborted upload leaves nothing behind.
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Storage key outside the media root: {key}")
+        return path
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self.path(key)
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        await run_in_threadpool(path.parent.mkdir, parents=True, exist_ok=True)
+        file = await run_in_threadpool(open, partial, "wb")
+        size = 0
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(file.write, chunk)
+                size += len(chunk)
+            await run_in_threadpool(file.close)
+            await run_in_threadpool(os.replace, partial, path)
+        except BaseException:
+            file.close()
+            partial.unlink(missing_ok=True)
+            raise
+        return size
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def write(self, key: str, data: bytes):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key(self, url: str) -> str | None:
+        prefix = f"{self.base_url}/"
+        return url.removeprefix(prefix) if url.startswith(prefix) else None
+
+def make_storage() -> StorageBackend:
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.media_root, settings.media_url)
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+storage = make_storage()
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app.models.user import User
+
+# Snapshot of every user's token version, reloaded in one query at most once
+# per refresh interval. Stateless token checks compare against it instead of
+# loading the user row on each request.
+class TokenVersionCache:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.refreshes = 0
+        self._versions: dict[str, int] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def refresh(self, session: Session):
+        # A concurrent refresh already covers this one
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not self.is_stale():
+                return
+            rows = session.exec(select(User.username, User.token_version)).all()
+            self._versions = {username: version for username, version in rows}
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+        finally:
+            self._lock.release()
+
+    def is_current(self, username: str, version: int) -> bool:
+        current = self._versions.get(username)
+        # Exactly the current version: a token from before a bump is
+        # outdated, and one claiming a version never issued is not genuine
+        return current is not None and version == current
+
+    def remember(self, username: str, version: int):
+        self._versions[username] = version
+
+    def forget(self, username: str):
+        self._versions.pop(username, None)
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+@event.listens_for(OrmSession, "before_flush")
+def _bump_token_versions(session, flush_context, instances):
+    # Tokens carry the role and the token version they were issued with, so
+    # a role or password change must move the version on for stateless
+    # checks to turn the old tokens away, whichever code path made it
+    for user in session.dirty:
+        if not isinstance(user, User):
+            continue
+        attrs = inspect(user).attrs
+        if attrs.token_version.history.has_changes():
+            continue
+        if (
+            attrs.is_admin.history.has_changes()
+            or attrs.hashed_password.history.has_changes()
+        ):
+            user.token_version += 1
@@ -0,0 +1,121 @@
+from collections import deque
+
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# One file part read straight off the request stream. Unlike UploadFile, the
+# body is never spooled: each chunk the client sends is parsed and handed on
+# (to storage) before the next is read, so memory stays at about one chunk
+# whatever the file size.
+class StreamedUpload:
+    def __init__(self, request: Request, field: str, max_bytes: int):
+        content_type, params = parse_options_header(
+            request.headers.get("content-type", "")
+        )
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                "Expected a multipart/form-data body"
+            )
+        content_length = request.headers.get("content-length")
+        if content_length is not None and content_length.isdigit() and (
+            int(content_length) > max_bytes + 64 * 1024
+        ):
+            # Refused up front; the slack allows for the multipart framing
+            raise self.too_large(max_bytes)
+
+        self.field = field
+        self.max_bytes = max_bytes
+        self.filename: str | None = None
+        self.content_type: str | None = None
+        self._stream = request.stream()
+        self._events = deque()
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[bytes, bytes] = {}
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    @staticmethod
+    def too_large(max_bytes: int) -> HTTPException:
+        return HTTPException(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            f"File is larger than {max_bytes} bytes"
+        )
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        self._events.append(("headers", self._headers))
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        self._events.append(("data", data[start:end]))
+
+    def _on_part_end(self):
+        self._events.append(("end", None))
+
+    async def _next_event(self):
+        while not self._events:
+            try:
+                chunk = await anext(self._stream)
+            except StopAsyncIteration:
+                return None
+            try:
+                self._parser.write(chunk)
+            except MultipartParseError:
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST, "Malformed multipart body"
+                )
+        return self._events.popleft()
+
+    async def open(self):
+        # Skips any other form fields up to the file part
+        while (event := await self._next_event()) is not None:
+            kind, headers = event
+            if kind != "headers":
+                continue
+            _, params = parse_options_header(
+                headers.get(b"content-disposition", b"")
+            )
+            if params.get(b"name") == self.field.encode() and b"filename" in params:
+                self.filename = params[b"filename"].decode("utf-8", "replace")
+                self.content_type = headers.get(
+                    b"content-type", b"application/octet-stream"
+                ).decode("latin-1").lower()
+                return self
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, f"Expected a file in the '{self.field}' field"
+        )
+
+    async def chunks(self):
+        size = 0
+        while (event := await self._next_event()) is not None:
+            kind, data = event
+            if kind == "end":
+                return
+            if kind == "data":
+                size += len(data)
+                if size > self.max_bytes:
+                    raise self.too_large(self.max_bytes)
+                yield data
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Multipart body ended early")
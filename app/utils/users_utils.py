@@ -3,11 +3,14 @@ from sqlmodel import Session
 
 from ..models.user import User
 
-def get_user(username: str, session: Session):
+def get_user(session: Session, username: str):
     user = session.get(User, username)
     if not user:
         raise HTTPException(
             status.HTTP_404_NOT_FOUND, f"User {username} does not exist"
         )
     return user
-    
\ No newline at end of file
+
+def public_user(user: User) -> dict:
+    # Everything about a user that may leave the server
+    return {"username": user.username, "is_admin": user.is_admin}
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from sqlmodel import Session, select
+
+from app.models.user import User
+from app.utils.change_utils import NAMESPACES, record_change
+from app.utils.publish_utils import content_changed
+
+# Edit and approve workflows shared by services and projects. Each one reads
+# the item (row-locked, so concurrent editors queue instead of racing) and the
+# acting user once, then writes with a single commit.
+
+def _lock(session: Session, model, pk, id: int):
+    item = session.exec(select(model).where(pk == id).with_for_update()).first()
+    if not item:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND, f"{model.__name__} not found"
+        )
+    return item
+
+def _mark_approved(item, approver: User):
+    item.is_published = True
+    item.approved_by = approver.username
+    item.last_modified_by = approver.username
+    item.approved_at = datetime.now()
+
+def edit_content(
+    session: Session,
+    model,
+    pk,
+    id: int,
+    changes: dict,
+    editor_username: str,
+):
+    item = _lock(session, model, pk, id)
+    editor = session.get(User, editor_username)
+    if not editor:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User does not exist")
+
+    was_published = item.is_published
+    approved = bool(editor.is_admin)
+    item.sqlmodel_update(changes)
+    item.last_modified_by = editor.username
+    item.is_published = False
+    item.updated_at = datetime.now(timezone.utc)
+    # Edits by admins are approved as part of the same write
+    if approved:
+        _mark_approved(item, editor)
+    session.add(item)
+    record_change(session, model, id, "updated", was_published or approved)
+    content_changed(session, NAMESPACES[model], [id], was_published or approved)
+    session.commit()
+    return was_published, approved
+
+def approve_content(
+    session: Session,
+    model,
+    pk,
+    id: int,
+    approver_username: str,
+):
+    item = _lock(session, model, pk, id)
+    approver = session.get(User, approver_username)
+    if not approver:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User does not exist")
+    if not approver.is_admin:
+        raise HTTPException(
+            status.HTTP_403_FORBIDDEN,
+            "User not permitted to approve"
+        )
+
+    _mark_approved(item, approver)
+    item.updated_at = datetime.now(timezone.utc)
+    session.add(item)
+    record_change(session, model, id, "approved", True)
+    content_changed(session, NAMESPACES[model], [id], True)
+    session.commit()
@@ -0,0 +1,88 @@
+"""Content write throughput under the change-log lock.
+
+Every content write inserts its change-log entries under one Postgres
+advisory lock (change_utils.LOCK_KEY), held until the write commits, so
+writes commit one at a time however many workers there are. This runs
+--threads writers, each updating its own services, and reports the writes
+committed per second with their latencies. --work-ms adds time spent inside
+each transaction after its change is recorded, as a handler doing more
+queries would: the lock is only taken at commit, so that time still
+overlaps across writers, and the throughput should scale with the threads
+until the commit itself is the bottleneck.
+
+The lock is Postgres-only; SQLite serializes writers on its own, so the
+numbers only mean something against Postgres:
+
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_change_log
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from benchmarks.bench_query_plans import seed
+from benchmarks.common import configure, summarize
+
+def main(args):
+    configure()
+
+    from sqlmodel import Session
+
+    from app import db
+    from app.migrations import migrate
+    from app.models.service import Service
+    from app.utils.change_utils import record_change
+
+    engine = db.engine
+    migrate(engine)
+    seed(engine, args.threads * args.writes, 1, 1.0)
+
+    def write(id: int) -> float:
+        start = time.perf_counter()
+        with Session(engine) as session:
+            service = session.get(Service, id)
+            service.title = f"Service {id} edited"
+            session.add(service)
+            record_change(session, Service, id, "updated", service.is_published)
+            if args.work_ms:
+                time.sleep(args.work_ms / 1000)
+            session.commit()
+        return time.perf_counter() - start
+
+    latencies = []
+    lock = threading.Lock()
+
+    def writer(first: int):
+        own = [write(id) for id in range(first, first + args.writes)]
+        with lock:
+            latencies.extend(own)
+
+    threads = [
+        threading.Thread(target=writer, args=(1 + n * args.writes,))
+        for n in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "dialect": engine.dialect.name,
+        "threads": args.threads,
+        "work_ms": args.work_ms,
+        "writes_per_second": round(len(latencies) / elapsed, 1),
+        "write": summarize(latencies),
+    }, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200,
+                        help="writes per thread")
+    parser.add_argument("--work-ms", type=float, default=5.0,
+                        help="time spent in each transaction before it commits")
+    sys.exit(main(parser.parse_args()))
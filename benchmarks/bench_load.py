@@ -0,0 +1,232 @@
+"""Throughput and latency of the main endpoints against seeded data.
+
+Migrates and seeds a throwaway database (SQLite unless DATABASE_URL is set),
+then drives the app in-process through httpx's ASGI transport. With
+--base-url it drives a local uvicorn instead, which must be started against
+the same DATABASE_URL and an empty database. Each scenario sends --requests
+requests from --concurrency workers and reports requests/second and
+p50/p95/p99 latency as JSON.
+
+    python -m benchmarks.bench_load --services 50000 --output run.json
+    python -m benchmarks.bench_load --baseline run.json --max-regression 0.25
+
+With --baseline, each scenario's p95 and throughput are compared with the
+earlier run and the exit status is non-zero if either got worse than
+--max-regression allows.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import configure, summarize
+
+def seed(engine, args):
+    from sqlalchemy import insert
+
+    from app.models.category import Category
+    from app.models.project import Project
+    from app.models.service import Service
+    from app.models.user import User
+    from app.utils.auth_utils import pwd_context
+    from app.utils.snapshot_utils import rebuild_snapshots
+
+    # Every seeded user shares one hash; hashing per user would dominate setup
+    hashed_password = pwd_context.hash("password")
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "username": "admin",
+            "hashed_password": hashed_password,
+            "is_admin": True,
+            "token_version": 0,
+        }] + [{
+            "username": f"user{index}",
+            "hashed_password": hashed_password,
+            "is_admin": False,
+            "token_version": 0,
+        } for index in range(args.users)])
+        conn.execute(insert(Category.__table__), [
+            {"category_id": id, "category_name": f"Category {id}"}
+            for id in range(1, args.categories + 1)
+        ])
+        for start in range(0, args.services, 10_000):
+            conn.execute(insert(Service.__table__), [{
+                "title": f"Service {index}",
+                "description": "Load test service",
+                "image": "image.jpg",
+                "created_by": "admin",
+                "last_modified_by": "admin",
+                "is_published": index % 2 == 0,
+            } for index in range(start, min(start + 10_000, args.services))])
+        for start in range(0, args.projects, 10_000):
+            conn.execute(insert(Project.__table__), [{
+                "project_image": "image.jpg",
+                "category_id": index % args.categories + 1,
+                "created_by": "admin",
+                "last_modified_by": "admin",
+                "is_published": index % 2 == 0,
+            } for index in range(start, min(start + 10_000, args.projects))])
+        # Inserted around the application, so its snapshot is filled here
+        rebuild_snapshots(conn)
+
+async def run_scenario(client, name, make_request, requests, concurrency):
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            response = await make_request(client, index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        **summarize(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1)
+    }
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if current["requests_per_second"] < previous["requests_per_second"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: {previous['requests_per_second']} -> "
+                f"{current['requests_per_second']} requests/s"
+            )
+    return regressions
+
+async def main(args):
+    configure(BCRYPT_ROUNDS=args.bcrypt_rounds, RATE_LIMIT_ENABLED=False)
+
+    import httpx
+
+    from app import db
+    from app.config import settings
+    from app.main import app
+    from app.migrations import migrate
+    from app.utils.auth_utils import password_executor
+    from app.utils.job_utils import job_queue
+
+    migrate(db.engine)
+    seed(db.engine, args)
+    # httpx's ASGI transport skips the lifespan, which starts the job workers
+    job_queue.start()
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url)
+    else:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        )
+
+    async with client:
+        login = await client.post(
+            "/api/auth/login", data={"username": "admin", "password": "password"}
+        )
+        admin = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        scenarios = {
+            "list_services": lambda c, i: c.get("/api/services"),
+            "list_services_admin": lambda c, i: c.get("/api/admin/services"),
+            "list_projects_category": lambda c, i: c.get(
+                "/api/projects", params={"category_id": i % args.categories + 1}
+            ),
+            "login": lambda c, i: c.post("/api/auth/login", data={
+                "username": f"user{i % max(args.users, 1)}", "password": "password"
+            }),
+            "create_service": lambda c, i: c.post("/api/admin/services", json={
+                "title": f"Created {i}",
+                "description": "Created during the load test",
+                "image": "image.jpg",
+                "created_by": "admin",
+                "last_modified_by": "admin"
+            }),
+            "approve_service": lambda c, i: c.patch(
+                f"/api/admin/services/{i % args.services + 1}/approve",
+                json={"approved_by": "admin"},
+                headers=admin
+            ),
+        }
+        selected = args.scenario or list(scenarios)
+
+        results = {}
+        for name in selected:
+            # Warm caches and connections before measuring
+            await run_scenario(
+                client, name, scenarios[name], args.concurrency, args.concurrency
+            )
+            results[name] = await run_scenario(
+                client, name, scenarios[name], args.requests, args.concurrency
+            )
+
+    job_queue.stop()
+    password_executor.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "target": args.base_url or f"in-process ({db.engine.dialect.name})",
+            "db_async": settings.db_async,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "seeded": {
+                "services": args.services,
+                "projects": args.projects,
+                "categories": args.categories,
+                "users": args.users
+            }
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.max_regression)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--services", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=10_000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--scenario", action="append",
+                        help="run only this scenario (repeatable)")
+    parser.add_argument("--base-url",
+                        help="target a running server instead of the in-process app")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    sys.exit(asyncio.run(main(parser.parse_args())))
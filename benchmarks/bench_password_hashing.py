@@ -0,0 +1,90 @@
+"""Login throughput with bcrypt on the shared threadpool vs the password executor.
+
+Each scenario runs a burst of concurrent password verifications alongside a
+stream of cheap requests that need a threadpool slot (as a sync DB call does)
+and reports login throughput and the latency of those neighbouring requests.
+
+    python -m benchmarks.bench_password_hashing --logins 200 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import configure, summarize
+
+async def run_scenario(name, verify, logins, hashed_password):
+    from fastapi.concurrency import run_in_threadpool
+
+    neighbour_latencies = []
+    done = asyncio.Event()
+
+    async def neighbour():
+        while not done.is_set():
+            start = time.perf_counter()
+            await run_in_threadpool(time.sleep, 0.001)
+            neighbour_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    async def login():
+        try:
+            await verify("password", hashed_password)
+            return True
+        except Exception:
+            return False
+
+    neighbours = [asyncio.create_task(neighbour()) for _ in range(4)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*neighbours)
+
+    return {
+        "scenario": name,
+        "logins": logins,
+        "succeeded": sum(results),
+        "rejected": logins - sum(results),
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(sum(results) / elapsed, 1),
+        "neighbour_latency": summarize(neighbour_latencies)
+    }
+
+async def main(args):
+    configure(
+        DATABASE_URL="sqlite://",
+        BCRYPT_ROUNDS=args.rounds,
+        PASSWORD_HASH_WORKERS=args.workers,
+        PASSWORD_HASH_QUEUE_SIZE=args.logins,
+    )
+
+    from fastapi.concurrency import run_in_threadpool
+    from app.utils.auth_utils import (
+        get_password_hash,
+        verify_and_update_password,
+        verify_password,
+    )
+
+    hashed_password = get_password_hash("password")
+
+    async def threadpool_verify(plain, hashed):
+        return await run_in_threadpool(verify_password, plain, hashed)
+
+    results = [
+        await run_scenario(
+            "threadpool", threadpool_verify, args.logins, hashed_password
+        ),
+        await run_scenario(
+            "password_executor", verify_and_update_password, args.logins,
+            hashed_password
+        ),
+    ]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    asyncio.run(main(parser.parse_args()))
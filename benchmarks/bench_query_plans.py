@@ -0,0 +1,170 @@
+"""Query plans and timings for the hot listing queries on large tables.
+
+Migrates a throwaway database (SQLite unless DATABASE_URL points elsewhere),
+seeds --rows services and projects, then runs the same statements the public
+listing routes issue and checks each plan uses the index meant for it. Exits
+non-zero if any plan falls back to a different index or a table scan.
+
+    python -m benchmarks.bench_query_plans --rows 200000
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_query_plans
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks.common import configure, summarize
+
+def seed(engine, rows: int, categories: int, published: float):
+    from sqlalchemy import insert, text
+
+    from app.models.category import Category
+    from app.models.project import Project
+    from app.models.service import Service
+
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Category.__table__), [
+            {"category_id": id, "category_name": f"Category {id}"}
+            for id in range(1, categories + 1)
+        ])
+        for start in range(0, rows, 10_000):
+            batch = range(start, min(start + 10_000, rows))
+            conn.execute(insert(Service.__table__), [{
+                "title": f"Service {rng.randrange(rows):08d}",
+                "description": "Benchmark service",
+                "image": "image.jpg",
+                "created_by": "bench",
+                "last_modified_by": "bench",
+                "is_published": rng.random() < published,
+            } for _ in batch])
+            conn.execute(insert(Project.__table__), [{
+                "project_image": "image.jpg",
+                "category_id": rng.randint(1, categories),
+                "created_by": "bench",
+                "last_modified_by": "bench",
+                "is_published": rng.random() < published,
+            } for _ in batch])
+        conn.execute(text("ANALYZE"))
+
+def capture(engine, fn):
+    # The statement and parameters a listing call sends to the database
+    from sqlalchemy import event
+    from sqlmodel import Session
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as session:
+            result = fn(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements[-1], result
+
+def explain(engine, statement, parameters) -> str:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            return "\n".join(row[0] for row in rows)
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "\n".join(row[-1] for row in rows)
+
+def timed(engine, statement, parameters, repeat: int) -> dict:
+    latencies = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.exec_driver_sql(statement, parameters).fetchall()
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+def main(args):
+    configure()
+
+    from app import db
+    from app.migrations import migrate
+    from app.models.project import Project
+    from app.models.service import Service
+    from app.routes.projects import PROJECT_SORT_FIELDS
+    from app.routes.services import SERVICE_SORT_FIELDS
+    from app.utils.pagination_utils import PageParams, list_page
+
+    engine = db.engine
+    migrate(engine)
+    seed(engine, args.rows, args.categories, args.published)
+
+    published_service = [Service.is_published == True]
+    published_project = [Project.is_published == True]
+    cases = {
+        "services_by_id": (
+            "ix_service_published_id",
+            lambda s, page: list_page(s, Service, page, SERVICE_SORT_FIELDS, published_service)
+        ),
+        "services_by_title": (
+            "ix_service_published_title",
+            lambda s, page: list_page(
+                s, Service, PageParams(page.limit, page.cursor, "title"),
+                SERVICE_SORT_FIELDS, published_service
+            )
+        ),
+        "projects_by_id": (
+            "ix_project_published_id",
+            lambda s, page: list_page(s, Project, page, PROJECT_SORT_FIELDS, published_project)
+        ),
+        "projects_in_category": (
+            "ix_project_published_category",
+            lambda s, page: list_page(
+                s, Project, page, PROJECT_SORT_FIELDS,
+                published_project + [Project.category_id == 1]
+            )
+        ),
+        "projects_by_category": (
+            "ix_project_published_category",
+            lambda s, page: list_page(
+                s, Project, PageParams(page.limit, page.cursor, "category_id"),
+                PROJECT_SORT_FIELDS, published_project
+            )
+        ),
+    }
+
+    report = {"dialect": engine.dialect.name, "rows": args.rows, "queries": {}}
+    failed = False
+    for name, (index, call) in cases.items():
+        # First page, then the page after it to cover the cursor predicate
+        (statement, parameters), (_, pagination) = capture(
+            engine, lambda s: call(s, PageParams(args.limit))
+        )
+        (next_statement, next_parameters), _ = capture(
+            engine, lambda s: call(s, PageParams(args.limit, pagination["next_cursor"]))
+        )
+        for label, sql, params in (
+            (name, statement, parameters),
+            (f"{name}_next_page", next_statement, next_parameters),
+        ):
+            plan = explain(engine, sql, params)
+            uses_index = index in plan
+            failed |= not uses_index
+            report["queries"][label] = {
+                "expected_index": index,
+                "uses_index": uses_index,
+                "plan": plan,
+                "latency": timed(engine, sql, params, args.repeat)
+            }
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--published", type=float, default=0.3,
+                        help="fraction of rows that are published")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    sys.exit(main(parser.parse_args()))
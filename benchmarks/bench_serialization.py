@@ -0,0 +1,139 @@
+"""Bytes on the wire and serialization CPU for list_all_published_services.
+
+Migrates and seeds a throwaway database (SQLite unless DATABASE_URL is set)
+with --rows published services. For each --limit it loads the page the route
+would serve and compares, per render:
+
+  * jsonable_encoder + JSONResponse, FastAPI's path for a returned dict
+  * json_utils.dumps, the path the listing routes now take
+  * gzip and brotli on top of it
+
+CPU figures are process time, so they are not skewed by other load. It then
+requests /api/services in-process with each Accept-Encoding and reports the
+bytes actually sent.
+
+    python -m benchmarks.bench_serialization --rows 100000 --limit 200 --limit 100000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.common import configure, summarize
+
+def seed(engine, rows: int):
+    from sqlalchemy import insert
+
+    from app.models.service import Service
+    from app.utils.snapshot_utils import rebuild_snapshots
+
+    with engine.begin() as conn:
+        for start in range(0, rows, 10_000):
+            conn.execute(insert(Service.__table__), [{
+                "title": f"Service {index}",
+                "description": f"Benchmark service number {index}, published",
+                "image": f"images/service-{index}.jpg",
+                "created_by": "bench",
+                "last_modified_by": "bench",
+                "is_published": True,
+                "approved_by": "bench",
+            } for index in range(start, min(start + 10_000, rows))])
+        rebuild_snapshots(conn)
+
+def cpu_time(fn, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn()
+        timings.append(time.process_time() - start)
+    return summarize(timings), result
+
+def render_cases(payload, repeat: int) -> dict:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from app.utils.compression_utils import ENCODINGS, make_encoder
+    from app.utils.json_utils import dumps
+
+    def compress(encoding, body):
+        encoder = make_encoder(encoding)
+        return encoder.compress(body) + encoder.finish()
+
+    report = {}
+    stats, body = cpu_time(
+        lambda: JSONResponse(jsonable_encoder(payload)).body, repeat
+    )
+    report["jsonable_encoder"] = {"cpu": stats, "bytes": len(body)}
+    stats, body = cpu_time(lambda: dumps(payload), repeat)
+    report["fast_json"] = {"cpu": stats, "bytes": len(body)}
+    for encoding in ENCODINGS:
+        stats, compressed = cpu_time(lambda: compress(encoding, body), repeat)
+        report[f"fast_json+{encoding}"] = {"cpu": stats, "bytes": len(compressed)}
+    return report
+
+async def wire_bytes(limit: int) -> dict:
+    import httpx
+
+    from app.main import app
+    from app.utils.compression_utils import ENCODINGS
+
+    transport = httpx.ASGITransport(app=app)
+    report = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for encoding in ("identity", *ENCODINGS):
+            response = await client.get(
+                "/api/services",
+                params={"limit": limit},
+                headers={"Accept-Encoding": encoding}
+            )
+            report[encoding] = {
+                "status": response.status_code,
+                "content_encoding": response.headers.get("content-encoding"),
+                "bytes": response.num_bytes_downloaded
+            }
+    return report
+
+def main(args):
+    configure()
+
+    from app import db
+    from app.config import settings
+    from app.migrations import migrate
+    from app.models.published import PublishedService
+    from app.routes.services import SERVICE_SORT_FIELDS
+    from app.utils.pagination_utils import PageParams, list_page
+
+    migrate(db.engine)
+    seed(db.engine, args.rows)
+
+    report = {"rows": args.rows, "limits": {}}
+    for limit in args.limit or [settings.page_size_max, args.rows]:
+        with db.Session(db.engine) as session:
+            services, pagination = list_page(
+                session, PublishedService, PageParams(limit), SERVICE_SORT_FIELDS
+            )
+            payload = {
+                "success": True,
+                "message": "All published services returned successfully",
+                "data": services,
+                "pagination": pagination
+            }
+            result = {"render": render_cases(payload, args.repeat)}
+        # The route caps limit at page_size_max
+        if limit <= settings.page_size_max:
+            result["wire"] = asyncio.run(wire_bytes(limit))
+        report["limits"][limit] = result
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, action="append",
+                        help="page size to measure (repeatable); "
+                             "defaults to page_size_max and --rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    sys.exit(main(parser.parse_args()))
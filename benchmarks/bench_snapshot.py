@@ -0,0 +1,167 @@
+"""Public listings from the published snapshot against the base tables.
+
+Migrates a throwaway database (SQLite unless DATABASE_URL points elsewhere),
+seeds --rows services and projects with --published of them published, and
+fills the snapshot. For each listing it times the base-table path the
+routes used before, with the second query a client needed for category
+names, against one query on the snapshot. It also times what keeping the
+snapshot current costs: an approval, which refreshes one row in the same
+transaction, and a full rebuild.
+
+    python -m benchmarks.bench_snapshot --rows 100000
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.bench_snapshot
+"""
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.bench_query_plans import seed
+from benchmarks.common import configure, summarize
+
+def timed(engine, fn, repeat: int) -> dict:
+    from sqlmodel import Session
+
+    latencies = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            fn(session)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+def main(args):
+    configure()
+
+    from sqlmodel import Session, select
+
+    from app import db
+    from app.migrations import migrate
+    from app.models.category import Category
+    from app.models.project import Project
+    from app.models.published import PublishedProject, PublishedService
+    from app.models.service import Service
+    from app.models.user import User
+    from app.routes.projects import PROJECT_SORT_FIELDS
+    from app.routes.services import SERVICE_SORT_FIELDS
+    from app.utils.pagination_utils import PageParams, list_page
+    from app.utils.snapshot_utils import rebuild_snapshots
+    from app.utils.workflow_utils import approve_content
+
+    engine = db.engine
+    migrate(engine)
+    seed(engine, args.rows, args.categories, args.published)
+    with Session(engine) as session:
+        session.add(User(username="admin", hashed_password="", is_admin=True))
+        session.commit()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        rebuild_snapshots(conn)
+    rebuild_seconds = time.perf_counter() - start
+
+    published_service = [Service.is_published == True]
+    published_project = [Project.is_published == True]
+
+    def with_category_names(session, projects):
+        # What the website did after each page of projects
+        ids = {project.category_id for project in projects}
+        return session.exec(
+            select(Category).where(Category.category_id.in_(ids))
+        ).all()
+
+    def base_projects(filters, limit):
+        def load(session):
+            projects, _ = list_page(
+                session, Project, PageParams(limit), PROJECT_SORT_FIELDS, filters
+            )
+            with_category_names(session, projects)
+        return load
+
+    everything = args.rows
+    cases = {
+        "services_first_page": (
+            lambda s: list_page(
+                s, Service, PageParams(args.limit), SERVICE_SORT_FIELDS, published_service
+            ),
+            lambda s: list_page(
+                s, PublishedService, PageParams(args.limit), SERVICE_SORT_FIELDS
+            ),
+        ),
+        "services_by_title": (
+            lambda s: list_page(
+                s, Service, PageParams(args.limit, sort="title"),
+                SERVICE_SORT_FIELDS, published_service
+            ),
+            lambda s: list_page(
+                s, PublishedService, PageParams(args.limit, sort="title"),
+                SERVICE_SORT_FIELDS
+            ),
+        ),
+        "services_all": (
+            lambda s: list_page(
+                s, Service, PageParams(everything), SERVICE_SORT_FIELDS, published_service
+            ),
+            lambda s: list_page(
+                s, PublishedService, PageParams(everything), SERVICE_SORT_FIELDS
+            ),
+        ),
+        "projects_with_category_names": (
+            base_projects(published_project, args.limit),
+            lambda s: list_page(
+                s, PublishedProject, PageParams(args.limit), PROJECT_SORT_FIELDS
+            ),
+        ),
+        "projects_in_category": (
+            base_projects(published_project + [Project.category_id == 1], args.limit),
+            lambda s: list_page(
+                s, PublishedProject, PageParams(args.limit), PROJECT_SORT_FIELDS,
+                [PublishedProject.category_id == 1]
+            ),
+        ),
+        "projects_all_with_category_names": (
+            base_projects(published_project, everything),
+            lambda s: list_page(
+                s, PublishedProject, PageParams(everything), PROJECT_SORT_FIELDS
+            ),
+        ),
+    }
+
+    report = {
+        "dialect": engine.dialect.name,
+        "rows": args.rows,
+        "published": args.published,
+        "listings": {},
+    }
+    for name, (base, snapshot) in cases.items():
+        repeat = args.repeat if "all" not in name else max(args.repeat // 20, 3)
+        base_stats = timed(engine, base, repeat)
+        snapshot_stats = timed(engine, snapshot, repeat)
+        report["listings"][name] = {
+            "base_tables": base_stats,
+            "snapshot": snapshot_stats,
+            "speedup_p50": round(base_stats["p50_ms"] / snapshot_stats["p50_ms"], 2)
+            if snapshot_stats["p50_ms"] else None
+        }
+
+    ids = iter(range(1, args.rows + 1))
+    report["maintenance"] = {
+        "rebuild_ms": round(rebuild_seconds * 1000, 3),
+        "approve_with_refresh": timed(
+            engine,
+            lambda s: approve_content(s, Service, Service.id, next(ids), "admin"),
+            args.repeat
+        ),
+    }
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--published", type=float, default=0.3,
+                        help="fraction of rows that are published")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=100)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""Authenticated request latency with and without a populated revocation set.
+
+Runs the app in-process against a throwaway SQLite database and times an
+admin-only route, first with no revoked tokens and then with --revoked jtis
+spread across the token lifetime.
+
+    python -m benchmarks.bench_token_validation --requests 2000 --revoked 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from benchmarks.common import configure, summarize
+
+async def time_requests(client, headers, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.patch(
+            "/api/admin/projects/1/approve", headers=headers
+        )
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return summarize(latencies)
+
+async def main(args):
+    configure(
+        BCRYPT_ROUNDS=4,
+        AUTH_STATELESS=args.stateless,
+        TOKEN_REVOCATION_MAX_ENTRIES=args.revoked + 1,
+        # The timed route is an admin write, which would otherwise be
+        # throttled long before --requests is reached
+        RATE_LIMIT_ENABLED=False,
+    )
+
+    import httpx
+    from sqlmodel import Session
+
+    from app import db
+    from app.main import app
+    from app.migrations import migrate
+    from app.models.category import Category
+    from app.models.project import Project
+    from app.models.user import User
+    from app.utils.auth_utils import get_password_hash, token_revocations
+
+    migrate(db.engine)
+    with Session(db.engine) as session:
+        session.add(User(
+            username="admin",
+            hashed_password=get_password_hash("password"),
+            is_admin=True
+        ))
+        session.add(Category(category_id=1, category_name="Benchmark"))
+        session.add(Project(
+            project_id=1, project_image="image.jpg", category_id=1,
+            created_by="admin", last_modified_by="admin"
+        ))
+        session.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        login = await client.post(
+            "/api/auth/login",
+            data={"username": "admin", "password": "password"}
+        )
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        await time_requests(client, headers, 50)
+        empty = await time_requests(client, headers, args.requests)
+
+        now = time.time()
+        lifetime = 30 * 60
+        for index in range(args.revoked):
+            token_revocations.revoked.add(
+                uuid.uuid4().hex, now + 1 + index * lifetime / args.revoked
+            )
+        populated = await time_requests(client, headers, args.requests)
+
+    print(json.dumps({
+        "stateless": args.stateless,
+        "revoked_entries": len(token_revocations.revoked),
+        "empty_revocation_set": empty,
+        "populated_revocation_set": populated
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--stateless", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,34 @@
+import os
+import statistics
+import tempfile
+
+DEFAULT_ENV = {
+    "SECRET_KEY": "benchmark",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "BASE_URL": "http://127.0.0.1:8000",
+}
+
+def configure(**overrides):
+    # Settings are read at import time, so call this before importing app.*
+    for key, value in DEFAULT_ENV.items():
+        os.environ.setdefault(key, value)
+    if "DATABASE_URL" not in os.environ and "DATABASE_URL" not in overrides:
+        path = os.path.join(tempfile.mkdtemp(prefix="ikanos-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    for key, value in overrides.items():
+        os.environ[key] = str(value)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+def summarize(latencies: list[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3)
+    }